@@ -0,0 +1,3 @@
+"""
+Benchmarks of the macro-mancer hot paths; see ``benchmarks.run``.
+"""
@@ -0,0 +1,281 @@
+"""
+Benchmarks of the scoring, parsing, persistence and feed parsing hot paths.
+
+Run with ``python -m benchmarks.run`` (or ``make bench``). Every benchmark
+reports min / median / mean / max seconds over ``--repeat`` runs and the
+throughput in items per second, as one JSON document on stdout or in
+``--output``, so results can be diffed between commits.
+
+The storage benchmarks write synthetic rows, so they never touch
+DATABASE_URL: they use ``--database-url`` (or BENCH_DATABASE_URL) and fall
+back to a throwaway SQLite file. Point it at a scratch PostgreSQL database
+to measure the production path.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from .synthetic import AnalysisShape, SyntheticAnalysis, rss_feed
+
+
+def _summary(name: str, timings: List[float], items: int, **extra: Any) -> Dict[str, Any]:
+    median = statistics.median(timings)
+    return {
+        "name": name,
+        "runs": len(timings),
+        "items": items,
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+        "items_per_s": items / median if median > 0 else None,
+        **extra,
+    }
+
+
+def measure(
+    name: str,
+    function: Callable[[], Any],
+    items: int,
+    repeat: int,
+    setup: Optional[Callable[[], None]] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """Time ``function`` ``repeat`` times after one warm-up call; ``setup`` runs untimed before each call."""
+    if setup:
+        setup()
+    function()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return _summary(name, timings, items, **extra)
+
+
+async def measure_async(
+    name: str,
+    function: Callable[[int], Any],
+    items: int,
+    repeat: int,
+    setup: Optional[Callable[[], None]] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """Async ``measure``; ``function`` gets the run number (0 is the warm-up) to vary its input."""
+    if setup:
+        setup()
+    await function(0)
+    timings = []
+    for run in range(1, repeat + 1):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        await function(run)
+        timings.append(time.perf_counter() - started)
+    return _summary(name, timings, items, **extra)
+
+
+def bench_parsing(generator: SyntheticAnalysis, repeat: int) -> List[Dict[str, Any]]:
+    """AnalysisService._parse_analysis_data and the simulated make_recommendation over one analysis."""
+    from src.agents.tools import make_recommendation
+    from src.application.services.analysis_service import AnalysisService
+    from src.application.services.record_batch import RecordBatch
+
+    records = generator.records()
+    analysis_result = json.dumps(records)
+    service = AnalysisService(impact_repository=None, recommendation_repository=None)
+    forget = RecordBatch._parsed.clear  # time the parse itself, not the memo
+
+    return [
+        measure(
+            "parse_analysis_data", lambda: service._parse_analysis_data(analysis_result), len(records), repeat,
+            setup=forget, bytes=len(analysis_result),
+        ),
+        measure(
+            "parse_analysis_data_memoized", lambda: service._parse_analysis_data(analysis_result), len(records), repeat,
+        ),
+        asyncio.run(measure_async(
+            "make_recommendation_simulated",
+            lambda run: make_recommendation(analysis_result, db_simulation=True), len(records), repeat,
+            setup=forget,
+        )),
+    ]
+
+
+def _engine_scores(analyses: List[Any], graph: Any, as_of: datetime) -> Dict[str, float]:
+    """ScoringEngine scores of stored analyses, the reference for decayed_ticker_scores."""
+    from src.application.services.score_board import to_hours
+    from src.application.services.scoring_engine import ScoringEngine
+
+    name_keys = {"Asset": "Ticker", "Scope": "Scope", "Macro": "Location"}
+    records = []
+    for analysis in analyses:
+        kind = getattr(analysis.type, "value", analysis.type)
+        name = analysis.location if kind == "Macro" else analysis.entity
+        if kind in name_keys and name:
+            records.append({
+                "type": kind, name_keys[kind]: name, "impact": analysis.impact,
+                "timestamp": analysis.timestamp.isoformat(), "link": analysis.link or "",
+            })
+    rows = ScoringEngine(graph=graph).score(records, now=to_hours(as_of), with_links=False)
+    return {row["Ticker"]: row["weight"] for row in rows}
+
+
+async def _bench_storage(generator: SyntheticAnalysis, repeat: int, history_batches: int) -> List[Dict[str, Any]]:
+    from src.agents.tools import make_recommendation
+    from src.infrastructure.container import get_analysis_service, get_impact_repository, get_relation_service
+    from src.application.services.record_batch import RecordBatch
+
+    articles = generator.shape.articles
+    service = get_analysis_service()
+    repository = get_impact_repository()
+
+    # History of the freshness window, plus the relations the scoring stage needs
+    for number in range(history_batches):
+        await service.save_batch(RecordBatch.from_records(generator.records(offset=(number + 1) * articles)))
+    graph = await get_relation_service().ensure_loaded()
+
+    # The database aggregation must agree with ScoringEngine on the (cyclic) synthetic graph
+    cutoff = generator.now - timedelta(hours=generator.shape.window_hours)
+    stored = await repository.get_since(cutoff)
+    aggregated = await service.get_decayed_scores(cutoff, generator.now, graph.damping, graph.hops)
+    if aggregated is not None:
+        expected = _engine_scores(stored, graph, generator.now)
+        actual = {score.ticker: score.score for score in aggregated}
+        difference = max(
+            (abs(actual.get(ticker, 0.0) - expected.get(ticker, 0.0)) for ticker in expected.keys() | actual.keys()),
+            default=0.0,
+        )
+        if difference > 1e-6 * max([1.0, *map(abs, expected.values())]):
+            raise RuntimeError(f"decayed_ticker_scores differs from ScoringEngine by up to {difference}")
+
+    async def decayed_scores(run: int) -> None:
+        await service.get_decayed_scores(cutoff, generator.now, graph.damping, graph.hops)
+
+    fresh = {}
+
+    async def save_fresh(run: int) -> None:
+        # New links every run, so every row is an insert
+        batch = RecordBatch.from_records(generator.records(offset=(history_batches + run + 1) * articles))
+        fresh["analyses"] = batch.to_analyses()
+        await repository.save_many(fresh["analyses"])
+
+    async def save_replay(run: int) -> None:
+        await repository.save_many(fresh["analyses"])
+
+    async def get_since(run: int) -> None:
+        await repository.get_since(cutoff)
+
+    async def stream_points(run: int) -> None:
+        async for _ in repository.stream_points(["Asset", "Scope", "Macro"], cutoff):
+            pass
+
+    records = generator.records(offset=0)
+    analysis_result = json.dumps(records)
+
+    async def recommend(run: int) -> None:
+        await make_recommendation(analysis_result)
+
+    batch_rows = len(RecordBatch.from_records(records))
+    results = [
+        await measure_async("save_many_insert", save_fresh, batch_rows, repeat),
+        await measure_async("save_many_replay", save_replay, batch_rows, repeat),
+        await measure_async("get_since", get_since, len(stored), repeat),
+        await measure_async("stream_points", stream_points, len(stored), repeat),
+        await measure_async(
+            "make_recommendation_with_history", recommend, len(records), repeat, setup=RecordBatch._parsed.clear,
+        ),
+    ]
+    if aggregated is not None:
+        results.append(await measure_async("decayed_scores", decayed_scores, len(stored), repeat, tickers=len(aggregated)))
+    return results
+
+
+def bench_storage(generator: SyntheticAnalysis, repeat: int, history_batches: int) -> List[Dict[str, Any]]:
+    """save_many (new and replayed rows), get_since and stream_points, then make_recommendation on that history.
+
+    On PostgreSQL the decayed_ticker_scores aggregation is first checked against
+    ScoringEngine, then timed.
+    """
+    return asyncio.run(_bench_storage(generator, repeat, history_batches))
+
+
+def bench_feeds(items: int, repeat: int) -> List[Dict[str, Any]]:
+    """feedparser plus article extraction of one large feed, the per-feed CPU work of fetch_rss_news."""
+    import feedparser
+    from src.infrastructure.feeds.fetcher import FeedFetcher
+
+    document = rss_feed(items)
+    fetcher = FeedFetcher()
+    cutoff = datetime(2024, 12, 29)
+
+    def parse() -> None:
+        fetcher._extract_articles("https://news.example.com/rss", feedparser.parse(document), cutoff)
+
+    return [measure("feed_parse", parse, items, repeat, bytes=len(document))]
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=200, help="articles per synthetic analysis")
+    parser.add_argument("--tickers", type=int, default=500, help="distinct tickers")
+    parser.add_argument("--history-batches", type=int, default=10, help="analyses stored before timing reads")
+    parser.add_argument("--feed-items", type=int, default=2000, help="entries of the fixture feed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"), help="scratch database")
+    parser.add_argument("--only", nargs="*", choices=["parsing", "storage", "feeds"], help="benchmark groups to run")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # The app logs every batch at INFO; keep the timings clean
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+
+        generator = SyntheticAnalysis(AnalysisShape(articles=args.articles, tickers=args.tickers))
+        groups = args.only or ["parsing", "storage", "feeds"]
+        results: List[Dict[str, Any]] = []
+        if "parsing" in groups:
+            results += bench_parsing(generator, args.repeat)
+        if "storage" in groups:
+            results += bench_storage(generator, args.repeat, args.history_batches)
+        if "feeds" in groups:
+            results += bench_feeds(args.feed_items, args.repeat)
+
+        from src.infrastructure.database.config import db_config
+        report = {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": db_config.engine.dialect.name if "storage" in groups else None,
+            "async_database": os.getenv("DB_ASYNC", "true").lower() == "true",
+            "shape": asdict(generator.shape),
+            "history_batches": args.history_batches,
+            "feed_items": args.feed_items,
+            "results": results,
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,141 @@
+"""
+Synthetic analysis results and RSS feeds shaped like the production ones.
+
+Sizes follow what one analysis run produces: every article names a few
+tickers (Asset), tags them with scopes (Tag), places them somewhere
+(Location), moves a couple of scopes (Scope) and fans out into one Macro
+record per scope and location pair. Ticker popularity is skewed, so a few
+names collect most of the impacts, and timestamps spread over the
+freshness window.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+SECTORS = [
+    "Semiconductors", "Banks", "Oil & Gas", "Retail", "Airlines", "Biotech", "Insurance", "Utilities",
+    "Software", "Autos", "Mining", "Real Estate", "Telecom", "Shipping", "Defense", "Agriculture",
+]
+LOCATIONS = [
+    "USA", "China", "Germany", "Japan", "UK", "India", "Brazil", "Taiwan", "South Korea", "France",
+    "Canada", "Australia", "Saudi Arabia", "Mexico", "Netherlands", "Switzerland",
+]
+
+
+@dataclass
+class AnalysisShape:
+    """How big and how connected one synthetic analysis result is."""
+    articles: int = 200
+    tickers: int = 500
+    scopes: int = 48
+    locations: int = 16
+    assets_per_article: int = 3
+    scopes_per_article: int = 2
+    locations_per_article: int = 2
+    window_hours: float = 48.0
+    seed: int = 42
+
+
+class SyntheticAnalysis:
+    """Deterministic generator of ``analysis_result`` records."""
+
+    def __init__(self, shape: Optional[AnalysisShape] = None, now: Optional[datetime] = None):
+        self.shape = shape or AnalysisShape()
+        self.now = now or datetime(2025, 1, 1)
+        self._random = random.Random(self.shape.seed)
+        self.tickers = [self._ticker(index) for index in range(self.shape.tickers)]
+        self.scopes = [
+            f"{SECTORS[index % len(SECTORS)]}{'' if index < len(SECTORS) else f' {index // len(SECTORS)}'}"
+            for index in range(self.shape.scopes)
+        ]
+        self.locations = [
+            f"{LOCATIONS[index % len(LOCATIONS)]}{'' if index < len(LOCATIONS) else f' {index // len(LOCATIONS)}'}"
+            for index in range(self.shape.locations)
+        ]
+        # Zipf-like popularity: the first names are picked far more often
+        self._ticker_weights = [1.0 / (rank + 1) for rank in range(len(self.tickers))]
+        self._scope_weights = [1.0 / (rank + 1) ** 0.5 for rank in range(len(self.scopes))]
+
+    @staticmethod
+    def _ticker(index: int) -> str:
+        letters = ""
+        index += 26  # at least two letters
+        while index:
+            index, remainder = divmod(index, 26)
+            letters = chr(ord("A") + remainder) + letters
+        return letters
+
+    def _pick(self, names: List[str], weights: Optional[List[float]], count: int) -> List[str]:
+        picked = set()
+        while len(picked) < min(count, len(names)):
+            picked.update(self._random.choices(names, weights=weights, k=count - len(picked)))
+        return sorted(picked)
+
+    def records(self, articles: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Records of ``articles`` synthetic articles; ``offset`` keeps links of later batches distinct."""
+        shape = self.shape
+        records: List[Dict[str, Any]] = []
+        for number in range(offset, offset + (articles if articles is not None else shape.articles)):
+            link = f"https://news.example.com/article/{number}"
+            summary = f"Synthetic article {number}"
+            timestamp = (self.now - timedelta(hours=self._random.uniform(0, shape.window_hours))).isoformat(
+                timespec="seconds"
+            )
+            tickers = self._pick(self.tickers, self._ticker_weights, shape.assets_per_article)
+            scopes = self._pick(self.scopes, self._scope_weights, shape.scopes_per_article)
+            locations = self._pick(self.locations, None, shape.locations_per_article)
+
+            for ticker in tickers:
+                records.append({
+                    "type": "Asset", "Summary": summary, "link": link, "Ticker": ticker,
+                    "impact": self._impact(), "timestamp": timestamp,
+                })
+                records.append({"type": "Tag", "Asset": ticker, "Scope": self._random.choice(scopes)})
+                records.append({"type": "Location", "Asset": ticker, "Scope": self._random.choice(locations)})
+            for scope in scopes:
+                records.append({
+                    "type": "Scope", "Summary": summary, "link": link, "Scope": scope,
+                    "impact": self._impact(), "timestamp": timestamp,
+                })
+            if len(scopes) > 1:
+                records.append({"type": "ScopeRelation", "Scope1": scopes[0], "Scope2": scopes[1]})
+            for scope in scopes:
+                for location in locations:
+                    records.append({
+                        "type": "Macro", "Summary": summary, "link": link, "Scope": scope, "Location": location,
+                        "impact": self._impact(), "timestamp": timestamp,
+                    })
+        return records
+
+    def _impact(self) -> int:
+        return self._random.choice([-3, -2, -1, -1, 0, 1, 1, 2, 3])
+
+
+def rss_feed(items: int, now: Optional[datetime] = None, seed: int = 7) -> bytes:
+    """An RSS 2.0 document with ``items`` entries spread over the last two days."""
+    now = now or datetime(2025, 1, 1)
+    rng = random.Random(seed)
+    entries = []
+    for number in range(items):
+        published = now - timedelta(minutes=rng.uniform(0, 48 * 60))
+        title = f"Markets move as {rng.choice(SECTORS)} react to {rng.choice(LOCATIONS)} data #{number}"
+        summary = " ".join(rng.choice(SECTORS + LOCATIONS) for _ in range(40))
+        entries.append(
+            "<item>"
+            f"<title>{escape(title)}</title>"
+            f"<link>https://news.example.com/feed/{number}</link>"
+            f"<guid>https://news.example.com/feed/{number}</guid>"
+            f"<pubDate>{format_datetime(published.replace(tzinfo=timezone.utc), usegmt=True)}</pubDate>"
+            f"<description>{escape(summary)}</description>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel><title>Synthetic markets</title>'
+        "<link>https://news.example.com</link><description>Benchmark fixture</description>"
+        + "".join(entries)
+        + "</channel></rss>"
+    ).encode("utf-8")
@@ -1,13 +1,22 @@
+import asyncio
 import requests
 from bs4 import BeautifulSoup
-from newspaper import Article, ArticleException
 import time
 import random
-import json
-from datetime import datetime, timezone  # Import for datetime handling
+from datetime import datetime, timedelta, timezone  # Import for datetime handling
+
+from src.infrastructure.feeds.extractor import ArticleExtractor
 
 debug_article_loc = "./scrap"
 
+async def extract_articles(urls):
+    """Extract every url with one ArticleExtractor, closing its client and parsing processes afterwards."""
+    extractor = ArticleExtractor()
+    try:
+        return await extractor.extract_many(urls)
+    finally:
+        await extractor.aclose()
+
 def find_key(data, target_key):
     if isinstance(data, dict):
         for key, value in data.items():
@@ -59,7 +68,8 @@ def get_yahoo_finance_general_news_articles(num_pages=3, since_datetime=None):
     ts_list=[]
     """
     Scrapes general financial news headlines and links from Yahoo Finance,
-    then attempts to download and extract the full text and metadata for each article.
+    then downloads and extracts the full text and metadata of all articles
+    concurrently with ArticleExtractor.
     Filters articles to include only those published after a specified datetime.
 
     Args:
@@ -77,6 +87,7 @@ def get_yahoo_finance_general_news_articles(num_pages=3, since_datetime=None):
     """
     base_url = "https://finance.yahoo.com/news/"
     all_articles_data = []
+    candidates = []  # (article link, listed publication time) of every fresh article
 
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
@@ -112,7 +123,6 @@ def get_yahoo_finance_general_news_articles(num_pages=3, since_datetime=None):
                 break
 
             print(f"  Found {len(news_items)} potential articles on page {i + 1}.")
-            i = 0
 
             for item in news_items:
                 link_tag = item.find('a', class_='subtle-link')
@@ -121,70 +131,21 @@ def get_yahoo_finance_general_news_articles(num_pages=3, since_datetime=None):
                     print("Failed date extraction: ", item)
                     continue
                 publishing_data = select_result_set[0].text.strip()
-                matches = re.findall(pattern, publishing_data)
-                article_published_date=convert_to_timestamp(matches[0])
-                #[i.text for i in select_result_set]
                 ts_list.append(publishing_data)
+                matches = re.findall(pattern, publishing_data)
+                article_published_date = convert_to_timestamp(matches[0]) if matches else None
+
+                # Check if the article is fresh enough
+                if since_datetime and article_published_date and datetime.fromisoformat(article_published_date) < since_datetime:
+                    print(f"    - Article at {publishing_data} is too old. Stopping page processing.")
+                    found_old_article = True  # Mark to stop outer loop
+                    break  # Stop processing articles on this page
+
                 if link_tag and link_tag.get('href'):
                     article_url = link_tag['href']
                     if not article_url.startswith('http'):
                         article_url = "https://finance.yahoo.com" + article_url
-
-                    try:
-                        article = Article(article_url)
-                        article.download()
-                        article.parse()
-                        article_published_date = None
-                        """
-                        if article.publish_date:
-
-                            # newspaper3k often returns timezone-naive datetimes.
-                            # We make it timezone-aware (UTC) for consistent comparison.
-                            # Adjust this if Yahoo Finance provides timezone info in its dates.
-                            article_published_date = article.publish_date.replace(tzinfo=timezone.utc)
-                            # print(f"    - Article '{article.title}' published: {article_published_date.isoformat()}")
-                        else:
-                            print(f"NO DATETIME: {article_url}")
-                            try:
-
-                                article_meta_data = article.meta_data
-                                print("Found: ",find_key(article_meta_data,"publishDate"))
-
-
-                                with open(f"{debug_article_loc}/failed_meta{i}.json", "w", encoding="utf-8") as file:
-                                    json.dumps(article_meta_data)
-
-                            except ArticleException as error:
-                                print(error)
-
-                            with open(f"{debug_article_loc}/failed{i}.html", "w", encoding="utf-8") as file:
-                                file.write(article.html)
-                            i += 1
-                        """
-                        # Check if the article is fresh enough
-                        if since_datetime and article_published_date and article_published_date < since_datetime:
-                            print(
-                                f"    - Article '{article.title}' is too old ({article_published_date.isoformat()}). Stopping page processing.")
-                            found_old_article = True  # Mark to stop outer loop
-                            break  # Stop processing articles on this page
-
-                        # Only add if it's new enough or no filter is applied
-                        article_data = {
-                            "title": article.title,
-                            "link": article_url,
-                            "published_date": str(article_published_date) if article_published_date else None,
-                            "authors": article.authors,
-                            "text": article.text
-                        }
-                        all_articles_data.append(article_data)
-                        # print(f"    - Added: '{article.title}'")
-
-                    except ArticleException as ae:
-                        print(f"    - Could not process article at {article_url}: {ae}")
-                    except Exception as sub_e:
-                        print(f"    - An unexpected error processing {article_url}: {sub_e}")
-
-                time.sleep(random.uniform(0.5, 1.5))  # Small delay between processing articles on a page
+                    candidates.append((article_url, article_published_date))
 
             print(f"Finished processing page {i + 1}.")
             time.sleep(random.uniform(2, 5))  # Polite delay between pages
@@ -196,6 +157,23 @@ def get_yahoo_finance_general_news_articles(num_pages=3, since_datetime=None):
             print(f"An unexpected error occurred while processing page {i + 1}: {e}")
             break
 
+    # Download and parse every listed article at once: per-host token buckets
+    # instead of fixed sleeps, parsing in worker processes, cached on disk
+    print(f"Extracting {len(candidates)} articles...")
+    extracted = asyncio.run(extract_articles([url for url, _ in candidates]))
+    for article_url, article_published_date in candidates:
+        article = extracted.get(article_url)
+        if article is None:
+            print(f"    - Could not process article at {article_url}")
+            continue
+        all_articles_data.append({
+            "title": article["title"],
+            "link": article_url,
+            "published_date": article_published_date or article["published"],
+            "authors": article["authors"],
+            "text": article["text"]
+        })
+
     print(f"--- Finished News Scraping. Total fresh articles extracted: {len(all_articles_data)} ---")
     print(ts_list)
     return all_articles_data
@@ -222,7 +200,6 @@ if __name__ == "__main__":
     #current_utc_time = datetime(2025, 6, 23, 17, 12, 1, tzinfo=timezone.utc)
     current_utc_time = datetime.now()
     # Example: Get articles from the last 24 hours
-    from datetime import timedelta
     since_24_hours_ago = current_utc_time - timedelta(hours=24)
     print(f"\n--- Testing with articles after: {since_24_hours_ago.isoformat()} ---")
     recent_articles = get_yahoo_finance_general_news_articles(num_pages=1, since_datetime=since_24_hours_ago)
@@ -1,10 +1,12 @@
+import os
 from google.adk.agents import Agent, SequentialAgent
-from .tools import rss_tool, process_analysis_tool, save_analysis_tool
+from .tools import rss_tool, process_analysis, save_analysis_to_db
+from .analysis_engine import BatchedNewsAnalyzer
+from .tool_step import ToolStep
+from ..infrastructure.instrumentation import agent_callbacks
 from .prompt import (
     NEWS_FETCHER_PROMPT,
-    ANALYSIS_PROMPT,
     RECOMMENDER_PROMPT,
-    SAVER_PROMPT
 )
 GEMINI_MODEL= "gemini-2.0-flash-exp"
 
@@ -16,44 +18,63 @@ news_fetcher = Agent(
     tools=[rss_tool],
     output_key="articles",  # Specify the output key for the articles
     disallow_transfer_to_parent=True,  # Prevent transferring back to parent
-    instruction=NEWS_FETCHER_PROMPT
+    instruction=NEWS_FETCHER_PROMPT,
+    **agent_callbacks(llm=True)
 )
 
 # TODO we should dongrade the results into list of simple dicts:
 # https://github.com/google/adk-python/issues/293
 
-recommender=Agent(
-    name="recommender",
+# Create the recommender step: process_analysis runs without a model turn;
+# the writer turns its result into prose only when the session state has
+# 'prose' set (or RECOMMENDATION_PROSE=true)
+recommendation_writer = Agent(
+    name="recommendation_writer",
     model=GEMINI_MODEL,
-    description="Agent to recommend assets",
-    disallow_transfer_to_parent = True,
+    description="Writes the recommendations as prose",
+    disallow_transfer_to_parent=True,
     instruction=RECOMMENDER_PROMPT,
-    tools = [process_analysis_tool]
+    **agent_callbacks(llm=True)
+)
+
+recommender = ToolStep(
+    name="recommender",
+    description="Recommends assets from the stored scores",
+    tool=process_analysis,
+    output_key="recommendations",
+    prose_env="RECOMMENDATION_PROSE",
+    sub_agents=[recommendation_writer],
+    **agent_callbacks()
 )
 
-# Create the news analyzer agent
-news_analyzer = Agent(
+# Create the news analyzer step: ANALYSIS_PROMPT runs over token-budgeted
+# chunks of the fetched articles in parallel, merged into 'analysis_result'
+news_analyzer = BatchedNewsAnalyzer(
     name="news_analyzer",
     model=GEMINI_MODEL,
     description="Analyzes individual news articles for market impact and sentiment",
-    output_key='analysis_result',
-    instruction=ANALYSIS_PROMPT
+    **agent_callbacks()
 )
 
-# Create a database saver agent (new!)
-db_saver = Agent(
+# Create the database saver step: calls save_analysis_to_db directly, no model turn
+db_saver = ToolStep(
     name="db_saver",
-    model=GEMINI_MODEL,
     description="Saves analysis results to database",
-    disallow_transfer_to_parent=True,
-    instruction=SAVER_PROMPT,
-    tools=[save_analysis_tool]
+    tool=save_analysis_to_db,
+    **agent_callbacks()
 )
 
-# Create the root coordinator agent
+# Create the root coordinator agent; while the ingestion daemon (python -m
+# src.agents.ingest) keeps the leaderboard fresh, a turn only reads it
+if os.getenv("BACKGROUND_INGESTION", "false").lower() == "true":
+    pipeline_agents = [recommender]
+else:
+    pipeline_agents = [news_fetcher, news_analyzer, db_saver, recommender]
+
 root_agent = SequentialAgent(
     name="MacroMancerAgent",
-    sub_agents=[news_fetcher, news_analyzer, db_saver, recommender]
+    sub_agents=pipeline_agents,
+    **agent_callbacks()
 )
 
 
@@ -0,0 +1,294 @@
+"""
+Batched analysis engine - runs ANALYSIS_PROMPT over token-budgeted article chunks in parallel.
+"""
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from .prompt import ANALYSIS_PROMPT, ANALYSIS_BATCH_INSTRUCTION
+from ..application.services.analysis_cache import AnalysisCache, article_hash, prompt_hash
+from ..application.services.record_batch import RecordBatch
+from ..infrastructure.container import get_analysis_cache
+from ..infrastructure.instrumentation import instrumented, record, stage
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a Gemini token for English news text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(article: Dict[str, Any]) -> int:
+    """Cheap token estimate of an article as it is sent to the model."""
+    return len(json.dumps(article, ensure_ascii=False)) // CHARS_PER_TOKEN + 1
+
+
+def chunk_articles(articles: List[Dict[str, Any]], token_budget: int) -> List[List[Dict[str, Any]]]:
+    """Greedily pack articles, in order, into chunks that fit the token budget.
+
+    An article larger than the whole budget gets a chunk of its own.
+    """
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for article in articles:
+        tokens = estimate_tokens(article)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(article)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_records(text: str) -> List[Dict[str, Any]]:
+    """Parse a model answer into a list of analysis records."""
+    cleaned = text.replace('```json', '').replace('```', '').strip()
+    data = json.loads(cleaned)
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a JSON list, got {type(data).__name__}")
+    return [row for row in data if isinstance(row, dict)]
+
+
+def attribute_records(chunk: List[Dict[str, Any]], records: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split the records of a chunk back onto the articles they came from.
+
+    Records carrying a ``link`` go to that article. Tag, Location and
+    ScopeRelation records have no link; they follow the article whose
+    records named the same asset or scope, or the first article otherwise.
+    """
+    per_article: List[List[Dict[str, Any]]] = [[] for _ in chunk]
+    by_link: Dict[str, int] = {}
+    for index, article in enumerate(chunk):
+        for link in [article.get('link')] + list(article.get('references') or []):
+            if link:
+                by_link.setdefault(str(link).strip(), index)
+
+    by_name: Dict[str, int] = {}
+    unlinked = []
+    for row in records:
+        index = by_link.get(str(row.get('link') or '').strip())
+        if index is None:
+            unlinked.append(row)
+            continue
+        per_article[index].append(row)
+        for key in ('Ticker', 'Asset', 'Scope'):
+            if row.get(key):
+                by_name.setdefault(str(row[key]), index)
+
+    for row in unlinked:
+        index = next(
+            (
+                by_name[str(row[key])]
+                for key in ('Asset', 'Ticker', 'Scope', 'Scope1', 'Scope2')
+                if row.get(key) and str(row[key]) in by_name
+            ),
+            0,
+        )
+        per_article[index].append(row)
+    return per_article
+
+
+@dataclass
+class AnalysisBatchResult:
+    """Merged outcome of analyzing a batch of articles."""
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    chunk_count: int = 0
+    cache_hits: int = 0
+    failed_links: List[str] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps(self.records, ensure_ascii=False)
+
+
+class AnalysisEngine:
+    """Analyzes articles in token-budgeted chunks on a bounded worker pool.
+
+    All chunks are first analyzed concurrently, at most ``max_workers`` at a
+    time. Chunks that fail are then retried one at a time with backoff, so a
+    bad chunk never forces the whole batch to be redone. The per-chunk record
+    lists are concatenated in chunk order, which gives the same
+    ``analysis_result`` schema as a single-turn analysis.
+
+    With an ``AnalysisCache``, articles whose content and prompt version were
+    analyzed before are answered from the cache and never reach the model.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        chunk_tokens: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: float = 2.0,
+        call_model: Optional[Callable[[str], Awaitable[str]]] = None,
+        cache: Optional[AnalysisCache] = None,
+    ):
+        self.model = model or "gemini-2.0-flash-exp"
+        self.chunk_tokens = chunk_tokens or int(os.getenv("ANALYSIS_CHUNK_TOKENS", "6000"))
+        self.max_workers = max_workers or int(os.getenv("ANALYSIS_MAX_WORKERS", "4"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("ANALYSIS_MAX_RETRIES", "2"))
+        self.retry_backoff = retry_backoff
+        self._call_model = call_model or self._generate
+        self._client = None
+        self.cache = cache
+        self.prompt_version = prompt_hash(ANALYSIS_PROMPT + ANALYSIS_BATCH_INSTRUCTION, self.model)
+
+    @instrumented("analyze_news")
+    async def analyze(self, articles: List[Dict[str, Any]]) -> AnalysisBatchResult:
+        """Analyze all articles and merge the per-chunk records."""
+        record(rows_in=len(articles))
+        hashes = [article_hash(article) for article in articles]
+        known: Dict[str, List[Dict[str, Any]]] = {}
+        if self.cache is not None and articles:
+            known = await self.cache.get_many(list(dict.fromkeys(hashes)), self.prompt_version)
+
+        pending = [article for article, key in zip(articles, hashes) if key not in known]
+        chunks = chunk_articles(pending, self.chunk_tokens)
+        batch = AnalysisBatchResult(chunk_count=len(chunks), cache_hits=len(articles) - len(pending))
+        if not articles:
+            return batch
+
+        logger.info(
+            f"Analyzing {len(pending)} articles in {len(chunks)} chunks "
+            f"({batch.cache_hits} answered from cache)"
+        )
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(chunk: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+            async with semaphore:
+                return await self._try_chunk(chunk)
+
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+        for index, chunk in enumerate(chunks):
+            attempt = 0
+            while results[index] is None and attempt < self.max_retries:
+                attempt += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                logger.info(f"Retrying chunk {index + 1}/{len(chunks)} (attempt {attempt})")
+                results[index] = await self._try_chunk(chunk)
+
+        fresh: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk, records in zip(chunks, results):
+            if records is None:
+                batch.failed_links.extend(article.get('link', '') for article in chunk)
+                continue
+            for article, article_records in zip(chunk, attribute_records(chunk, records)):
+                fresh.setdefault(article_hash(article), []).extend(article_records)
+
+        if self.cache is not None:
+            await self.cache.put_many(fresh, self.prompt_version)
+
+        known.update(fresh)
+        for key in dict.fromkeys(hashes):
+            batch.records.extend(known.get(key, []))
+
+        if batch.failed_links:
+            logger.error(f"Analysis failed for {len(batch.failed_links)} articles after retries")
+        record(rows_out=len(batch.records))
+        return batch
+
+    async def analyze_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze one chunk of articles; raises on model or parse errors."""
+        prompt = "News articles to analyze:\n" + json.dumps(chunk, ensure_ascii=False)
+        return parse_records(await self._call_model(prompt))
+
+    async def _try_chunk(self, chunk: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Analyze one chunk, returning None instead of raising."""
+        try:
+            return await self.analyze_chunk(chunk)
+        except Exception as e:
+            logger.warning(f"Chunk of {len(chunk)} articles failed: {e}")
+            return None
+
+    async def _generate(self, prompt: str) -> str:
+        """Single Gemini call with the analysis prompt as system instruction."""
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client()
+
+        with stage("llm.generate_content"):
+            response = await self._client.aio.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    system_instruction=ANALYSIS_PROMPT + ANALYSIS_BATCH_INSTRUCTION,
+                    response_mime_type="application/json",
+                ),
+            )
+            usage = response.usage_metadata
+            if usage is not None:
+                record(
+                    prompt_tokens=usage.prompt_token_count or 0,
+                    completion_tokens=usage.candidates_token_count or 0,
+                )
+        return response.text or "[]"
+
+
+class BatchedNewsAnalyzer(BaseAgent):
+    """Pipeline step that runs the AnalysisEngine over the fetched articles.
+
+    Reads the article batch stored by ``fetch_rss_news`` under
+    ``fetched_articles`` and writes the merged records to
+    ``analysis_result``, the same key the LLM analyzer used. Links of
+    articles whose chunk failed after retries go to ``failed_links``, so the
+    saver leaves them unseen for the next run, and the number of records to
+    ``analysis_count``. Without ``fetched_articles`` it yields an error event
+    and an empty ``analysis_result``.
+    """
+
+    model: str = "gemini-2.0-flash-exp"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        articles = ctx.session.state.get('fetched_articles')
+        if articles is None:
+            message = "fetch_rss_news did not run in this session; there are no fetched articles to analyze"
+            logger.error(message)
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                error_code="NO_FETCHED_ARTICLES",
+                error_message=message,
+                content=types.Content(role="model", parts=[types.Part(text=message)]),
+                actions=EventActions(state_delta={'analysis_result': "[]", 'failed_links': [], 'analysis_count': 0}),
+            )
+            return
+
+        engine = AnalysisEngine(model=self.model, cache=get_analysis_cache())
+        batch = await engine.analyze(articles)
+
+        message = (
+            f"Analyzed {len(articles)} articles in {batch.chunk_count} chunks "
+            f"({batch.cache_hits} from cache): {len(batch.records)} records"
+        )
+        if batch.failed_links:
+            message += f", {len(batch.failed_links)} articles failed"
+
+        # The state keeps the JSON; the save and scoring tools get this parse back from it
+        analysis_result = batch.to_json()
+        RecordBatch.from_records(batch.records).remember(analysis_result)
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=message)]),
+            actions=EventActions(state_delta={
+                'analysis_result': analysis_result,
+                'failed_links': batch.failed_links,
+                'analysis_count': len(batch.records),
+            }),
+        )
@@ -0,0 +1,126 @@
+"""
+Ingestion daemon - keeps the stored analyses and the recommendation leaderboard fresh in the background.
+
+Run with ``python -m src.agents.ingest`` (or ``make ingest``). With it
+running, set BACKGROUND_INGESTION=true for the agents: a user turn then only
+reads the leaderboard instead of fetching and analyzing the feeds itself.
+"""
+import asyncio
+import logging
+import os
+import signal
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from .analysis_engine import AnalysisEngine
+from .pipeline import StreamingPipeline
+from .tools import configured_feeds, get_last_update_time, load_feed_states
+from ..application.services.feed_scheduler import FeedScheduler
+from ..domain.entities import FeedState
+from ..infrastructure.container import get_analysis_cache
+from ..infrastructure.database.partitions import ImpactPartitionManager
+from ..infrastructure.feeds.extractor import ArticleExtractor
+from ..infrastructure.instrumentation import write_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionDaemon:
+    """Polls every feed when its ``FeedScheduler`` interval is up and streams the due feeds through the pipeline.
+
+    Each wake-up runs one ``StreamingPipeline`` over the feeds that are due,
+    which saves and scores their new articles and refreshes the leaderboard,
+    then sleeps until the next feed is due. The pipeline records every
+    feed's next poll time in feed_state, so a restarted daemon picks up the
+    learned intervals. A feed is never polled again within the scheduler's
+    minimum interval, even when its state could not be saved. Impact table
+    maintenance and analysis cache eviction run every
+    ``maintenance_interval`` seconds. With
+    ARTICLE_FULL_TEXT=true one ``ArticleExtractor`` serves every wake-up,
+    so its process pool and per-host rate limits carry over between runs.
+    """
+
+    def __init__(
+        self,
+        feeds: Optional[List[str]] = None,
+        scheduler: Optional[FeedScheduler] = None,
+        engine: Optional[AnalysisEngine] = None,
+        maintenance_interval: Optional[float] = None,
+        extractor: Optional[ArticleExtractor] = None,
+    ):
+        self.feeds = feeds or configured_feeds()
+        self.scheduler = scheduler or FeedScheduler()
+        self.engine = engine or AnalysisEngine(cache=get_analysis_cache())
+        self.maintenance_interval = maintenance_interval or float(os.getenv("INGEST_MAINTENANCE_SECONDS", "3600"))
+        if extractor is None and os.getenv("ARTICLE_FULL_TEXT", "false").lower() == "true":
+            extractor = ArticleExtractor()
+        self.extractor = extractor
+        self._polled_at: Dict[str, datetime] = {}
+        self._maintained_at: Optional[datetime] = None
+
+    def _due_at(self, url: str, states: Dict[str, FeedState], now: datetime) -> datetime:
+        due_at = self.scheduler.due_at(states.get(url), now)
+        if url in self._polled_at:
+            due_at = max(due_at, self._polled_at[url] + timedelta(seconds=self.scheduler.min_interval))
+        return due_at
+
+    async def run_once(self) -> float:
+        """Ingest the feeds that are due and run maintenance if it is time; returns the seconds to sleep."""
+        now = datetime.utcnow()
+        states = await load_feed_states()
+        due = [url for url in self.feeds if self._due_at(url, states, now) <= now]
+        if due:
+            logger.info(f"Ingesting {len(due)}/{len(self.feeds)} due feeds")
+            pipeline = StreamingPipeline(engine=self.engine, extractor=self.extractor)
+            try:
+                await pipeline.run(due, get_last_update_time())
+            except Exception as e:
+                logger.error(f"Ingestion of {len(due)} feeds failed: {e}")
+            self._polled_at.update((url, now) for url in due)
+            states = await load_feed_states()
+
+        if self._maintained_at is None or now - self._maintained_at >= timedelta(seconds=self.maintenance_interval):
+            self._maintained_at = now
+            # Rollups, partitions ahead and retention; a failure is retried next time
+            try:
+                await asyncio.to_thread(ImpactPartitionManager().maintain)
+            except Exception as e:
+                logger.warning(f"Impact table maintenance failed: {e}")
+            await get_analysis_cache().evict()
+        write_metrics()
+
+        now = datetime.utcnow()
+        wake_at = min(
+            [self._due_at(url, states, now) for url in self.feeds]
+            + [self._maintained_at + timedelta(seconds=self.maintenance_interval)]
+        )
+        return max(1.0, (wake_at - now).total_seconds())
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Ingest until ``stop`` is set."""
+        stop = stop or asyncio.Event()
+        logger.info(f"Ingestion daemon started for {len(self.feeds)} feeds")
+        try:
+            while not stop.is_set():
+                sleep = await self.run_once()
+                logger.info(f"Next ingestion in {sleep:.0f}s")
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=sleep)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self.extractor is not None:
+                await self.extractor.aclose()
+        logger.info("Ingestion daemon stopped")
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    await IngestionDaemon().run(stop)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
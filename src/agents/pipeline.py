@@ -0,0 +1,279 @@
+"""
+Streaming pipeline - fetch, analyze, save and score articles as an async producer/consumer chain.
+
+Run once over the configured feeds with ``python -m src.agents.pipeline``.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from datetime import datetime
+
+from .analysis_engine import AnalysisEngine
+from .tools import (
+    article_feeds,
+    configured_feeds,
+    get_last_update_time,
+    load_feed_states,
+    observe_feeds,
+    save_feed_states,
+)
+from ..application.services.article_deduplicator import ArticleDeduplicator
+from ..application.services.record_batch import RecordBatch
+from ..application.services.score_board import ScoreBoard
+from ..domain.entities import FeedState
+from ..infrastructure.container import (
+    get_analysis_cache,
+    get_analysis_service,
+    get_score_service,
+    get_seen_article_service,
+)
+from ..infrastructure.database.partitions import ImpactPartitionManager
+from ..infrastructure.instrumentation import instrumented, log_summary, stage, use_in_memory_spans, write_metrics
+from ..infrastructure.feeds.extractor import ArticleExtractor
+from ..infrastructure.feeds.fetcher import FeedFetcher, FeedResult
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    """Counters of one pipeline run."""
+    fetched: int = 0
+    analyzed: int = 0
+    failed: int = 0
+    saved: int = 0
+    scored: int = 0
+
+
+class StreamingPipeline:
+    """Moves each article through fetch -> analyze -> save -> score on its own.
+
+    The stages are connected by bounded ``asyncio.Queue``s. A full queue
+    blocks the stage upstream of it (backpressure), so memory is bounded by
+    the queue sizes and not by the batch size. A stage that finishes sends
+    the end-of-stream marker downstream; a stage that fails sends nothing,
+    since its task group then cancels every other stage. An article is analyzed as
+    soon as its feed arrives, saved as soon as its analysis returns, and
+    shows up in the recommendations right after that. The whole batch is
+    never waited for.
+
+    With an ``extractor`` (or ARTICLE_FULL_TEXT=true) an extract stage
+    between fetch and analysis adds the full text of each feed's new
+    articles, several feeds at a time, so slow article downloads never hold
+    up fetching. An extractor passed in is left open for the caller to
+    reuse; one created from the environment is closed at the end of the run.
+
+    ``batch_size`` > 1 lets an analysis worker group articles that are
+    already waiting into one model call, trading a little latency for fewer
+    calls.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[AnalysisEngine] = None,
+        fetcher: Optional[FeedFetcher] = None,
+        queue_size: Optional[int] = None,
+        analysis_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        on_update: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        extractor: Optional[ArticleExtractor] = None,
+    ):
+        self.engine = engine or AnalysisEngine(cache=get_analysis_cache())
+        self.fetcher = fetcher or FeedFetcher()
+        self.queue_size = queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+        self.analysis_workers = analysis_workers or int(os.getenv("PIPELINE_ANALYSIS_WORKERS", "4"))
+        self.batch_size = batch_size or int(os.getenv("PIPELINE_BATCH_SIZE", "1"))
+        self.on_update = on_update
+        self._owns_extractor = extractor is None and os.getenv("ARTICLE_FULL_TEXT", "false").lower() == "true"
+        self.extractor = ArticleExtractor() if self._owns_extractor else extractor
+        self.scores = ScoreBoard()
+        self.stats = PipelineStats()
+        self._validators: Dict[str, FeedState] = {}
+        self._feed_results: List[FeedResult] = []
+        self._unhandled_feeds: Set[str] = set()
+
+    async def run(self, feeds: List[str], cutoff_time: datetime) -> List[Dict[str, Any]]:
+        """Stream all feeds through the pipeline and return the final top recommendations."""
+        fetched: asyncio.Queue = asyncio.Queue(self.queue_size)
+        articles: asyncio.Queue = asyncio.Queue(self.queue_size)
+        analyzed: asyncio.Queue = asyncio.Queue(self.queue_size)
+        saved: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._feed_results, self._unhandled_feeds = [], set()
+
+        with stage("pipeline.run"):
+            try:
+                async with asyncio.TaskGroup() as group:
+                    group.create_task(self._fetch_stage(feeds, cutoff_time, fetched))
+                    group.create_task(self._extract_stage(fetched, articles))
+                    for _ in range(self.analysis_workers):
+                        group.create_task(self._analysis_stage(articles, analyzed))
+                    group.create_task(self._save_stage(analyzed, saved))
+                    group.create_task(self._score_stage(saved))
+            finally:
+                if self._owns_extractor:
+                    await self.extractor.aclose()
+
+            # Only now are the articles saved and marked seen; feeds with articles
+            # that were not keep their old validators, so the next poll is no 304
+            await save_feed_states(
+                observe_feeds(self._feed_results, self._validators), self._validators, self._unhandled_feeds
+            )
+
+        logger.info(f"Pipeline finished: {self.stats}")
+        return self.scores.top()
+
+    @instrumented("pipeline.fetch")
+    async def _fetch_stage(self, feeds: List[str], cutoff_time: datetime, out: asyncio.Queue) -> None:
+        seen_service = get_seen_article_service()
+        try:
+            await seen_service.ensure_loaded(cutoff_time)
+        except Exception as e:
+            logger.warning(f"Could not load seen articles, keeping all: {e}")
+
+        deduplicator = ArticleDeduplicator()
+        self._validators = await load_feed_states()
+        async for result in self.fetcher.iter_results(feeds, cutoff_time, self._validators):
+            self._feed_results.append(result)
+            admitted = [
+                article for article in await seen_service.filter_unseen(result.articles)
+                if deduplicator.admit(article)
+            ]
+            if admitted:
+                await out.put(admitted)
+        await out.put(_DONE)
+
+    async def _extract_stage(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        """Pass each feed's articles on, with their full text when there is an extractor."""
+        # Feeds are enriched concurrently, at most queue_size at a time
+        in_flight = asyncio.Semaphore(self.queue_size)
+        async with asyncio.TaskGroup() as group:
+            while True:
+                articles = await inbox.get()
+                if articles is _DONE:
+                    break
+                if self.extractor is None:
+                    await self._forward(articles, out)
+                else:
+                    await in_flight.acquire()
+                    group.create_task(self._enrich(articles, out, in_flight))
+        for _ in range(self.analysis_workers):
+            await out.put(_DONE)
+
+    async def _enrich(self, articles: List[Dict[str, Any]], out: asyncio.Queue, in_flight: asyncio.Semaphore) -> None:
+        try:
+            try:
+                await self.extractor.enrich(articles)
+            except Exception as e:
+                logger.warning(f"Full-text extraction failed, analyzing the summaries: {e}")
+            await self._forward(articles, out)
+        finally:
+            in_flight.release()
+
+    async def _forward(self, articles: List[Dict[str, Any]], out: asyncio.Queue) -> None:
+        for article in articles:
+            self.stats.fetched += 1
+            await out.put(article)
+
+    async def _analysis_stage(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        done = False
+        while not done:
+            item = await inbox.get()
+            if item is _DONE:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size and not inbox.empty():
+                item = inbox.get_nowait()
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            try:
+                result = await self.engine.analyze(batch)
+            except Exception as e:
+                logger.error(f"Analysis of {len(batch)} articles failed: {e}")
+                self.stats.failed += len(batch)
+                self._unhandled(batch)
+                continue
+
+            failed = set(result.failed_links)
+            analyzed_articles = [article for article in batch if article.get('link', '') not in failed]
+            self._unhandled(article for article in batch if article.get('link', '') in failed)
+            self.stats.analyzed += len(analyzed_articles)
+            self.stats.failed += len(batch) - len(analyzed_articles)
+            await out.put((analyzed_articles, result.records))
+        await out.put(_DONE)
+
+    async def _save_stage(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        analysis_service = get_analysis_service()
+        score_service = get_score_service()
+        seen_service = get_seen_article_service()
+        remaining = self.analysis_workers
+        while remaining:
+            item = await inbox.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            articles, records = item
+            try:
+                with stage("pipeline.save", rows_in=len(records)) as current:
+                    if records:
+                        saved = await analysis_service.save_batch(RecordBatch.from_records(records))
+                        self.stats.saved += len(saved)
+                        current.record(rows_out=len(saved))
+                        try:
+                            await score_service.apply(saved)
+                        except Exception as e:
+                            logger.warning(f"Could not update ticker scores: {e}")
+                    await seen_service.mark_seen(articles)
+            except Exception as e:
+                # Still scored for this run; unseen articles are retried next run
+                logger.error(f"Saving analysis of {len(articles)} articles failed: {e}")
+                self._unhandled(articles)
+            await out.put(records)
+        await out.put(_DONE)
+
+    def _unhandled(self, articles: Iterable[Dict[str, Any]]) -> None:
+        """Remember the feeds of articles that were not analyzed and saved."""
+        for article in articles:
+            self._unhandled_feeds.update(article_feeds(article))
+
+    async def _score_stage(self, inbox: asyncio.Queue) -> None:
+        while True:
+            records = await inbox.get()
+            if records is _DONE:
+                break
+            with stage("pipeline.score", rows_in=len(records)):
+                self.stats.scored += self.scores.apply(records)
+            if self.on_update is not None:
+                self.on_update(self.scores.top())
+
+
+async def run_once() -> List[Dict[str, Any]]:
+    """Stream the configured RSS feeds through the pipeline once."""
+    recommendations = await StreamingPipeline().run(configured_feeds(), get_last_update_time())
+    # Rollups, partitions ahead and retention; a failure never loses the run's results
+    try:
+        await asyncio.to_thread(ImpactPartitionManager().maintain)
+    except Exception as e:
+        logger.warning(f"Impact table maintenance failed: {e}")
+    log_summary()
+    write_metrics()
+    return recommendations
+
+
+if __name__ == "__main__":
+    # INSTRUMENTATION_SPANS=memory keeps the run's spans for a local look at where the time went
+    spans = use_in_memory_spans() if os.getenv("INSTRUMENTATION_SPANS", "").lower() == "memory" else None
+    logging.basicConfig(level=logging.INFO)
+    recommendations = asyncio.run(run_once())
+    for row in recommendations:
+        logger.info(f"Recommendation {row['Ticker']}: {row['weight']:.3f}")
+    if spans is not None:
+        for span in sorted(spans.get_finished_spans(), key=lambda span: span.start_time):
+            logger.info(f"Span {span.name}: {(span.end_time - span.start_time) / 1e9:.3f}s {dict(span.attributes)}")
@@ -101,21 +101,29 @@ the session state under the key 'analysis_result'.
 
 """
 
-SAVER_PROMPT = """You are a database saver agent.
-    Your ONLY task is to save analysis results to the database using the
-    save_analysis_to_db tool.
-    Always call this tool when you receive analysis results to persist them."""
+# Appended to ANALYSIS_PROMPT when chunks are analyzed outside the agent
+# conversation by the batched analysis engine
+ANALYSIS_BATCH_INSTRUCTION = """
+You are called directly, not as part of a conversation: there is no session
+state to save into. Respond with the concatenated output list only, as a
+single JSON array, with no extra text.
+"""
 
-# Recommender Prompt (inline in agent.py, not as a variable)
+# Recommendation writer prompt: only used when prose is asked for; the
+# recommender step stores the process_analysis result under 'recommendations'
 RECOMMENDER_PROMPT = """
 You are a financial asset recommender agent.
-Your ONLY task is to give recommendation after always call
-'process_analysis' tool.
-The tool return a list of json objects, where 'Ticker' contains the ticker
-of assets, 'weight' describes a score for potential of the asset,
-and 'reference' contains a short summary and a link to the aricle, connected
-by "->".
+Your ONLY task is to give recommendation based on the result of the
+'process_analysis' tool below.
+The result holds a list of json objects under 'recommendations', where
+'Ticker' contains the ticker of assets, 'weight' describes a score for
+potential of the asset, and 'reference' contains a short summary and a link
+to the aricle, connected by "->".
 Make recommendation based on this table. Pick assets based the highest
 scores, and show the score and the list of summaries as references. Add a
 link to each summary items, that redirects to the article described by that
-given summary. """
+given summary.
+
+Result of process_analysis:
+{recommendations}
+"""
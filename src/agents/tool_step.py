@@ -0,0 +1,72 @@
+"""
+Tool step - runs one tool on the session state without a model turn.
+"""
+import json
+import logging
+import os
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Session state flag asking for a prose answer instead of the tool's JSON
+PROSE_STATE_KEY = 'prose'
+
+
+class ToolStep(BaseAgent):
+    """Pipeline step that calls a tool function directly instead of through an LLM agent.
+
+    ``db_saver`` and ``recommender`` only ever called their one tool, which
+    cost a model turn plus the tokens to echo the result. This step calls
+    ``tool(tool_context)`` itself. The tool's state changes are committed
+    with the step's event, and its result is the event text (JSON). With
+    ``output_key`` the result is also stored in the session state.
+
+    A sub-agent, if given, is the formatter: an LLM agent that rewrites the
+    result as prose. It only runs when the session state has ``prose`` set,
+    or when the ``prose_env`` variable is true.
+    """
+
+    tool: Callable[..., Awaitable[Dict[str, Any]]]
+    output_key: Optional[str] = None
+    prose_env: Optional[str] = None
+
+    @property
+    def formatter(self) -> Optional[BaseAgent]:
+        return self.sub_agents[0] if self.sub_agents else None
+
+    def wants_prose(self, ctx: InvocationContext) -> bool:
+        if self.formatter is None:
+            return False
+        if ctx.session.state.get(PROSE_STATE_KEY):
+            return True
+        return bool(self.prose_env) and os.getenv(self.prose_env, "false").lower() == "true"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        tool_context = ToolContext(ctx)
+        try:
+            result = await self.tool(tool_context=tool_context)
+        except Exception as e:
+            logger.error(f"{self.name}: {self.tool.__name__} failed: {e}")
+            result = {"error": f"{self.tool.__name__} failed: {e}"}
+
+        text = json.dumps(result, default=str)
+        if self.output_key:
+            tool_context.state[self.output_key] = text
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=tool_context.actions,
+        )
+
+        if self.wants_prose(ctx):
+            async for event in self.formatter.run_async(ctx):
+                yield event
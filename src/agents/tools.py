@@ -1,88 +1,186 @@
-from typing import Dict, Any, List, Optional
-import feedparser
-import httpx
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime, timedelta
 import os
 from google.adk.tools import FunctionTool
-import pandas as pd
 from google.adk.tools.tool_context import ToolContext
 import logging
-from ..infrastructure.container import get_analysis_service, initialize_database
+from ..infrastructure.container import (
+    get_analysis_service,
+    get_feed_state_repository,
+    get_recommendation_repository,
+    get_relation_service,
+    get_score_service,
+    get_seen_article_service,
+)
+from ..domain.entities import FeedState
+from ..infrastructure.instrumentation import instrumented, record
+from ..application.services.record_batch import RecordBatch
+from ..application.services.score_board import to_hours
 import json
 
 # Set up basic logging configuration
 logging.basicConfig(level=logging.INFO)
 
-# Initialize database on module import
-try:
-    initialize_database()
-except Exception as e:
-    logging.warning(f"Database initialization failed: {e}")
+# The database is set up on first use (see DatabaseConfig); feedparser, httpx,
+# numpy and pandas are imported by the tools that need them, so importing
+# the agents stays fast and works without a reachable database.
 
+@instrumented()
 async def fetch_rss_news(*, tool_context: Optional[object] = None) -> Dict[str, Any]:
-    """Fetches news articles from configured RSS feeds and returns structured data."""
-    feeds = os.getenv("RSS_FEEDS", "https://finance.yahoo.com/news/rssindex").split(",")
-    # max_age_hours = float(os.getenv("MAX_NEWS_AGE_HOURS", "48"))
-
-    articles = []
+    """Fetches news articles from configured RSS feeds and returns structured data.
+
+    Feeds are fetched concurrently (see ``FeedFetcher``), so the stage takes
+    roughly as long as the slowest feed. Feeds that fail or time out are
+    listed under ``failed_feeds``; feeds that answered 304 Not Modified are
+    listed under ``unchanged_feeds``. Articles that were already analyzed in
+    an earlier run are dropped before they reach the analyzer, and syndicated
+    copies of the same story are collapsed into one article whose
+    ``references`` list every source link.
+    """
+    from ..infrastructure.feeds.fetcher import FeedFetcher
+    from ..application.services.article_deduplicator import ArticleDeduplicator
+
+    feeds = configured_feeds()
     cutoff_time = get_last_update_time()
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; RSSFetcher/1.0; +https://github.com/brufen/macro-mancer)",
-        # ... other headers ...
-    }
-
-    async with httpx.AsyncClient() as client:
-        for feed_url in feeds:
-            logging.info(f"Fetching from: {feed_url}")
-            try:
-                response = await client.get(feed_url, headers=headers)
-                response.raise_for_status()
-
-                feed = feedparser.parse(response.text)
-                logging.info(f"Found {len(feed.entries)} entries in feed")
-
-                for entry in feed.entries:
-                    try:
-                        published = datetime(*entry.published_parsed[:6])
-                        logging.info(f"Article: {entry.title[:50]}... published: {published}")
-
-                        # Optional filter
-                        if published > cutoff_time:
-                            articles.append({
-                                "title": entry.title,
-                                "summary": entry.summary,
-                                "link": entry.link,
-                                "published": published.isoformat(),
-                                "source": feed_url
-                            })
-                    except Exception as e:
-                        logging.error(f"Error parsing entry: {e}")
-                        continue
-            except Exception as e:
-                logging.error(f"Error fetching feed {feed_url}: {e}")
-                continue
-
-    logging.info(f"Returning {len(articles)} articles")
+    validators = await load_feed_states()
+    results = await FeedFetcher().fetch_all(feeds, cutoff_time, validators)
+    feed_states = observe_feeds(results, validators)
+
+    articles = [article for result in results for article in result.articles]
+    fetched_count = len(articles)
+    articles = await filter_seen_articles(articles, cutoff_time)
+    articles = ArticleDeduplicator().deduplicate(articles)
+    failed_feeds = [{"url": result.url, "error": result.error} for result in results if not result.ok]
+    record(rows_in=fetched_count, rows_out=len(articles))
+
+    logging.info(
+        f"Returning {len(articles)} new of {fetched_count} articles "
+        f"from {len(feeds) - len(failed_feeds)}/{len(feeds)} feeds"
+    )
+
+    # Keep the exact batch around so the saver can mark it as analyzed. The
+    # new validators wait for it too (save_analysis_to_db): saved now, a
+    # failed analysis would turn the next poll into a 304 and lose the articles.
+    waits_for_saver = tool_context is not None and bool(articles)
+    if tool_context is not None:
+        tool_context.state['fetched_articles'] = articles
+        tool_context.state['feed_states'] = {
+            url: {
+                "polled": state.model_dump(mode="json"),
+                "previous": validators[url].model_dump(mode="json") if url in validators else None,
+            }
+            for url, state in feed_states.items()
+        } if waits_for_saver else {}
+    if not waits_for_saver:
+        await save_feed_states(feed_states, validators)
 
     # Return structured data that can be easily processed
     return {
         "articles": articles,
         "count": len(articles),
-        "sources": feeds
+        "sources": feeds,
+        "failed_feeds": failed_feeds,
+        "unchanged_feeds": [result.url for result in results if result.not_modified]
     }
 
-"""dummy for potential db call"""
+
+async def filter_seen_articles(articles: List[Dict[str, Any]], since: datetime) -> List[Dict[str, Any]]:
+    """Drop articles that were already analyzed in an earlier run."""
+    try:
+        seen_service = get_seen_article_service()
+        await seen_service.ensure_loaded(since)
+        return await seen_service.filter_unseen(articles)
+    except Exception as e:
+        logging.warning(f"Could not check seen articles, keeping all: {e}")
+        return articles
+
+
+async def load_feed_states() -> Dict[str, FeedState]:
+    """Load stored conditional GET validators, keyed by feed URL."""
+    try:
+        states = await get_feed_state_repository().get_all()
+        return {state.url: state for state in states}
+    except Exception as e:
+        logging.warning(f"Could not load feed states, fetching unconditionally: {e}")
+        return {}
+
+
+def observe_feeds(results, previous: Dict[str, FeedState]) -> Dict[str, FeedState]:
+    """The validators and next poll time of every polled feed after this poll (see ``FeedScheduler``)."""
+    from ..application.services.feed_scheduler import FeedScheduler
+
+    scheduler = FeedScheduler()
+    checked_at = datetime.utcnow()
+    return {result.url: scheduler.observe(previous.get(result.url), result, checked_at) for result in results}
+
+
+def article_feeds(article: Dict[str, Any]) -> List[str]:
+    """The feeds an article (or all copies of a deduplicated one) came from."""
+    return article.get('sources') or ([article['source']] if article.get('source') else [])
+
+
+async def save_feed_states(
+    states: Dict[str, FeedState],
+    previous: Dict[str, FeedState],
+    unhandled: Iterable[str] = (),
+) -> None:
+    """Persist feed states once their articles are saved and marked seen.
+
+    Feeds in ``unhandled`` had articles that were not analyzed or saved;
+    they keep their previous validators so those articles are fetched again.
+    """
+    from ..application.services.feed_scheduler import FeedScheduler
+
+    unhandled = set(unhandled)
+    states = [
+        FeedScheduler.unhandled(state, previous.get(url)) if url in unhandled else state
+        for url, state in states.items()
+    ]
+    try:
+        await get_feed_state_repository().save_many(states)
+    except Exception as e:
+        logging.warning(f"Could not save feed states: {e}")
+
+def configured_feeds() -> List[str]:
+    """The RSS feed URLs of RSS_FEEDS (comma separated)."""
+    return [url.strip() for url in os.getenv("RSS_FEEDS", "https://finance.yahoo.com/news/rssindex").split(",") if url.strip()]
+
+"""Freshness window; already analyzed articles are dropped by the seen-article index"""
 def get_last_update_time()->datetime:
     max_age_hours = float(os.getenv("MAX_NEWS_AGE_HOURS", "48"))
     return datetime.now() - timedelta(hours=max_age_hours)
 
-def process_analysis(tool_context: ToolContext):
+@instrumented()
+async def process_analysis(tool_context: ToolContext):
     """Process analysis results and generate recommendations."""
     try:
         session_state = tool_context.state
         analysis_result = session_state.get('analysis_result')
 
+        # Leaderboard refreshed by save_analysis_to_db; an indexed read, no history scan
+        try:
+            score_service = get_score_service()
+            top = await get_recommendation_repository().get_top_recommendations(score_service.leaderboard_size)
+            if not top:
+                top = await score_service.refresh_leaderboard()
+            scores = [
+                {"Ticker": recommendation.ticker, "weight": recommendation.weight, "reference": recommendation.references}
+                for recommendation in top
+            ]
+        except Exception as e:
+            logging.warning(f"Could not read the recommendation leaderboard, scoring the session batch: {e}")
+            scores = []
+
+        if scores:
+            logging.info(f"Read recommendations from the leaderboard: {len(scores)} assets")
+            record(rows_out=len(scores))
+            return {
+                "success": True,
+                "recommendations": json.dumps(scores),
+                "count": len(scores)
+            }
+
         if not analysis_result:
             logging.warning("No analysis_result found in session state")
             return {
@@ -93,8 +191,8 @@ def process_analysis(tool_context: ToolContext):
 
         logging.info(f"Processing analysis result: {analysis_result[:200]}...")
 
-        # Process the analysis and generate recommendations
-        df = make_recommendation(analysis_result, db_simulation=True)
+        # No leaderboard yet: score the session batch together with the stored history
+        df = await make_recommendation(analysis_result)
 
         if df.empty:
             return {
@@ -107,6 +205,7 @@ def process_analysis(tool_context: ToolContext):
         try:
             result_json = df.to_json(orient='records')
             logging.info(f"Generated recommendations: {len(df)} assets")
+            record(rows_out=len(df))
             return {
                 "success": True,
                 "recommendations": result_json,
@@ -131,29 +230,26 @@ async def db_call(cut_time):
     """Real database call implementation using hexagonal architecture."""
     try:
         analysis_service = get_analysis_service()
-        historical_data = await analysis_service.get_historical_data(cut_time)
 
-        # Convert domain entities to the format expected by make_recommendation
+        # Only the scoring columns of the wanted types, streamed batch by batch
         history_assets = []
         history_macro = []
-
-        for analysis in historical_data:
-            if analysis.type.value == 'Asset':
-                history_assets.append({
-                    'Ticker': analysis.entity,
-                    'impact': analysis.impact,
-                    'timestamp': analysis.timestamp.isoformat(),
-                    'link': analysis.link or '',
-                    'Summary': analysis.summary or ''
-                })
-            elif analysis.type.value == 'Macro':
-                history_macro.append({
-                    'Asset': analysis.entity,
-                    'impact': analysis.impact,
-                    'timestamp': analysis.timestamp.isoformat(),
-                    'link': analysis.link or '',
-                    'Summary': analysis.summary or ''
-                })
+        async for batch in analysis_service.stream_history(cut_time, ['Asset', 'Scope', 'Macro']):
+            for point in batch:
+                row = {
+                    'type': point.type,
+                    'impact': point.impact,
+                    'timestamp': point.timestamp.isoformat(),
+                    'link': point.link or '',
+                }
+                if point.type == 'Asset':
+                    row['Ticker'] = point.entity
+                    history_assets.append(row)
+                else:
+                    row['Scope'] = point.entity
+                    if point.type == 'Macro':
+                        row['Location'] = point.location
+                    history_macro.append(row)
 
         return history_macro, history_assets
 
@@ -162,173 +258,79 @@ async def db_call(cut_time):
         return [], []
 
 
-def make_recommendation(input_str, db_simulation=False):
+async def _load_history(cut_time, as_of, batch):
+    """Stored scores or impacts since cut_time and the stored influence graph, on one event loop.
+
+    Where the database aggregates, stored impacts other than the ``batch``
+    come back as per-ticker scores and no history rows are loaded.
+    """
+    graph = await get_relation_service().ensure_loaded()
+    try:
+        stored = await get_analysis_service().get_decayed_scores(cut_time, as_of, graph.damping, graph.hops, batch)
+    except Exception as e:
+        logging.warning(f"Could not aggregate scores in the database, loading history: {e}")
+        stored = None
+    if stored is not None:
+        return [], stored, graph
+    history_macro, history_assets = await db_call(cut_time)
+    return history_assets + history_macro, None, graph
+
+
+async def make_recommendation(input_str, db_simulation=False):
     """Generate asset recommendations from analysis data."""
+    import pandas as pd
+    from ..application.services.scoring_engine import ImpactColumns, ScoringEngine
+
     try:
         if not input_str or input_str.strip() == "":
             logging.warning("Empty input string provided to make_recommendation")
             return pd.DataFrame()
 
-        # strip from junk
-        input_str = input_str.replace('```json', '').replace('```', '').strip()
-
-        if not input_str:
-            logging.warning("Input string is empty after cleaning")
-            return pd.DataFrame()
-
-        # str to list with error handling
+        # Parsed and validated once per analysis; the analyzer already registered its own batch
         try:
-            l = json.loads(input_str)
-        except json.JSONDecodeError as e:
+            batch = RecordBatch.from_json(input_str)
+        except ValueError as e:
             logging.error(f"Invalid JSON in input: {e}")
             logging.error(f"Input string: {input_str[:200]}...")
             return pd.DataFrame()
 
-        if not isinstance(l, list) or len(l) == 0:
+        if not len(batch) and not batch.relations:
             logging.warning("Input is not a valid list or is empty")
             return pd.DataFrame()
 
-        # collected tables
-        types = ['Tag', 'Asset', 'ScopeRelation', 'Scope', 'ScopeRelation', 'Macro', 'Location']
-
-        # table dataframes from the input with error handling
-        seprated_dfs = {}
-        for type_name in types:
-            try:
-                type_data = [e for e in l if e.get('type') == type_name]
-                seprated_dfs[type_name] = pd.DataFrame(type_data)
-            except Exception as e:
-                logging.error(f"Error processing type {type_name}: {e}")
-                seprated_dfs[type_name] = pd.DataFrame()
-
-        # Check if we have any data to process
-        if seprated_dfs['Asset'].empty and seprated_dfs['Macro'].empty:
-            logging.warning("No Asset or Macro data found in analysis")
-            return pd.DataFrame()
-
-        # Process macro data
-        macro = seprated_dfs['Macro']
-        if not macro.empty:
-            if 'type' in macro.columns:
-                macro.drop(columns=['type'], inplace=True)
-            if 'timestamp' in macro.columns:
-                macro['timestamp'] = pd.to_datetime(macro['timestamp'], errors='coerce')
-
-        # Process asset data
-        assets = seprated_dfs['Asset']
-        if not assets.empty:
-            if 'type' in assets.columns:
-                assets.drop(columns=['type'], inplace=True)
-            if 'timestamp' in assets.columns:
-                assets['timestamp'] = pd.to_datetime(assets['timestamp'], errors='coerce')
-
-        # Process location data
-        locations = seprated_dfs['Location']
-        if not locations.empty:
-            if 'Scope' in locations.columns:
-                locations.rename(columns={'Scope': 'Location'}, inplace=True)
-            if 'type' in locations.columns:
-                locations.drop(columns=['type'], inplace=True)
-
-        # Handle case where we have no valid data
-        if assets.empty and macro.empty:
-            logging.warning("No valid asset or macro data after processing")
+        columns = ImpactColumns.from_batch(batch)
+        most_recent = columns.newest_hour
+        if most_recent is None:
+            logging.warning("No Asset, Scope or Macro data with valid timestamps found in analysis")
             return pd.DataFrame()
 
-        # Get most recent timestamp
-        all_timestamps = []
-        if not assets.empty and 'timestamp' in assets.columns:
-            all_timestamps.extend(assets['timestamp'].dropna().tolist())
-        if not macro.empty and 'timestamp' in macro.columns:
-            all_timestamps.extend(macro['timestamp'].dropna().tolist())
-
-        if not all_timestamps:
-            logging.warning("No valid timestamps found")
-            return pd.DataFrame()
-
-        most_recent_ts = max(all_timestamps)
-        max_age_hours = float(os.getenv("MAX_NEWS_AGE_HOURS", "48"))
-
-        if db_simulation:
-            cutoff = most_recent_ts - timedelta(hours=max_age_hours / 2)
-
-            if not assets.empty:
-                actual_assets = assets.loc[assets['timestamp'] > cutoff]
-                history_assets = assets.loc[assets['timestamp'] < cutoff]
-            else:
-                actual_assets = pd.DataFrame()
-                history_assets = pd.DataFrame()
-
-            if not macro.empty:
-                actual_macro = macro.loc[macro['timestamp'] > cutoff]
-                history_macro = macro.loc[macro['timestamp'] < cutoff]
-            else:
-                actual_macro = pd.DataFrame()
-                history_macro = pd.DataFrame()
-        else:
-            # Use real database call
-            import asyncio
-            history_macro, history_assets = asyncio.run(db_call(cut_time=os.getenv()))
-
-        # Combine data
-        if not actual_assets.empty and not history_assets.empty:
-            assets = pd.concat([actual_assets, history_assets]).copy()
-        elif not actual_assets.empty:
-            assets = actual_assets.copy()
-        elif not history_assets.empty:
-            assets = history_assets.copy()
-        else:
-            assets = pd.DataFrame()
-
-        if not actual_macro.empty and not history_macro.empty:
-            macro = pd.concat([actual_macro, history_macro]).copy()
-        elif not actual_macro.empty:
-            macro = actual_macro.copy()
-        elif not history_macro.empty:
-            macro = history_macro.copy()
-        else:
-            macro = pd.DataFrame()
-
-        # Calculate weights
-        if not macro.empty and 'timestamp' in macro.columns and 'impact' in macro.columns:
-            macro['age'] = (most_recent_ts - macro['timestamp']).apply(lambda x: x.total_seconds() / 3600)
-            macro['weight'] = (0.99 ** macro['age']) * macro['impact']
-
-        if not assets.empty and 'timestamp' in assets.columns and 'impact' in assets.columns:
-            assets['age'] = (most_recent_ts - assets['timestamp']).apply(lambda x: x.total_seconds() / 3600)
-            assets['weight'] = (0.99 ** assets['age']) * assets['impact']
-
-        # Prepare final results
-        results = []
-
-        if not assets.empty and 'Ticker' in assets.columns:
-            assets_final = assets[['Ticker', 'weight', 'link', 'Summary']].copy()
-            results.append(assets_final)
-
-        if not macro.empty and not locations.empty and 'Location' in macro.columns:
+        # Simulation scores the batch on its own relations; otherwise on the stored graph
+        graph = None
+        stored = None
+        if not db_simulation:
+            # Current batch plus stored history of the freshness window
+            max_age_hours = float(os.getenv("MAX_NEWS_AGE_HOURS", "48"))
+            cut_time = datetime(1970, 1, 1) + timedelta(hours=most_recent - max_age_hours)
+            as_of = datetime(1970, 1, 1) + timedelta(hours=most_recent)
             try:
-                macro_final = macro.merge(locations, on='Location', how='inner')
-                if not macro_final.empty and 'Asset' in macro_final.columns:
-                    macro_final = macro_final[['Asset', 'weight', 'link', 'Summary']]
-                    macro_final.rename(columns={'Asset': 'Ticker', 'weight': 'w_impact'}, inplace=True)
-                    results.append(macro_final)
+                history, stored, graph = await _load_history(cut_time, as_of, batch)
             except Exception as e:
-                logging.error(f"Error merging macro and location data: {e}")
-
-        if not results:
+                logging.warning(f"Could not load stored history, scoring the batch alone: {e}")
+                history, stored, graph = [], None, None
+            # The batch is usually saved already; count every impact once
+            records = batch.to_records()
+            seen = {_impact_key(row) for row in records}
+            records += [row for row in history if _impact_key(row) not in seen]
+            columns = ImpactColumns.from_records(records)
+
+        scores = ScoringEngine(graph=graph).score_columns(columns, now=most_recent)
+        if stored:
+            scores = _merge_scores(scores, stored)
+        if not scores:
             logging.warning("No results generated from analysis")
             return pd.DataFrame()
 
-        # Combine and process results
-        res = pd.concat(results, ignore_index=True)
-        res['reference'] = res['Summary'].astype(str) + '->' + res['link'].astype(str)
-
-        # Group by ticker
-        final_result = res.groupby('Ticker').agg({
-            'weight': 'sum',
-            'link': lambda x: ', '.join(x.astype(str))
-        }).reset_index()
-
+        final_result = pd.DataFrame(scores, columns=['Ticker', 'weight', 'link'])
         logging.info(f"Generated recommendations for {len(final_result)} assets")
         return final_result
 
@@ -337,6 +339,33 @@ def make_recommendation(input_str, db_simulation=False):
         return pd.DataFrame()
 
 
+def _merge_scores(scores, stored):
+    """Add database-aggregated TickerScores to ScoringEngine rows, by ticker."""
+    rows = {row['Ticker']: row for row in scores}
+    for score in stored:
+        row = rows.setdefault(score.ticker, {'Ticker': score.ticker, 'weight': 0.0, 'link': ''})
+        row['weight'] += score.score
+        row['link'] = ', '.join(link for link in [row['link'], *score.references] if link)
+    return sorted(rows.values(), key=lambda row: row['Ticker'])
+
+
+def _impact_key(row):
+    """Identity of an Asset/Macro impact across the live batch and stored history."""
+    hours = to_hours(row.get('timestamp'))
+    names = {
+        'Asset': ('Ticker',),
+        'Scope': ('Scope',),
+        'Macro': ('Scope', 'Location'),
+    }.get(row.get('type'), ())
+    return (
+        row.get('type'),
+        tuple(row.get(name) for name in names),
+        row.get('link') or '',
+        None if hours is None else round(hours * 3600),
+    )
+
+
+@instrumented()
 async def save_analysis_to_db(tool_context: ToolContext):
     """Save analysis results to database using hexagonal architecture."""
     try:
@@ -348,6 +377,29 @@ async def save_analysis_to_db(tool_context: ToolContext):
 
         analysis_service = get_analysis_service()
         saved_analyses = await analysis_service.save_analysis_results(analysis_result)
+        record(rows_out=len(saved_analyses))
+        if session_state.get('analysis_count') is not None:
+            record(rows_in=session_state.get('analysis_count'))
+
+        # Only new or changed rows come back, so replays never count twice
+        try:
+            await get_score_service().apply(saved_analyses)
+        except Exception as e:
+            logging.warning(f"Could not update ticker scores: {e}")
+
+        # Only now is the batch safely persisted; never send it to the LLM again.
+        # Articles of failed chunks stay unseen and are analyzed next run.
+        failed = set(session_state.get('failed_links') or [])
+        analyzed_articles = [
+            article for article in session_state.get('fetched_articles') or []
+            if article.get('link', '') not in failed
+        ]
+        try:
+            await get_seen_article_service().mark_seen(analyzed_articles)
+        except Exception as e:
+            logging.warning(f"Could not mark articles as seen: {e}")
+        else:
+            await save_pending_feed_states(session_state, failed)
 
         return {
             "success": True,
@@ -363,6 +415,23 @@ async def save_analysis_to_db(tool_context: ToolContext):
         }
 
 
+async def save_pending_feed_states(session_state, failed_links) -> None:
+    """Save the feed states ``fetch_rss_news`` left in the session, failed articles' feeds unhandled."""
+    pending = session_state.get('feed_states') or {}
+    if not pending:
+        return
+    states = {url: FeedState(**entry["polled"]) for url, entry in pending.items()}
+    previous = {url: FeedState(**entry["previous"]) for url, entry in pending.items() if entry["previous"]}
+    unhandled = {
+        feed
+        for article in session_state.get('fetched_articles') or []
+        if article.get('link', '') in failed_links
+        for feed in article_feeds(article)
+    }
+    await save_feed_states(states, previous, unhandled)
+    session_state['feed_states'] = {}
+
+
 # Create the tools using FunctionTool
 rss_tool = FunctionTool(func=fetch_rss_news)
 process_analysis_tool = FunctionTool(func=process_analysis)
@@ -0,0 +1,124 @@
+"""
+Analysis cache - content-addressed store of per-article LLM analyses.
+"""
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from ...domain.entities import CachedAnalysis
+from ...domain.repositories import AnalysisCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+def article_hash(article: Dict[str, Any]) -> str:
+    """Content address of an article: hash of its title, summary, link and, when extracted, full text.
+
+    An article analyzed from its full text therefore never reuses the
+    analysis of its summary, nor the other way round. Articles without text
+    hash as they always did, so their cached entries stay valid.
+    """
+    keys = ("title", "summary", "link", "text") if article.get("text") else ("title", "summary", "link")
+    content = "\x1f".join(str(article.get(key) or "") for key in keys)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def prompt_hash(prompt: str, model: str) -> str:
+    """Version of the analysis setup; any prompt or model change yields a new one."""
+    return hashlib.sha256(f"{model}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Two-level cache of analysis records keyed by (article hash, prompt hash).
+
+    An in-process LRU sits in front of the analysis_cache table. Entries
+    expire after ``ttl_hours``, and both levels are capped at ``max_entries``
+    by evicting the least recently used. The prompt hash is part of the key,
+    so a new prompt or model misses on every old entry and never sees stale
+    analyses. The old entries then age out. The table is pruned after every
+    ``evict_every`` written entries (and by ``evict``, which the ingestion
+    daemon runs with its maintenance), not on each write, so it may briefly
+    hold that many entries beyond the cap.
+
+    Database errors are logged and the cache behaves as memory-only; a cache
+    problem never blocks analysis.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[AnalysisCacheRepository] = None,
+        ttl_hours: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        evict_every: Optional[int] = None,
+    ):
+        self.repository = repository
+        self.ttl = timedelta(hours=ttl_hours or float(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "168")))
+        self.max_entries = max_entries or int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000"))
+        self.evict_every = evict_every or int(os.getenv("ANALYSIS_CACHE_EVICT_EVERY", "500"))
+        self._unpruned = 0
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[datetime, List[Dict[str, Any]]]]" = OrderedDict()
+
+    async def get_many(self, article_hashes: List[str], version: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Look up cached records; returns only the hits, keyed by article hash."""
+        now = datetime.utcnow()
+        hits: Dict[str, List[Dict[str, Any]]] = {}
+        missing = []
+        for key in article_hashes:
+            entry = self._memory.get((key, version))
+            if entry is not None and now - entry[0] < self.ttl:
+                self._memory.move_to_end((key, version))
+                hits[key] = entry[1]
+            else:
+                missing.append(key)
+
+        if missing and self.repository is not None:
+            try:
+                for cached in await self.repository.get_many(missing, version, now - self.ttl):
+                    hits[cached.article_hash] = cached.records
+                    self._remember(cached.article_hash, version, cached.created_at or now, cached.records)
+            except Exception as e:
+                logger.warning(f"Analysis cache lookup failed: {e}")
+
+        return hits
+
+    async def put_many(self, records_by_hash: Dict[str, List[Dict[str, Any]]], version: str) -> None:
+        """Store the records of freshly analyzed articles."""
+        if not records_by_hash:
+            return
+
+        now = datetime.utcnow()
+        for key, records in records_by_hash.items():
+            self._remember(key, version, now, records)
+
+        if self.repository is not None:
+            try:
+                await self.repository.save_many([
+                    CachedAnalysis(article_hash=key, prompt_hash=version, records=records, created_at=now)
+                    for key, records in records_by_hash.items()
+                ])
+            except Exception as e:
+                logger.warning(f"Analysis cache write failed: {e}")
+                return
+            self._unpruned += len(records_by_hash)
+            if self._unpruned >= self.evict_every:
+                await self.evict()
+
+    async def evict(self) -> int:
+        """Delete expired and least recently used entries from the table; returns how many."""
+        if self.repository is None:
+            return 0
+        self._unpruned = 0
+        try:
+            return await self.repository.evict(datetime.utcnow() - self.ttl, self.max_entries)
+        except Exception as e:
+            logger.warning(f"Analysis cache eviction failed: {e}")
+            return 0
+
+    def _remember(self, key: str, version: str, created_at: datetime, records: List[Dict[str, Any]]) -> None:
+        self._memory[(key, version)] = (created_at, records)
+        self._memory.move_to_end((key, version))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -2,12 +2,14 @@
 Analysis service - orchestrates impact analysis business logic.
 """
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timedelta
-import json
 
-from ...domain.entities import ImpactAnalysis, AssetRecommendation, AnalysisResult
+from ...domain.entities import ImpactAnalysis, ImpactPoint, AssetRecommendation, AnalysisResult, TickerScore
 from ...domain.repositories import ImpactAnalysisRepository, AssetRecommendationRepository
+from .record_batch import RecordBatch
+from .relation_service import RelationService
+from .score_board import DECAY_PER_HOUR
 
 logger = logging.getLogger(__name__)
 
@@ -18,19 +20,36 @@ class AnalysisService:
     def __init__(
         self,
         impact_repository: ImpactAnalysisRepository,
-        recommendation_repository: AssetRecommendationRepository
+        recommendation_repository: AssetRecommendationRepository,
+        relation_service: Optional[RelationService] = None
     ):
         self.impact_repository = impact_repository
         self.recommendation_repository = recommendation_repository
+        self.relation_service = relation_service
     
     async def save_analysis_results(self, analysis_data: str) -> List[ImpactAnalysis]:
         """Save analysis results from JSON string to database."""
         try:
-            # Parse the analysis data
-            analyses = self._parse_analysis_data(analysis_data)
-            
+            batch = RecordBatch.from_json(analysis_data)
+        except Exception as e:
+            logger.error(f"Error parsing analysis data: {e}")
+            raise
+        return await self.save_batch(batch)
+    
+    async def save_batch(self, batch: RecordBatch) -> List[ImpactAnalysis]:
+        """Save an already validated record batch to database."""
+        try:
             # Save to database
-            saved_analyses = await self.impact_repository.save_many(analyses)
+            saved_analyses = await self.impact_repository.save_many(batch.to_analyses())
+            
+            # Relations before returning, so scores propagated from the saved rows already see them.
+            # Those of an article whose rows were all stored before are a replay and not counted again.
+            if self.relation_service is not None and batch.relations:
+                inserted = {analysis.link for analysis in saved_analyses if analysis.previous_impact is None}
+                counted, replayed = [], []
+                for record, link in zip(batch.relations, batch.relation_links()):
+                    (counted if link is None or link in inserted else replayed).append(record)
+                await self.relation_service.save_records(counted, replayed)
             
             logger.info(f"Saved {len(saved_analyses)} analysis results")
             return saved_analyses
@@ -50,6 +69,36 @@ class AnalysisService:
             logger.error(f"Error retrieving historical data: {e}")
             raise
     
+    async def stream_history(
+        self, cutoff_time: datetime, types: List[str], until: Optional[datetime] = None
+    ) -> AsyncIterator[List[ImpactPoint]]:
+        """Stream the scoring columns of historical analyses of the given types since cutoff time."""
+        count = 0
+        async for batch in self.impact_repository.stream_points(types, cutoff_time, until):
+            count += len(batch)
+            yield batch
+        logger.info(f"Streamed {count} historical impacts")
+    
+    async def get_decayed_scores(
+        self,
+        cutoff_time: datetime,
+        as_of: datetime,
+        damping: float,
+        hops: int,
+        exclude: Optional[RecordBatch] = None,
+    ) -> Optional[List[TickerScore]]:
+        """Decayed per-ticker scores of stored analyses since cutoff time, computed in the database.
+
+        Stored rows of the ``exclude`` batch (one the caller scores itself)
+        are skipped. None if the database cannot aggregate.
+        """
+        scores = await self.impact_repository.get_decayed_scores(
+            cutoff_time, as_of, DECAY_PER_HOUR, damping, hops, exclude.to_analyses() if exclude else None
+        )
+        if scores is not None:
+            logger.info(f"Aggregated decayed scores of {len(scores)} tickers in the database")
+        return scores
+    
     async def get_asset_analyses(self, ticker: str) -> List[ImpactAnalysis]:
         """Get all analyses for a specific asset."""
         try:
@@ -63,35 +112,7 @@ class AnalysisService:
     
     def _parse_analysis_data(self, analysis_data: str) -> List[ImpactAnalysis]:
         """Parse JSON analysis data into domain entities."""
-        try:
-            # Clean the input
-            cleaned_data = analysis_data.replace('```json', '').replace('```', '').strip()
-            
-            # Parse JSON
-            data_list = json.loads(cleaned_data)
-            
-            analyses = []
-            for item in data_list:
-                try:
-                    analysis = ImpactAnalysis(
-                        entity=item.get('Ticker') or item.get('Asset') or item.get('Scope', ''),
-                        type=item.get('type', 'Asset'),
-                        impact=float(item.get('impact', 0)),
-                        impact_description=item.get('impact_description'),
-                        summary=item.get('Summary', ''),
-                        link=item.get('link', ''),
-                        timestamp=datetime.fromisoformat(item.get('timestamp', datetime.utcnow().isoformat())),
-                    )
-                    analyses.append(analysis)
-                except Exception as e:
-                    logger.warning(f"Error parsing analysis item {item}: {e}")
-                    continue
-            
-            return analyses
-            
-        except Exception as e:
-            logger.error(f"Error parsing analysis data: {e}")
-            raise
+        return RecordBatch.from_json(analysis_data).to_analyses()
     
     async def create_recommendations(self, analyses: List[ImpactAnalysis]) -> List[AssetRecommendation]:
         """Create asset recommendations from analyses."""
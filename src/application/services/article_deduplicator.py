@@ -0,0 +1,160 @@
+"""
+Article deduplicator - clusters syndicated copies of the same story.
+"""
+import hashlib
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    """Word n-gram shingles of a text; short texts fall back to single words."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _lsh_params(num_perm: int, threshold: float, recall: float = 0.95) -> Tuple[int, int]:
+    """Pick (bands, rows) with the most rows that still catch pairs at the threshold.
+
+    More rows per band mean fewer false candidates. A candidate pair is
+    always verified against the threshold afterwards, so a few extra ones
+    only cost a signature comparison.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+class ArticleDeduplicator:
+    """Near-duplicate detection over title + summary using MinHash LSH.
+
+    Each article gets a MinHash signature of its word shingles. Signatures
+    are split into bands and hashed into buckets, and an article is compared
+    only with the first article of each bucket it lands in. That is a fixed
+    number of comparisons per article, so a batch is processed in linear
+    time. Pairs whose estimated Jaccard similarity reaches ``threshold`` are
+    merged into one cluster.
+
+    Each cluster becomes one canonical article, the earliest published copy.
+    The links and feeds of all copies are kept under ``references`` and
+    ``sources``.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, num_perm: int = 64, seed: int = 1):
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.7")
+        )
+        self.num_perm = num_perm
+        self.bands, self.rows = _lsh_params(num_perm, self.threshold)
+        # 32-bit coefficients keep a * h + b inside uint64 without overflow
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+        # Buckets of articles admitted so far, for streaming use via admit()
+        self._admitted: Dict[Tuple[int, bytes], np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text."""
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+                for shingle in _shingles(text)
+            ),
+            dtype=np.uint64,
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1) & _MAX_HASH
+
+    def similarity(self, left: np.ndarray, right: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return np.count_nonzero(left == right) / self.num_perm
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def admit(self, article: Dict[str, Any]) -> bool:
+        """Streaming variant: False if a near-duplicate was already admitted.
+
+        Articles arrive one at a time, so copies cannot be merged into an
+        earlier canonical article; they are simply dropped.
+        """
+        signature = self.signature(f"{article.get('title', '')} {article.get('summary', '')}")
+        keys = self._band_keys(signature)
+        for key in keys:
+            first = self._admitted.get(key)
+            if first is not None and self.similarity(first, signature) >= self.threshold:
+                return False
+        for key in keys:
+            self._admitted.setdefault(key, signature)
+        return True
+
+    def deduplicate(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Collapse near-duplicate articles into canonical ones, preserving order."""
+        if len(articles) < 2:
+            return articles
+
+        signatures = [
+            self.signature(f"{article.get('title', '')} {article.get('summary', '')}")
+            for article in articles
+        ]
+
+        parent = list(range(len(articles)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets: Dict[Tuple[int, bytes], int] = {}
+        for i, signature in enumerate(signatures):
+            for key in self._band_keys(signature):
+                first = buckets.setdefault(key, i)
+                if first != i and find(first) != find(i):
+                    if self.similarity(signatures[first], signature) >= self.threshold:
+                        parent[find(i)] = find(first)
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(articles)):
+            clusters[find(i)].append(i)
+
+        deduplicated = []
+        for members in sorted(clusters.values(), key=lambda m: m[0]):
+            deduplicated.append(self._merge([articles[i] for i in members]))
+
+        if len(deduplicated) < len(articles):
+            logger.info(f"Collapsed {len(articles)} articles into {len(deduplicated)} stories")
+        return deduplicated
+
+    def _merge(self, copies: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the canonical article of a cluster."""
+        if len(copies) == 1:
+            return copies[0]
+
+        ordered = sorted(copies, key=lambda a: (a.get("published") or "", -len(a.get("summary") or "")))
+        canonical = dict(ordered[0])
+        canonical["references"] = list(dict.fromkeys(a["link"] for a in ordered if a.get("link")))
+        canonical["sources"] = list(dict.fromkeys(a["source"] for a in ordered if a.get("source")))
+        return canonical
@@ -0,0 +1,105 @@
+"""
+Feed scheduler - polls every feed on its own interval, learned from how often it publishes.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from ...domain.entities import FeedState
+
+logger = logging.getLogger(__name__)
+
+
+def _published(article: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(article["published"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class FeedScheduler:
+    """Adaptive per-feed poll intervals, kept in ``FeedState``.
+
+    A poll that brings new entries (published after the newest one seen
+    before) moves the interval towards the feed's publishing gap: the mean
+    time between its entries, or the time since the last poll divided by
+    the new entries. The move is an exponential average (``smoothing``), so
+    one burst does not throw off a steady feed. A poll with nothing new, a
+    304 included, stretches the interval by ``backoff``; a failed poll by
+    twice that. Intervals stay between ``min_interval`` and
+    ``max_interval`` seconds, and a feed never polled is due at once.
+    """
+
+    def __init__(
+        self,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff: Optional[float] = None,
+        smoothing: float = 0.5,
+    ):
+        self.min_interval = min_interval or float(os.getenv("FEED_MIN_INTERVAL_SECONDS", "120"))
+        self.max_interval = max_interval or float(os.getenv("FEED_MAX_INTERVAL_SECONDS", "3600"))
+        self.backoff = backoff or float(os.getenv("FEED_INTERVAL_BACKOFF", "1.5"))
+        self.smoothing = smoothing
+
+    def _clamp(self, seconds: float) -> float:
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    @staticmethod
+    def due_at(state: Optional[FeedState], now: datetime) -> datetime:
+        """When a feed is due for its next poll; ``now`` if it was never scheduled."""
+        return state.next_poll_at if state is not None and state.next_poll_at is not None else now
+
+    def due(self, feeds: Iterable[str], states: Dict[str, FeedState], now: datetime) -> List[str]:
+        """Feeds whose next poll time has come, in input order."""
+        return [url for url in feeds if self.due_at(states.get(url), now) <= now]
+
+    def observe(self, previous: Optional[FeedState], result: Any, now: datetime) -> FeedState:
+        """The state of a feed after a poll with ``result`` (a ``FeedResult``)."""
+        interval = previous.poll_interval if previous is not None and previous.poll_interval else self.min_interval
+        newest = previous.newest_published if previous is not None else None
+
+        if not result.ok:
+            interval = self._clamp(interval * self.backoff * 2)
+            etag = previous.etag if previous is not None else None
+            last_modified = previous.last_modified if previous is not None else None
+        else:
+            etag, last_modified = result.etag, result.last_modified
+            published = sorted(filter(None, (_published(article) for article in result.articles)))
+            fresh = [timestamp for timestamp in published if newest is None or timestamp > newest]
+            if fresh:
+                if len(published) > 1:
+                    gap = (published[-1] - published[0]).total_seconds() / (len(published) - 1)
+                elif previous is not None and previous.checked_at is not None:
+                    gap = (now - previous.checked_at).total_seconds() / len(fresh)
+                else:
+                    gap = interval
+                interval = self._clamp((1 - self.smoothing) * interval + self.smoothing * gap)
+                newest = fresh[-1]
+            else:
+                interval = self._clamp(interval * self.backoff)
+
+        return FeedState(
+            url=result.url,
+            etag=etag,
+            last_modified=last_modified,
+            checked_at=now,
+            poll_interval=interval,
+            next_poll_at=now + timedelta(seconds=interval),
+            newest_published=newest,
+        )
+
+    @staticmethod
+    def unhandled(state: FeedState, previous: Optional[FeedState]) -> FeedState:
+        """``state`` for a feed whose new articles were not all analyzed and saved.
+
+        The schedule advances, but the validators and newest entry stay those
+        of ``previous``, so the next poll downloads the feed in full again
+        instead of getting a 304 and losing the articles.
+        """
+        return state.model_copy(update={
+            "etag": previous.etag if previous is not None else None,
+            "last_modified": previous.last_modified if previous is not None else None,
+            "newest_published": previous.newest_published if previous is not None else None,
+        })
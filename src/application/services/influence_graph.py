@@ -0,0 +1,173 @@
+"""
+Influence graph - assets, scopes, related scopes and locations as a sparse propagation matrix.
+"""
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+
+def _index(names: Dict[str, int], name: str) -> int:
+    return names.setdefault(name, len(names))
+
+
+class InfluenceGraph:
+    """Sparse graph that pushes scope and location sentiment to tickers.
+
+    Tag records link an asset to a scope, Location records link an asset
+    to a location, and ScopeRelation records link two scopes. From these
+    edges one propagation matrix is precomputed::
+
+        P = [ A_ts @ H  |  A_tl ],   H = sum_{k=0..hops} (damping * R_norm) ** k
+
+    ``A_ts`` and ``A_tl`` are the 0/1 asset-scope and asset-location
+    adjacencies. ``R_norm`` is the row-normalized scope relation matrix, so
+    a scope receives ``damping`` times the mean sentiment of its related
+    scopes, ``damping ** 2`` times that of their relations, and so on. The
+    sentiment of every ticker is then one sparse mat-vec, ``P @ [s; l]``,
+    whose cost is the number of non-zeros of ``P``, not the number of
+    scopes. Adding edges only marks the matrix stale; it is rebuilt on the
+    next use.
+    """
+
+    def __init__(self, damping: Optional[float] = None, hops: Optional[int] = None):
+        self.damping = damping if damping is not None else float(os.getenv("INFLUENCE_DAMPING", "0.5"))
+        self.hops = hops if hops is not None else int(os.getenv("INFLUENCE_HOPS", "2"))
+        self.tickers: Dict[str, int] = {}
+        self.scopes: Dict[str, int] = {}
+        self.locations: Dict[str, int] = {}
+        self._asset_scopes: Set[Tuple[int, int]] = set()
+        self._asset_locations: Set[Tuple[int, int]] = set()
+        self._scope_relations: Set[Tuple[int, int]] = set()
+        self._propagation: Optional[sparse.csr_matrix] = None
+        self._by_source: Optional[sparse.csc_matrix] = None
+        self._ticker_names: List[str] = []
+
+    def copy(self) -> "InfluenceGraph":
+        """An independent graph with the same edges; adding edges to it leaves this one untouched.
+
+        The built matrices are shared until the copy gains an edge, so a copy
+        that learns nothing new costs no rebuild.
+        """
+        graph = InfluenceGraph(self.damping, self.hops)
+        graph.tickers = dict(self.tickers)
+        graph.scopes = dict(self.scopes)
+        graph.locations = dict(self.locations)
+        graph._asset_scopes = set(self._asset_scopes)
+        graph._asset_locations = set(self._asset_locations)
+        graph._scope_relations = set(self._scope_relations)
+        graph._propagation = self._propagation
+        graph._by_source = self._by_source
+        return graph
+
+    def add_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Learn the Tag, Location and ScopeRelation records of an analysis; returns the number of new edges."""
+        asset_scopes, asset_locations, scope_relations = [], [], []
+        for record in records:
+            record_type = record.get('type')
+            if record_type == 'Tag' and record.get('Asset') and record.get('Scope'):
+                asset_scopes.append((str(record['Asset']), str(record['Scope'])))
+            elif record_type == 'Location' and record.get('Asset') and record.get('Scope'):
+                asset_locations.append((str(record['Asset']), str(record['Scope'])))
+            elif record_type == 'ScopeRelation' and record.get('Scope1') and record.get('Scope2'):
+                scope_relations.append((str(record['Scope1']), str(record['Scope2'])))
+        return self.add_edges(asset_scopes, asset_locations, scope_relations)
+
+    def add_edges(
+        self,
+        asset_scopes: Iterable[Pair] = (),
+        asset_locations: Iterable[Pair] = (),
+        scope_relations: Iterable[Pair] = (),
+    ) -> int:
+        """Add edges given as name pairs; returns the number of new edges."""
+        before = len(self._asset_scopes) + len(self._asset_locations) + len(self._scope_relations)
+        for asset, scope in asset_scopes:
+            self._asset_scopes.add((_index(self.tickers, asset), _index(self.scopes, scope)))
+        for asset, location in asset_locations:
+            self._asset_locations.add((_index(self.tickers, asset), _index(self.locations, location)))
+        for first, second in scope_relations:
+            if first != second:
+                pair = (_index(self.scopes, first), _index(self.scopes, second))
+                self._scope_relations.add((min(pair), max(pair)))
+
+        added = len(self._asset_scopes) + len(self._asset_locations) + len(self._scope_relations) - before
+        if added:
+            self._propagation = None
+            self._by_source = None
+        return added
+
+    def edges(self) -> Tuple[List[Pair], List[Pair], List[Pair]]:
+        """All edges as name pairs: asset-scope, asset-location and scope-scope."""
+        tickers, scopes, locations = list(self.tickers), list(self.scopes), list(self.locations)
+        return (
+            sorted((tickers[t], scopes[s]) for t, s in self._asset_scopes),
+            sorted((tickers[t], locations[l]) for t, l in self._asset_locations),
+            sorted((scopes[a], scopes[b]) for a, b in self._scope_relations),
+        )
+
+    @property
+    def propagation(self) -> sparse.csr_matrix:
+        """The tickers x (scopes + locations) propagation matrix ``P``."""
+        if self._propagation is None:
+            self._propagation = self._build()
+        return self._propagation
+
+    def _build(self) -> sparse.csr_matrix:
+        ticker_count, scope_count, location_count = len(self.tickers), len(self.scopes), len(self.locations)
+        asset_scope = self._adjacency(self._asset_scopes, (ticker_count, scope_count))
+        asset_location = self._adjacency(self._asset_locations, (ticker_count, location_count))
+
+        relations = self._adjacency(self._scope_relations, (scope_count, scope_count))
+        relations = (relations + relations.T).tocsr()
+        degree = np.asarray(relations.sum(axis=1)).ravel()
+        step = sparse.diags(np.divide(self.damping, degree, out=np.zeros(scope_count), where=degree > 0)) @ relations
+
+        reach = sparse.identity(scope_count, format="csr")
+        term = reach
+        for _ in range(self.hops):
+            term = term @ step
+            reach = reach + term
+
+        propagation = sparse.hstack([asset_scope @ reach, asset_location], format="csr")
+        propagation.eliminate_zeros()
+        logger.info(
+            f"Built influence propagation matrix: {ticker_count} tickers x "
+            f"{scope_count} scopes + {location_count} locations, {propagation.nnz} non-zeros"
+        )
+        return propagation
+
+    @staticmethod
+    def _adjacency(pairs: Set[Tuple[int, int]], shape: Tuple[int, int]) -> sparse.csr_matrix:
+        if not pairs:
+            return sparse.csr_matrix(shape)
+        rows, columns = np.array(list(pairs), dtype=np.int64).T
+        return sparse.csr_matrix((np.ones(len(pairs)), (rows, columns)), shape=shape)
+
+    def propagate(self, scope_values: np.ndarray, location_values: np.ndarray) -> np.ndarray:
+        """Sentiment reaching each ticker (indexed as ``tickers``) from per-scope and per-location values."""
+        return self.propagation @ np.concatenate([scope_values, location_values])
+
+    def fanout(self, scope: Optional[str] = None, location: Optional[str] = None) -> List[Tuple[str, float]]:
+        """(ticker, weight) pairs one unit of sentiment on a scope or location reaches."""
+        if scope is not None:
+            column = self.scopes.get(scope)
+        else:
+            column = self.locations.get(location)
+            column = None if column is None else len(self.scopes) + column
+        if column is None:
+            return []
+
+        if self._by_source is None:
+            self._by_source = self.propagation.tocsc()
+            self._ticker_names = list(self.tickers)
+        start, end = self._by_source.indptr[column], self._by_source.indptr[column + 1]
+        return [
+            (self._ticker_names[row], float(weight))
+            for row, weight in zip(self._by_source.indices[start:end], self._by_source.data[start:end])
+        ]
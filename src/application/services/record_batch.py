@@ -0,0 +1,215 @@
+"""
+Record batch - analysis records parsed and validated once, shared by the save and scoring stages.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ...domain.entities import ImpactAnalysis, ImpactType
+from .relation_service import RELATION_TYPES
+
+logger = logging.getLogger(__name__)
+
+_IMPACT_TYPES = {impact_type.value for impact_type in ImpactType}
+
+# One impact row: type, entity, location, impact, timestamp, link, summary, description
+Row = Tuple[str, str, Optional[str], float, Optional[datetime], str, str, Optional[str]]
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Naive UTC datetime of an ISO string or datetime, None if missing; raises ValueError if malformed."""
+    if value is None or value == "":
+        return None
+    timestamp = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+    return timestamp
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return None if value is None or value == "" else str(value)
+
+
+class RecordBatch:
+    """Analysis records as parallel columns, validated once.
+
+    Asset, Scope and Macro records become one row each in the impact
+    columns; rows that would fail ``ImpactAnalysis`` validation (unknown
+    type, no entity, impact outside -3..3, unparseable timestamp) are
+    dropped here, once. Tag, Location and ScopeRelation records are kept as
+    they are in ``relations``.
+
+    Every row is checked once, here; ``to_analyses`` builds the domain
+    entities once per batch. ``from_json`` keeps the last few parsed
+    batches keyed by their JSON text, and ``remember`` registers a batch
+    built in process under the text that is put in the session state, so
+    the save and scoring tools reuse one parse. Each of them gets its own
+    ``copy`` of the remembered batch: the columns, never changed after
+    parsing, are shared, but the entities are not, since saving sets their
+    ``id``, ``previous_impact`` and timestamps.
+    """
+
+    __slots__ = (
+        "types", "entities", "locations", "impacts", "timestamps", "links", "summaries", "descriptions",
+        "relations", "_analyses",
+    )
+
+    _parsed: "OrderedDict[str, RecordBatch]" = OrderedDict()
+    _parsed_lock = threading.Lock()
+    MAX_PARSED = 8
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.entities: List[str] = []
+        self.locations: List[Optional[str]] = []
+        self.impacts: List[float] = []
+        self.timestamps: List[Optional[datetime]] = []
+        self.links: List[str] = []
+        self.summaries: List[str] = []
+        self.descriptions: List[Optional[str]] = []
+        self.relations: List[Dict[str, Any]] = []
+        self._analyses: Optional[List[ImpactAnalysis]] = None
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any]) -> "RecordBatch":
+        """Validate analysis record dicts into a batch; non-dicts and invalid records are dropped."""
+        batch = cls()
+        dropped = 0
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            record_type = record.get('type', 'Asset')
+            if record_type in RELATION_TYPES:
+                batch.relations.append(record)
+                continue
+            entity = record.get('Ticker') or record.get('Asset') or record.get('Scope')
+            try:
+                impact = float(record.get('impact', 0))
+                timestamp = _parse_timestamp(record.get('timestamp'))
+            except (TypeError, ValueError):
+                dropped += 1
+                continue
+            if record_type not in _IMPACT_TYPES or not entity or not -3 <= impact <= 3:
+                dropped += 1
+                continue
+            batch.types.append(record_type)
+            batch.entities.append(str(entity))
+            batch.locations.append(_optional_str(record.get('Location')))
+            batch.impacts.append(impact)
+            batch.timestamps.append(timestamp)
+            batch.links.append(str(record.get('link') or ''))
+            batch.summaries.append(str(record.get('Summary') or ''))
+            batch.descriptions.append(_optional_str(record.get('impact_description')))
+        if dropped:
+            logger.warning(f"Dropped {dropped} invalid analysis records")
+        return batch
+
+    @classmethod
+    def from_json(cls, text: str) -> "RecordBatch":
+        """Parse an analysis JSON string (code fences allowed) once; repeated texts get a copy of the parse."""
+        with cls._parsed_lock:
+            batch = cls._parsed.get(text)
+            if batch is not None:
+                cls._parsed.move_to_end(text)
+        if batch is not None:
+            return batch.copy()
+
+        cleaned = text.replace('```json', '').replace('```', '').strip()
+        data = json.loads(cleaned) if cleaned else []
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            raise ValueError(f"Expected a JSON list of analysis records, got {type(data).__name__}")
+        return cls.from_records(data).remember(text)
+
+    def remember(self, text: str) -> "RecordBatch":
+        """Register a copy of this batch as the parse of ``text`` for later ``from_json`` calls."""
+        cls = type(self)
+        with cls._parsed_lock:
+            cls._parsed[text] = self.copy()
+            cls._parsed.move_to_end(text)
+            while len(cls._parsed) > self.MAX_PARSED:
+                cls._parsed.popitem(last=False)
+        return self
+
+    def copy(self) -> "RecordBatch":
+        """A batch sharing these columns, with its own relation list and domain entities."""
+        batch = type(self)()
+        batch.types, batch.entities, batch.locations = self.types, self.entities, self.locations
+        batch.impacts, batch.timestamps, batch.links = self.impacts, self.timestamps, self.links
+        batch.summaries, batch.descriptions = self.summaries, self.descriptions
+        batch.relations = list(self.relations)
+        return batch
+
+    def rows(self) -> Iterator[Row]:
+        return zip(
+            self.types, self.entities, self.locations, self.impacts, self.timestamps, self.links, self.summaries,
+            self.descriptions,
+        )
+
+    def to_analyses(self) -> List[ImpactAnalysis]:
+        """Domain entities of the impact rows, built once per batch; missing timestamps become now."""
+        if self._analyses is None:
+            now = datetime.utcnow()
+            self._analyses = [
+                ImpactAnalysis(
+                    entity=entity,
+                    type=ImpactType(record_type),
+                    impact=impact,
+                    impact_description=description,
+                    summary=summary,
+                    link=link,
+                    location=location,
+                    timestamp=timestamp or now,
+                )
+                for record_type, entity, location, impact, timestamp, link, summary, description in self.rows()
+            ]
+        return self._analyses
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """The batch as analysis record dicts again: impact records first, then the relation records."""
+        records = []
+        for record_type, entity, location, impact, timestamp, link, summary, description in self.rows():
+            record = {
+                'type': record_type,
+                'Ticker' if record_type == 'Asset' else 'Scope': entity,
+                'impact': impact,
+                'timestamp': timestamp.isoformat() if timestamp else None,
+                'link': link,
+                'Summary': summary,
+            }
+            if location is not None:
+                record['Location'] = location
+            if description is not None:
+                record['impact_description'] = description
+            records.append(record)
+        return records + self.relations
+
+    def relation_links(self) -> List[Optional[str]]:
+        """Article link of each relation record, attributed as ``attribute_records`` does.
+
+        That is the link of the first row naming its asset or one of its
+        scopes, or else the first link of the batch; None without any link.
+        """
+        by_name: Dict[str, str] = {}
+        for entity, link in zip(self.entities, self.links):
+            if link:
+                by_name.setdefault(entity, link)
+        first = next((link for link in self.links if link), None)
+        return [
+            next(
+                (
+                    by_name[str(record[key])]
+                    for key in ('Asset', 'Scope', 'Scope1', 'Scope2')
+                    if record.get(key) and str(record[key]) in by_name
+                ),
+                first,
+            )
+            for record in self.relations
+        ]
@@ -0,0 +1,81 @@
+"""
+Relation service - Tag, Location and ScopeRelation knowledge and the influence graph built from it.
+"""
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from ...domain.entities import Relation, RelationType
+from ...domain.repositories import RelationRepository
+
+if TYPE_CHECKING:
+    from .influence_graph import InfluenceGraph
+
+logger = logging.getLogger(__name__)
+
+RELATION_TYPES = {relation_type.value for relation_type in RelationType}
+
+
+def relations_from_records(records: Iterable[Dict[str, Any]], occurrences: int = 1) -> List[Relation]:
+    """Relations reported by Tag, Location and ScopeRelation analysis records; other records are skipped."""
+    relations = []
+    for record in records:
+        record_type = record.get('type')
+        if record_type == RelationType.SCOPE_RELATION.value:
+            source, target = record.get('Scope1'), record.get('Scope2')
+        elif record_type in (RelationType.TAG.value, RelationType.LOCATION.value):
+            source, target = record.get('Asset'), record.get('Scope')
+        else:
+            continue
+        if source and target:
+            relations.append(
+                Relation(type=record_type, source=str(source), target=str(target), occurrences=occurrences)
+            )
+    return relations
+
+
+class RelationService:
+    """Relation tables plus the in-memory InfluenceGraph built from them.
+
+    The graph is loaded from the repository once per process with a single
+    query. New relations are written to their tables and added to the graph
+    in place, so the asset-location and asset-scope mappings never depend
+    on what the current batch happened to report.
+    """
+
+    def __init__(self, repository: Optional[RelationRepository] = None, graph: Optional["InfluenceGraph"] = None):
+        # numpy / scipy load with the first graph, not with this module
+        from .influence_graph import InfluenceGraph
+        self.repository = repository
+        self.graph = graph or InfluenceGraph()
+        self._loaded = repository is None
+
+    async def ensure_loaded(self) -> "InfluenceGraph":
+        """Load every stored relation into the graph, once, and return the graph."""
+        if not self._loaded:
+            relations = await self.repository.get_all()
+            self._add_to_graph(relations)
+            self._loaded = True
+            logger.info(f"Loaded {len(relations)} relations into the influence graph")
+        return self.graph
+
+    async def save_records(self, records: Iterable[Dict[str, Any]], replayed: Iterable[Dict[str, Any]] = ()) -> int:
+        """Store the relation records of an analysis; returns the number of relations saved.
+
+        ``replayed`` records were counted when their article was first saved;
+        they are stored if missing, but add no occurrence.
+        """
+        relations = relations_from_records(records) + relations_from_records(replayed, occurrences=0)
+        if not relations:
+            return 0
+
+        await self.ensure_loaded()
+        if self.repository is not None:
+            await self.repository.save_many(relations)
+        self._add_to_graph(relations)
+        return len(relations)
+
+    def _add_to_graph(self, relations: List[Relation]) -> None:
+        edges: Dict[RelationType, List] = {relation_type: [] for relation_type in RelationType}
+        for relation in relations:
+            edges[relation.type].append((relation.source, relation.target))
+        self.graph.add_edges(edges[RelationType.TAG], edges[RelationType.LOCATION], edges[RelationType.SCOPE_RELATION])
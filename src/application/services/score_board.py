@@ -0,0 +1,115 @@
+"""
+Score board - per-ticker exponentially decayed impact scores, updated incrementally.
+"""
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Weight of an impact drops by this factor for every hour of age
+DECAY_PER_HOUR = 0.99
+
+
+def to_hours(timestamp: Any) -> Optional[float]:
+    """Hours since the epoch of a datetime or ISO string, None if unparseable."""
+    try:
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+        return (timestamp - datetime(1970, 1, 1)).total_seconds() / 3600
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class TickerState:
+    """Decayed score of one ticker as of a point in time."""
+    score: float = 0.0
+    as_of: float = float('-inf')
+    references: Deque[str] = field(default_factory=lambda: deque(maxlen=5))
+
+    def add(self, impact: float, hours: float, decay: float) -> None:
+        """Fold in one impact; O(1) regardless of history length."""
+        if hours >= self.as_of:
+            if self.as_of != float('-inf'):
+                self.score *= decay ** (hours - self.as_of)
+            self.score += impact
+            self.as_of = hours
+        else:
+            # Late arrival: decay the impact itself to the current as_of
+            self.score += impact * decay ** (self.as_of - hours)
+
+    def value_at(self, hours: float, decay: float) -> float:
+        return self.score * decay ** max(hours - self.as_of, 0.0)
+
+
+class ScoreBoard:
+    """In-memory per-ticker decayed scores with the Macro -> Location -> Asset join.
+
+    ``0.99 ** age * impact`` summed over history equals a running score that
+    is decayed to the newest impact and then added to. Applying a record
+    batch therefore costs O(records), whatever the size of the history.
+    Macro impacts go to every asset known to operate in their Location, as
+    learned from the Location records applied so far.
+    """
+
+    def __init__(self, decay: float = DECAY_PER_HOUR):
+        self.decay = decay
+        self.tickers: Dict[str, TickerState] = {}
+        self.locations: Dict[str, Set[str]] = defaultdict(set)
+
+    def apply(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Apply a batch of analysis records; returns the number of ticker impacts applied."""
+        records = list(records)
+        for record in records:
+            if record.get('type') == 'Location' and record.get('Asset') and record.get('Scope'):
+                self.locations[record['Scope']].add(record['Asset'])
+
+        applied = 0
+        for record in records:
+            record_type = record.get('type')
+            if record_type == 'Asset' and record.get('Ticker'):
+                tickers = [record['Ticker']]
+            elif record_type == 'Macro' and record.get('Location'):
+                tickers = sorted(self.locations.get(record['Location'], ()))
+            else:
+                continue
+
+            hours = to_hours(record.get('timestamp'))
+            try:
+                impact = float(record.get('impact', 0))
+            except (TypeError, ValueError):
+                continue
+            if hours is None:
+                continue
+
+            reference = f"{record.get('Summary', '')}->{record.get('link', '')}"
+            for ticker in tickers:
+                state = self.tickers.setdefault(ticker, TickerState())
+                state.add(impact, hours, self.decay)
+                state.references.append(reference)
+                applied += 1
+        return applied
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Highest scoring tickers, decayed to the newest impact seen."""
+        if not self.tickers:
+            return []
+        now = max(state.as_of for state in self.tickers.values())
+        ranked = sorted(
+            (
+                {
+                    "Ticker": ticker,
+                    "weight": state.value_at(now, self.decay),
+                    "reference": list(state.references),
+                }
+                for ticker, state in self.tickers.items()
+            ),
+            key=lambda row: row["weight"],
+            reverse=True,
+        )
+        return ranked[:limit]
@@ -0,0 +1,187 @@
+"""
+Score service - persistent per-ticker decayed scores, updated with each batch of new impacts.
+"""
+import asyncio
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from .relation_service import RelationService
+from .score_board import DECAY_PER_HOUR, TickerState, to_hours
+from ...domain.entities import AssetRecommendation, ImpactAnalysis, ImpactType, TickerScore
+from ...domain.repositories import AssetRecommendationRepository, TickerScoreRepository
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class ScoreService:
+    """Keeps the ticker_scores table current in O(new rows) per batch.
+
+    Each ticker stores the running ``TickerState`` of the ScoreBoard, its
+    score decayed to its newest impact. Applying a batch loads only the
+    tickers the batch touches, folds the impacts in and writes them back.
+    Reading the scores costs one row per ticker and never rescans history.
+
+    Feed it the rows ``save_many`` returned. Those are only the new or
+    changed rows, so a replayed batch is not counted twice; a changed row
+    adds only the difference to its ``previous_impact``, decayed from the
+    row's own timestamp. Scope and Macro impacts are
+    spread over the tickers their scope or location reaches in the
+    influence graph of the ``RelationService``, with the propagation
+    weights as factors. Updates are serialized within the process.
+
+    With a recommendation repository, every batch that moves a score also
+    refreshes the materialized top-N leaderboard (``LEADERBOARD_SIZE``), so
+    reading the current top recommendations is a single indexed query.
+    Decay scales every ticker by the same factor, so the ranking only
+    changes for the tickers a batch touches: the service keeps the top
+    2N tickers in memory and re-ranks those with the touched ones, and
+    scans all scores only at start-up, when ``refresh_leaderboard`` is
+    called, or when too many candidates dropped out to fill the board.
+    """
+
+    def __init__(
+        self,
+        repository: TickerScoreRepository,
+        relation_service: Optional[RelationService] = None,
+        decay: float = DECAY_PER_HOUR,
+        recommendation_repository: Optional[AssetRecommendationRepository] = None,
+        leaderboard_size: Optional[int] = None,
+    ):
+        self.repository = repository
+        self.relation_service = relation_service or RelationService()
+        self.decay = decay
+        self.recommendation_repository = recommendation_repository
+        self.leaderboard_size = leaderboard_size or int(os.getenv("LEADERBOARD_SIZE", "50"))
+        self._lock = asyncio.Lock()
+        # Top 2N tickers by rank key; every other ticker ranks at or below the floor
+        self._candidates: Optional[Dict[str, TickerState]] = None
+        self._floor: Optional[Tuple[int, float]] = None
+        self._newest = float('-inf')
+
+    async def apply(self, analyses: List[ImpactAnalysis]) -> int:
+        """Fold newly saved analyses into the stored scores; returns the number of ticker impacts applied."""
+        async with self._lock:
+            graph = await self.relation_service.ensure_loaded()
+            impacts = []
+            for analysis in analyses:
+                if analysis.type == ImpactType.ASSET:
+                    reached = [(analysis.entity, 1.0)]
+                elif analysis.type == ImpactType.SCOPE:
+                    reached = graph.fanout(scope=analysis.entity)
+                elif analysis.type == ImpactType.MACRO and analysis.location:
+                    reached = graph.fanout(location=analysis.location)
+                else:
+                    continue
+                hours = to_hours(analysis.timestamp)
+                if hours is None:
+                    continue
+                # A new row has no reference yet; a changed one already has
+                if analysis.previous_impact is None:
+                    impact, reference = analysis.impact, f"{analysis.summary or ''}->{analysis.link or ''}"
+                else:
+                    impact, reference = analysis.impact - analysis.previous_impact, None
+                impacts.extend((ticker, impact * weight, hours, reference) for ticker, weight in reached)
+
+            if not impacts:
+                return 0
+
+            states = {
+                score.ticker: self._to_state(score)
+                for score in await self.repository.get_many(sorted({ticker for ticker, _, _, _ in impacts}))
+            }
+            for ticker, impact, hours, reference in impacts:
+                state = states.setdefault(ticker, TickerState())
+                state.add(impact, hours, self.decay)
+                if reference is not None:
+                    state.references.append(reference)
+
+            await self.repository.save_many([self._to_score(ticker, state) for ticker, state in states.items()])
+            logger.info(f"Applied {len(impacts)} impacts to {len(states)} ticker scores")
+            await self._refresh_leaderboard(states)
+            return len(impacts)
+
+    async def refresh_leaderboard(self) -> List[AssetRecommendation]:
+        """Rebuild the top-N leaderboard from the stored scores."""
+        async with self._lock:
+            return await self._refresh_leaderboard()
+
+    async def _refresh_leaderboard(self, touched: Optional[Dict[str, TickerState]] = None) -> List[AssetRecommendation]:
+        if self.recommendation_repository is None:
+            return []
+        try:
+            if touched is None or self._candidates is None:
+                await self._load_candidates()
+            else:
+                await self._update_candidates(touched)
+            ranked = sorted(self._candidates.items(), key=lambda item: self._rank_key(item[1]), reverse=True)
+            recommendations = [
+                AssetRecommendation(
+                    ticker=ticker,
+                    weight=state.value_at(self._newest, self.decay),
+                    references=list(state.references),
+                    links=[link for _, _, link in (ref.rpartition("->") for ref in state.references) if link],
+                )
+                for ticker, state in ranked[:self.leaderboard_size]
+            ]
+            return await self.recommendation_repository.refresh_leaderboard(recommendations)
+        except Exception as e:
+            # The scores are saved; a stale leaderboard is caught up by the next batch
+            self._candidates = None
+            logger.warning(f"Failed to refresh recommendation leaderboard: {e}")
+            return []
+
+    async def _load_candidates(self) -> None:
+        """Rank all stored scores and keep the top 2N as leaderboard candidates."""
+        states = {score.ticker: self._to_state(score) for score in await self.repository.get_all()}
+        self._newest = max((state.as_of for state in states.values()), default=float('-inf'))
+        self._candidates, self._floor = {}, None
+        self._keep_top(states)
+
+    async def _update_candidates(self, touched: Dict[str, TickerState]) -> None:
+        """Re-rank the candidates with the touched tickers; reload if they can no longer fill the board."""
+        self._newest = max([self._newest] + [state.as_of for state in touched.values()])
+        states = dict(self._candidates)
+        for ticker, state in touched.items():
+            # Below the floor a ticker may rank under tickers that are not held
+            if self._floor is None or self._rank_key(state) >= self._floor:
+                states[ticker] = state
+            else:
+                states.pop(ticker, None)
+        self._keep_top(states)
+        if self._floor is not None and len(self._candidates) < self.leaderboard_size:
+            await self._load_candidates()
+
+    def _keep_top(self, states: Dict[str, TickerState]) -> None:
+        size = 2 * self.leaderboard_size
+        ranked = sorted(states.items(), key=lambda item: self._rank_key(item[1]), reverse=True)
+        if len(ranked) > size:
+            # The best ticker let go; it ranks above every ticker that was not held
+            self._floor = self._rank_key(ranked[size][1])
+        self._candidates = dict(ranked[:size])
+
+    def _rank_key(self, state: TickerState) -> Tuple[int, float]:
+        """Order of a ticker by decayed score that holds at any time, as decay scales all scores alike."""
+        if state.score == 0:
+            return 0, 0.0
+        sign = 1 if state.score > 0 else -1
+        return sign, sign * (math.log(abs(state.score)) - state.as_of * math.log(self.decay))
+
+    @staticmethod
+    def _to_state(score: TickerScore) -> TickerState:
+        state = TickerState(score=score.score, as_of=to_hours(score.as_of))
+        state.references.extend(score.references)
+        return state
+
+    @staticmethod
+    def _to_score(ticker: str, state: TickerState) -> TickerScore:
+        return TickerScore(
+            ticker=ticker,
+            score=state.score,
+            as_of=_EPOCH + timedelta(hours=state.as_of),
+            references=list(state.references),
+        )
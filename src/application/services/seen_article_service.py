@@ -0,0 +1,105 @@
+"""
+Seen-article service - keeps already analyzed articles away from the LLM.
+"""
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ...domain.entities import SeenArticle
+from ...domain.repositories import SeenArticleRepository
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the referrer and never change the article
+TRACKING_PARAMS = {"fbclid", "gclid", "guccounter", "guce_referrer", "guce_referrer_sig", "ncid", ".tsrc", "soc_src", "soc_trk"}
+
+
+def normalize_link(link: str) -> str:
+    """Normalize an article link so that trivially different URLs compare equal."""
+    parts = urlsplit(link.strip())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def article_key(article: Dict[str, Any]) -> Optional[str]:
+    """Stable key of an article: hash of its normalized link, falling back to its guid."""
+    if article.get("link"):
+        identity = normalize_link(article["link"])
+    elif article.get("guid"):
+        identity = article["guid"].strip()
+    else:
+        return None
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class SeenArticleService:
+    """In-memory index of analyzed articles, backed by the seen_articles table.
+
+    The keys seen within the freshness window are preloaded once per
+    process, so most articles of a fetch batch are settled by a dict lookup.
+    Keys the index misses are looked up in the table with one query per
+    batch, since another process (the ingestion daemon, another agent
+    instance) may have marked them seen. Each ``ensure_loaded`` drops keys
+    seen before the window, so the index stays the size of the window.
+    """
+    
+    def __init__(self, repository: SeenArticleRepository):
+        self.repository = repository
+        self._seen: Dict[str, datetime] = {}
+        self._loaded = False
+    
+    async def ensure_loaded(self, since: datetime) -> None:
+        """Preload the keys of articles seen since the given time once; later calls drop older keys."""
+        if self._loaded:
+            self._seen = {key: seen_at for key, seen_at in self._seen.items() if seen_at >= since}
+            return
+        keys = await self.repository.get_keys_since(since)
+        self._seen.update(keys)
+        self._loaded = True
+        logger.info(f"Preloaded {len(keys)} seen article keys")
+    
+    async def filter_unseen(self, articles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop articles that were already analyzed or repeat within the batch."""
+        keyed = [(article_key(article), article) for article in articles]
+        missed = list({key for key, _ in keyed if key is not None and key not in self._seen})
+        if missed:
+            try:
+                self._seen.update(await self.repository.get_seen(missed))
+            except Exception as e:
+                logger.warning(f"Could not look up {len(missed)} article keys, keeping them: {e}")
+
+        unseen = []
+        batch_keys: Set[str] = set()
+        for key, article in keyed:
+            if key is not None and (key in self._seen or key in batch_keys):
+                continue
+            if key is not None:
+                batch_keys.add(key)
+            unseen.append(article)
+        return unseen
+    
+    async def mark_seen(self, articles: Iterable[Dict[str, Any]]) -> int:
+        """Record articles as analyzed, in memory and in the database."""
+        now = datetime.utcnow()
+        seen_articles = {}
+        for article in articles:
+            # Deduplicated stories carry the links of their syndicated copies
+            links = [article.get("link")] + list(article.get("references") or [])
+            for candidate in [article] + [{"link": link} for link in links[1:]]:
+                key = article_key(candidate)
+                if key is not None and key not in self._seen:
+                    seen_articles[key] = SeenArticle(key=key, link=candidate.get("link"), seen_at=now)
+        
+        if not seen_articles:
+            return 0
+        
+        await self.repository.save_many(list(seen_articles.values()))
+        self._seen.update(dict.fromkeys(seen_articles, now))
+        return len(seen_articles)
@@ -3,7 +3,7 @@ Domain entities - core business objects using Pydantic for validation.
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, NamedTuple, Optional, List
 from enum import Enum
 
 
@@ -17,6 +17,13 @@ class ImpactType(str, Enum):
     SCOPE_RELATION = "ScopeRelation"
 
 
+class RelationType(str, Enum):
+    """Kinds of asset / scope / location relations."""
+    TAG = "Tag"
+    LOCATION = "Location"
+    SCOPE_RELATION = "ScopeRelation"
+
+
 class ImpactAnalysis(BaseModel):
     """Core domain entity for impact analysis."""
     id: Optional[int] = None
@@ -26,14 +33,28 @@ class ImpactAnalysis(BaseModel):
     impact_description: Optional[str] = Field(None, description="Description of the impact")
     summary: Optional[str] = Field(None, description="Article summary")
     link: Optional[str] = Field(None, description="Source article link")
+    location: Optional[str] = Field(None, description="Location of a Macro impact, or where a Location record's asset operates")
     timestamp: Optional[datetime] = Field(None, description="When the analysis was created")
     inserted_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    previous_impact: Optional[float] = Field(
+        None, description="Impact the stored row had before a save changed it; None for new rows"
+    )
 
     class Config:
         from_attributes = True
 
 
+class ImpactPoint(NamedTuple):
+    """The columns of an ImpactAnalysis that scoring reads, as a plain tuple."""
+    type: str
+    entity: str
+    location: Optional[str]
+    impact: float
+    timestamp: datetime
+    link: Optional[str]
+
+
 class AssetRecommendation(BaseModel):
     """Domain entity for asset recommendations."""
     ticker: str = Field(..., description="Asset ticker symbol")
@@ -46,6 +67,69 @@ class AssetRecommendation(BaseModel):
         from_attributes = True
 
 
+class FeedState(BaseModel):
+    """Domain entity for per-feed HTTP cache validators and poll schedule."""
+    url: str = Field(..., description="Feed URL")
+    etag: Optional[str] = Field(None, description="Last ETag returned by the feed")
+    last_modified: Optional[str] = Field(None, description="Last Last-Modified header returned by the feed")
+    checked_at: Optional[datetime] = Field(None, description="When the feed was last polled")
+    poll_interval: Optional[float] = Field(None, description="Seconds between polls, adapted to how often the feed publishes")
+    next_poll_at: Optional[datetime] = Field(None, description="When the feed is due for its next poll")
+    newest_published: Optional[datetime] = Field(None, description="Publication time of the newest entry seen")
+
+    class Config:
+        from_attributes = True
+
+
+class SeenArticle(BaseModel):
+    """Domain entity for an article that has already been analyzed."""
+    key: str = Field(..., description="Hash of the normalized article link or guid")
+    link: Optional[str] = Field(None, description="Source article link")
+    seen_at: Optional[datetime] = Field(None, description="When the article was analyzed")
+
+    class Config:
+        from_attributes = True
+
+
+class CachedAnalysis(BaseModel):
+    """Domain entity for the cached analysis records of a single article."""
+    article_hash: str = Field(..., description="Hash of the article title, summary, link and full text")
+    prompt_hash: str = Field(..., description="Hash of the analysis prompt and model name")
+    records: List[Dict[str, Any]] = Field(default_factory=list, description="Analysis records of the article")
+    created_at: Optional[datetime] = None
+    last_used_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Relation(BaseModel):
+    """Domain entity for a Tag (asset-scope), Location (asset-location) or ScopeRelation (scope-scope) edge."""
+    type: RelationType = Field(..., description="Kind of relation")
+    source: str = Field(..., description="Asset ticker, or the first scope of a ScopeRelation")
+    target: str = Field(..., description="Scope, location, or the second scope of a ScopeRelation")
+    occurrences: int = Field(
+        1, ge=0, description="How many times the relation was reported; 0 for a replayed report that is not counted"
+    )
+    first_seen_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TickerScore(BaseModel):
+    """Domain entity for the running decayed impact score of a ticker."""
+    ticker: str = Field(..., description="Asset ticker symbol")
+    score: float = Field(0.0, description="Sum of decayed impacts as of as_of")
+    as_of: datetime = Field(..., description="Time the score is decayed to, the newest impact applied")
+    references: List[str] = Field(default_factory=list, description="Most recent source references")
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class AnalysisResult(BaseModel):
     """Container for multiple impact analyses."""
     analyses: List[ImpactAnalysis] = Field(default_factory=list)
@@ -2,9 +2,9 @@
 Repository interfaces - define contracts for data access.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
-from .entities import ImpactAnalysis, AssetRecommendation, AnalysisResult
+from .entities import ImpactAnalysis, ImpactPoint, AssetRecommendation, AnalysisResult, FeedState, SeenArticle, CachedAnalysis, TickerScore, Relation
 
 
 class ImpactAnalysisRepository(ABC):
@@ -39,6 +39,34 @@ class ImpactAnalysisRepository(ABC):
     async def get_all(self) -> List[ImpactAnalysis]:
         """Get all analyses."""
         pass
+    
+    @abstractmethod
+    def stream_points(
+        self,
+        types: List[str],
+        since: datetime,
+        until: Optional[datetime] = None,
+        batch_size: int = 5000,
+    ) -> AsyncIterator[List[ImpactPoint]]:
+        """Stream the scoring columns of analyses of the given types in [since, until), batch by batch."""
+        pass
+    
+    @abstractmethod
+    async def get_decayed_scores(
+        self,
+        since: datetime,
+        as_of: datetime,
+        decay: float,
+        damping: float,
+        hops: int,
+        exclude: Optional[List[ImpactAnalysis]] = None,
+    ) -> Optional[List[TickerScore]]:
+        """Per-ticker decayed scores of the analyses since a given time, aggregated by the database.
+
+        Analyses in ``exclude`` are left out. Returns None when the database
+        cannot aggregate; callers then score ``stream_points`` themselves.
+        """
+        pass
 
 
 class AssetRecommendationRepository(ABC):
@@ -64,7 +92,97 @@ class AssetRecommendationRepository(ABC):
         """Get top recommendations by weight."""
         pass
     
+    @abstractmethod
+    async def refresh_leaderboard(self, recommendations: List[AssetRecommendation]) -> List[AssetRecommendation]:
+        """Replace the current top-N leaderboard, ranked by weight."""
+        pass
+    
     @abstractmethod
     async def get_since(self, since: datetime) -> List[AssetRecommendation]:
         """Get recommendations created since a given time."""
-        pass 
\ No newline at end of file
+        pass
+
+
+class FeedStateRepository(ABC):
+    """Repository interface for per-feed HTTP cache validators."""
+    
+    @abstractmethod
+    async def get_all(self) -> List[FeedState]:
+        """Get the stored state of every known feed."""
+        pass
+    
+    @abstractmethod
+    async def save_many(self, states: List[FeedState]) -> List[FeedState]:
+        """Insert or update the state of multiple feeds."""
+        pass
+
+
+class SeenArticleRepository(ABC):
+    """Repository interface for the index of already analyzed articles."""
+    
+    @abstractmethod
+    async def get_keys_since(self, since: datetime) -> Dict[str, datetime]:
+        """Get the keys of articles seen since a given time, with when they were seen."""
+        pass
+
+    @abstractmethod
+    async def get_seen(self, keys: List[str]) -> Dict[str, datetime]:
+        """Get those of the given keys that were already seen, with when they were seen."""
+        pass
+    
+    @abstractmethod
+    async def save_many(self, articles: List[SeenArticle]) -> List[SeenArticle]:
+        """Record multiple articles as seen, ignoring ones already recorded."""
+        pass
+
+
+class AnalysisCacheRepository(ABC):
+    """Repository interface for cached per-article LLM analyses."""
+    
+    @abstractmethod
+    async def get_many(self, article_hashes: List[str], prompt_hash: str, since: datetime) -> List[CachedAnalysis]:
+        """Get the cached analyses created since a given time, marking them as used."""
+        pass
+    
+    @abstractmethod
+    async def save_many(self, entries: List[CachedAnalysis]) -> List[CachedAnalysis]:
+        """Insert or replace multiple cached analyses."""
+        pass
+    
+    @abstractmethod
+    async def evict(self, expired_before: datetime, max_entries: int) -> int:
+        """Delete expired entries and the least recently used ones beyond max_entries."""
+        pass
+
+
+class TickerScoreRepository(ABC):
+    """Repository interface for the running per-ticker decayed scores."""
+    
+    @abstractmethod
+    async def get_many(self, tickers: List[str]) -> List[TickerScore]:
+        """Get the scores of the given tickers; unknown tickers are left out."""
+        pass
+    
+    @abstractmethod
+    async def get_all(self) -> List[TickerScore]:
+        """Get the scores of every ticker."""
+        pass
+    
+    @abstractmethod
+    async def save_many(self, scores: List[TickerScore]) -> List[TickerScore]:
+        """Insert or update multiple ticker scores."""
+        pass
+
+
+class RelationRepository(ABC):
+    """Repository interface for asset-scope, asset-location and scope-scope relations."""
+    
+    @abstractmethod
+    async def get_all(self) -> List[Relation]:
+        """Get every relation of every kind in one query."""
+        pass
+    
+    @abstractmethod
+    async def save_many(self, relations: List[Relation]) -> List[Relation]:
+        """Insert new relations and add to the occurrence count of known ones."""
+        pass
@@ -1,41 +1,185 @@
 """
 Dependency injection container for hexagonal architecture.
+
+Repository modules (and with them SQLAlchemy and the database drivers) are
+imported by the getters on first use, so importing the container, or the
+agents built on it, neither loads them nor touches the database.
 """
+import logging
+import os
 from typing import Optional
-from .database.config import db_config
-from .repositories.impact_analysis_repository import SQLAlchemyImpactAnalysisRepository
+from ..domain.repositories import AssetRecommendationRepository, FeedStateRepository, ImpactAnalysisRepository
 from ..application.services.analysis_service import AnalysisService
+from ..application.services.seen_article_service import SeenArticleService
+from ..application.services.analysis_cache import AnalysisCache
+from ..application.services.score_service import ScoreService
+from ..application.services.relation_service import RelationService
+
+logger = logging.getLogger(__name__)
 
 # Global instances
-_impact_repository: Optional[SQLAlchemyImpactAnalysisRepository] = None
+_impact_repository: Optional[ImpactAnalysisRepository] = None
+_recommendation_repository: Optional[AssetRecommendationRepository] = None
 _analysis_service: Optional[AnalysisService] = None
+_feed_state_repository: Optional[FeedStateRepository] = None
+_seen_article_service: Optional[SeenArticleService] = None
+_analysis_cache: Optional[AnalysisCache] = None
+_score_service: Optional[ScoreService] = None
+_relation_service: Optional[RelationService] = None
+_async_driver_warned = False
+
+
+def use_async_database() -> bool:
+    """Whether repositories run on the async engine; set DB_ASYNC=false for the sync one.
+
+    Without the async driver of the backend (asyncpg, aiosqlite) the
+    repositories fall back to the sync engine, with a warning.
+    """
+    global _async_driver_warned
+    if os.getenv("DB_ASYNC", "true").lower() != "true":
+        return False
+    from .database.config import db_config
+    if db_config.async_driver_available:
+        return True
+    if not _async_driver_warned:
+        _async_driver_warned = True
+        logger.warning(f"Async driver for {db_config.async_database_url.split(':', 1)[0]} is not installed, using the sync engine")
+    return False
 
 
-def get_impact_repository() -> SQLAlchemyImpactAnalysisRepository:
+def get_impact_repository() -> ImpactAnalysisRepository:
     """Get or create the impact analysis repository instance."""
     global _impact_repository
     if _impact_repository is None:
-        _impact_repository = SQLAlchemyImpactAnalysisRepository()
+        from .repositories.impact_analysis_repository import (
+            AsyncSQLAlchemyImpactAnalysisRepository,
+            SQLAlchemyImpactAnalysisRepository,
+        )
+        if use_async_database():
+            _impact_repository = AsyncSQLAlchemyImpactAnalysisRepository()
+        else:
+            _impact_repository = SQLAlchemyImpactAnalysisRepository()
     return _impact_repository
 
 
+def get_recommendation_repository() -> AssetRecommendationRepository:
+    """Get or create the asset recommendation repository instance."""
+    global _recommendation_repository
+    if _recommendation_repository is None:
+        from .repositories.asset_recommendation_repository import (
+            AsyncSQLAlchemyAssetRecommendationRepository,
+            SQLAlchemyAssetRecommendationRepository,
+        )
+        if use_async_database():
+            _recommendation_repository = AsyncSQLAlchemyAssetRecommendationRepository()
+        else:
+            _recommendation_repository = SQLAlchemyAssetRecommendationRepository()
+    return _recommendation_repository
+
+
+def get_feed_state_repository() -> FeedStateRepository:
+    """Get or create the feed state repository instance."""
+    global _feed_state_repository
+    if _feed_state_repository is None:
+        from .repositories.feed_state_repository import (
+            AsyncSQLAlchemyFeedStateRepository,
+            SQLAlchemyFeedStateRepository,
+        )
+        if use_async_database():
+            _feed_state_repository = AsyncSQLAlchemyFeedStateRepository()
+        else:
+            _feed_state_repository = SQLAlchemyFeedStateRepository()
+    return _feed_state_repository
+
+
+def get_seen_article_service() -> SeenArticleService:
+    """Get or create the seen-article service instance."""
+    global _seen_article_service
+    if _seen_article_service is None:
+        from .repositories.seen_article_repository import (
+            AsyncSQLAlchemySeenArticleRepository,
+            SQLAlchemySeenArticleRepository,
+        )
+        if use_async_database():
+            repository = AsyncSQLAlchemySeenArticleRepository()
+        else:
+            repository = SQLAlchemySeenArticleRepository()
+        _seen_article_service = SeenArticleService(repository)
+    return _seen_article_service
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get or create the LLM analysis cache instance."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        from .repositories.analysis_cache_repository import (
+            AsyncSQLAlchemyAnalysisCacheRepository,
+            SQLAlchemyAnalysisCacheRepository,
+        )
+        if use_async_database():
+            repository = AsyncSQLAlchemyAnalysisCacheRepository()
+        else:
+            repository = SQLAlchemyAnalysisCacheRepository()
+        _analysis_cache = AnalysisCache(repository)
+    return _analysis_cache
+
+
+def get_score_service() -> ScoreService:
+    """Get or create the persistent ticker score service instance."""
+    global _score_service
+    if _score_service is None:
+        from .repositories.ticker_score_repository import (
+            AsyncSQLAlchemyTickerScoreRepository,
+            SQLAlchemyTickerScoreRepository,
+        )
+        if use_async_database():
+            repository = AsyncSQLAlchemyTickerScoreRepository()
+        else:
+            repository = SQLAlchemyTickerScoreRepository()
+        _score_service = ScoreService(
+            repository, get_relation_service(), recommendation_repository=get_recommendation_repository()
+        )
+    return _score_service
+
+
+def get_relation_service() -> RelationService:
+    """Get or create the relation service, owner of the shared influence graph."""
+    global _relation_service
+    if _relation_service is None:
+        from .repositories.relation_repository import AsyncSQLAlchemyRelationRepository, SQLAlchemyRelationRepository
+        if use_async_database():
+            repository = AsyncSQLAlchemyRelationRepository()
+        else:
+            repository = SQLAlchemyRelationRepository()
+        _relation_service = RelationService(repository)
+    return _relation_service
+
+
 def get_analysis_service() -> AnalysisService:
     """Get or create the analysis service instance."""
     global _analysis_service
     if _analysis_service is None:
         impact_repo = get_impact_repository()
-        # For now, we'll use None for recommendation repo until implemented
-        _analysis_service = AnalysisService(impact_repo, None)
+        _analysis_service = AnalysisService(impact_repo, get_recommendation_repository(), get_relation_service())
     return _analysis_service
 
 
 def initialize_database():
-    """Initialize the database and create tables."""
-    db_config.create_tables()
+    """Create missing tables and apply every pending migration (see ``migrations.migrate``)."""
+    from .database import migrations
+    from .database.config import db_config
+    migrations.migrate(db_config.engine)
 
 
 def reset_container():
     """Reset the container (useful for testing)."""
-    global _impact_repository, _analysis_service
+    global _impact_repository, _analysis_service, _feed_state_repository, _seen_article_service, _analysis_cache
+    global _score_service, _relation_service, _recommendation_repository
     _impact_repository = None
-    _analysis_service = None 
\ No newline at end of file
+    _recommendation_repository = None
+    _analysis_service = None
+    _feed_state_repository = None
+    _seen_article_service = None
+    _analysis_cache = None
+    _score_service = None
+    _relation_service = None
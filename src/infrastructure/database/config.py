@@ -1,29 +1,86 @@
 """
 Database configuration and connection management.
 """
+import asyncio
+import importlib.util
 import os
 import logging
+import threading
 import urllib.parse
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Generator, Optional
+
+from ..instrumentation import instrument_engine
 
 logger = logging.getLogger(__name__)
 
 
 class DatabaseConfig:
-    """Database configuration manager."""
+    """Database configuration manager.
+
+    Nothing is resolved or connected at construction: the URL, the engines
+    and the session factories are built on first use, and the schema is
+    checked once (``create_tables``), before the first session is handed
+    out. An empty database is created in full; an existing one is only
+    compared with the expected schema version, since upgrading it is an
+    explicit step (``python -m src.infrastructure.database.migrations``).
+    Set ``DB_SKIP_DDL=true`` to skip the check.
+    """
     
     def __init__(self):
-        self.database_url = self._get_database_url()
-        self.engine = self._create_engine()
-        self.SessionLocal = sessionmaker(
-            autocommit=False,
-            autoflush=False,
-            bind=self.engine
-        )
+        self._database_url: Optional[str] = None
+        self._engine = None
+        self._session_factory: Optional[sessionmaker] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_session_factory: Optional[async_sessionmaker] = None
+        self._schema_ready = os.getenv("DB_SKIP_DDL", "false").lower() == "true"
+        self._schema_lock = threading.Lock()
+    
+    @property
+    def database_url(self) -> str:
+        """Database URL, resolved from the environment on first use."""
+        if self._database_url is None:
+            self._database_url = self._get_database_url()
+        return self._database_url
+    
+    @property
+    def engine(self):
+        """Blocking engine, created on first use."""
+        if self._engine is None:
+            self._engine = self._create_engine()
+            instrument_engine(self._engine)
+        return self._engine
+    
+    @property
+    def SessionLocal(self) -> sessionmaker:
+        """Blocking session factory, created on first use."""
+        if self._session_factory is None:
+            self._session_factory = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=self.engine
+            )
+        return self._session_factory
+    
+    def ensure_schema(self) -> None:
+        """Run ``create_tables`` once per process, unless DB_SKIP_DDL is set.
+
+        A failure is logged and retried on the next session, like the old
+        import-time initialization.
+        """
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                try:
+                    self.create_tables()
+                except Exception as e:
+                    logger.warning(f"Database initialization failed: {e}")
     
     def _get_database_url(self) -> str:
         """Get database URL from environment variables."""
@@ -51,20 +108,80 @@ class DatabaseConfig:
         
         return f"postgresql+psycopg2://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}"
     
+    @staticmethod
+    def _pool_options(url: str) -> dict:
+        """Connection pool sizing; SQLite keeps the pool SQLAlchemy picks for it (StaticPool for :memory:)."""
+        if make_url(url).get_backend_name() == "sqlite":
+            return {}
+        return {"pool_size": 5, "max_overflow": 10}
+
     def _create_engine(self):
         """Create SQLAlchemy engine with connection pooling."""
+        options = self._pool_options(self.database_url)
+        if options:
+            options["poolclass"] = QueuePool
         return create_engine(
             self.database_url,
-            poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
             pool_pre_ping=True,
-            echo=os.getenv("DB_ECHO", "false").lower() == "true"
+            echo=os.getenv("DB_ECHO", "false").lower() == "true",
+            **options
         )
     
+    @property
+    def async_database_url(self) -> str:
+        """Database URL with the async driver of the same backend."""
+        url = make_url(self.database_url)
+        backend = url.get_backend_name()
+        if backend == "postgresql":
+            return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+        if backend == "sqlite":
+            return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+        return self.database_url
+
+    @property
+    def async_driver_available(self) -> bool:
+        """Whether the async driver of ``async_database_url`` (asyncpg, aiosqlite) is installed."""
+        return importlib.util.find_spec(make_url(self.async_database_url).get_driver_name()) is not None
+    
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """Async engine, created on first use."""
+        if self._async_engine is None:
+            self._async_engine = create_async_engine(
+                self.async_database_url,
+                pool_pre_ping=True,
+                echo=os.getenv("DB_ECHO", "false").lower() == "true",
+                **self._pool_options(self.async_database_url)
+            )
+            instrument_engine(self._async_engine.sync_engine)
+            self._async_session_factory = async_sessionmaker(
+                self._async_engine,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        return self._async_engine
+    
+    @asynccontextmanager
+    async def get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Get an async database session with automatic cleanup."""
+        if not self._schema_ready:
+            await asyncio.to_thread(self.ensure_schema)
+        self.async_engine
+        session = self._async_session_factory()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+    
     @contextmanager
     def get_session(self) -> Generator[Session, None, None]:
         """Get a database session with automatic cleanup."""
+        self.ensure_schema()
         session = self.SessionLocal()
         try:
             yield session
@@ -77,10 +194,20 @@ class DatabaseConfig:
             session.close()
     
     def create_tables(self):
-        """Create all tables in the database."""
-        from .models import Base
-        Base.metadata.create_all(bind=self.engine)
-        logger.info("Database tables created successfully")
+        """Create the tables of an empty database; check the schema version of an existing one."""
+        from .migrations import SCHEMA_VERSION, migrate, schema_version
+        with self.engine.connect() as connection:
+            version = schema_version(connection)
+        if version is None:
+            # Nothing to convert yet, so every migration is cheap
+            migrate(self.engine)
+            logger.info("Database tables created successfully")
+        elif version < SCHEMA_VERSION:
+            logger.warning(
+                f"Database schema is at version {version}, this code expects {SCHEMA_VERSION}; "
+                "run `make migrate` (python -m src.infrastructure.database.migrations)"
+            )
+        self._schema_ready = True
 
 
 # Global database config instance
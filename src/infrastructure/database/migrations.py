@@ -0,0 +1,334 @@
+"""
+In-place schema upgrades for databases created by older versions.
+
+``create_all`` only creates missing tables, it never alters existing ones.
+Each migration here checks whether it is needed, so running them again is
+safe. Some rewrite whole tables (deduplication, moving relation rows,
+partitioning), so they run only on an explicit ``migrate``
+(``python -m src.infrastructure.database.migrations`` or ``make migrate``),
+which then stamps ``SCHEMA_VERSION`` in the schema_version table. A
+process serving requests only compares that stamp; it migrates by itself
+only a database that has no tables yet.
+"""
+import logging
+from typing import Callable, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def _add_impact_content_hash(connection: Connection) -> None:
+    """Add, backfill and uniquely index impact_analysis.content_hash, dropping duplicate rows."""
+    columns = {column["name"] for column in inspect(connection).get_columns("impact_analysis")}
+    if "content_hash" in columns:
+        return
+
+    logger.info("Migrating impact_analysis: adding content_hash natural key")
+    connection.execute(text("ALTER TABLE impact_analysis ADD COLUMN content_hash VARCHAR(32)"))
+
+    if connection.dialect.name == "postgresql":
+        # Same key as impact_analysis_repository.content_hash, computed in SQL
+        connection.execute(text(
+            "UPDATE impact_analysis SET content_hash = md5("
+            "entity || '|' || type || '|' || coalesce(link, '') || '|' || "
+            "to_char(timestamp, 'YYYY-MM-DD\"T\"HH24:MI:SS'))"
+        ))
+    else:
+        from ..repositories.impact_analysis_repository import content_hash
+        rows = connection.execute(text("SELECT id, entity, type, link, timestamp FROM impact_analysis")).all()
+        if rows:
+            connection.execute(
+                text("UPDATE impact_analysis SET content_hash = :content_hash WHERE id = :id"),
+                [{"id": row.id, "content_hash": content_hash(row._asdict())} for row in rows],
+            )
+
+    # Keep the oldest row of every duplicate group
+    connection.execute(text(
+        "DELETE FROM impact_analysis WHERE id NOT IN "
+        "(SELECT min(id) FROM impact_analysis GROUP BY content_hash)"
+    ))
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE impact_analysis ALTER COLUMN content_hash SET NOT NULL"))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_impact_analysis_content_hash ON impact_analysis (content_hash)"
+    ))
+
+
+def _widen_content_hash_key(connection: Connection) -> None:
+    """Make the impact_analysis natural key (content_hash, timestamp), as partitioning requires."""
+    indexes = {index["name"]: index for index in inspect(connection).get_indexes("impact_analysis")}
+    index = indexes.get("uq_impact_analysis_content_hash")
+    if index is not None and list(index["column_names"]) == ["content_hash", "timestamp"]:
+        return
+
+    logger.info("Migrating impact_analysis: natural key on (content_hash, timestamp)")
+    if index is not None:
+        connection.execute(text("DROP INDEX uq_impact_analysis_content_hash"))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX uq_impact_analysis_content_hash ON impact_analysis (content_hash, timestamp)"
+    ))
+
+
+def _partition_impact_analysis(connection: Connection) -> None:
+    """Range-partition impact_analysis by time and keep partitions ahead (PostgreSQL only)."""
+    if connection.dialect.name != "postgresql":
+        return
+    from .partitions import ImpactPartitionManager
+    manager = ImpactPartitionManager()
+    if not manager.enabled:
+        return
+    if manager.is_partitioned(connection):
+        manager.ensure(connection)
+    else:
+        manager.convert(connection)
+
+
+def _add_impact_location(connection: Connection) -> None:
+    """Add the nullable impact_analysis.location column."""
+    columns = {column["name"] for column in inspect(connection).get_columns("impact_analysis")}
+    if "location" in columns:
+        return
+
+    logger.info("Migrating impact_analysis: adding location")
+    connection.execute(text("ALTER TABLE impact_analysis ADD COLUMN location VARCHAR(255)"))
+
+
+def _move_relation_rows(connection: Connection) -> None:
+    """Move Tag / Location / ScopeRelation rows out of impact_analysis into the relation tables.
+
+    Only Location rows that kept their location can be recovered; older Tag
+    and ScopeRelation rows lost their second name and are just dropped.
+    """
+    relation_types = "('Tag', 'Location', 'ScopeRelation')"
+    if connection.execute(text(f"SELECT 1 FROM impact_analysis WHERE type IN {relation_types} LIMIT 1")).first() is None:
+        return
+
+    logger.info("Migrating impact_analysis: moving relation rows to the relation tables")
+    connection.execute(text(
+        "INSERT INTO asset_location (asset, location, occurrences, first_seen_at, last_seen_at) "
+        "SELECT entity, location, count(*), min(timestamp), max(timestamp) FROM impact_analysis "
+        "WHERE type = 'Location' AND location IS NOT NULL GROUP BY entity, location "
+        "ON CONFLICT (asset, location) DO NOTHING"
+    ))
+    connection.execute(text(f"DELETE FROM impact_analysis WHERE type IN {relation_types}"))
+
+
+def _widen_recommendation_ticker(connection: Connection) -> None:
+    """Widen asset_recommendations.ticker to the 255 characters tickers have everywhere else."""
+    if connection.dialect.name != "postgresql":
+        return  # SQLite does not enforce VARCHAR lengths
+    columns = {column["name"]: column for column in inspect(connection).get_columns("asset_recommendations")}
+    if getattr(columns["ticker"]["type"], "length", None) == 255:
+        return
+
+    logger.info("Migrating asset_recommendations: widening ticker")
+    connection.execute(text("ALTER TABLE asset_recommendations ALTER COLUMN ticker TYPE VARCHAR(255)"))
+
+
+def _add_feed_schedule(connection: Connection) -> None:
+    """Add the feed_state poll schedule columns (poll_interval, next_poll_at, newest_published)."""
+    columns = {column["name"] for column in inspect(connection).get_columns("feed_state")}
+    missing = [
+        (name, sql_type)
+        for name, sql_type in [("poll_interval", "FLOAT"), ("next_poll_at", "TIMESTAMP"), ("newest_published", "TIMESTAMP")]
+        if name not in columns
+    ]
+    if not missing:
+        return
+
+    logger.info("Migrating feed_state: adding the poll schedule")
+    for name, sql_type in missing:
+        connection.execute(text(f"ALTER TABLE feed_state ADD COLUMN {name} {sql_type}"))
+
+
+# Decay-weighted per-ticker scores of the impacts since p_since, decayed to p_as_of.
+# Mirrors ScoringEngine over the InfluenceGraph: Asset impacts count for their
+# ticker, Scope impacts spread over asset_scope after p_hops hops of damped,
+# degree-normalized scope_relation, Macro impacts reach the assets of their
+# location through asset_location. Rows whose content_hash is in p_exclude are
+# skipped (the caller scores them itself). links are the p_links newest.
+#
+# The hops run in a loop rather than a recursive CTE: each hop is collapsed to
+# one row per (origin, scope) before the next, so cycles in scope_relation
+# cost origins x scopes rows per hop instead of one row per walk.
+DECAYED_TICKER_SCORES = """
+#variable_conflict use_column
+DECLARE
+    hop integer := 0;
+    frontier_origins text[];
+    frontier_scopes text[];
+    frontier_values double precision[];
+    reach_origins text[];
+    reach_scopes text[];
+    reach_values double precision[];
+BEGIN
+    SELECT array_agg(entity), array_agg(entity), array_agg(value)
+    INTO frontier_origins, frontier_scopes, frontier_values
+    FROM (
+        SELECT entity, sum(impact * exp(extract(epoch FROM (p_as_of - timestamp)) / 3600.0 * ln(p_decay))) AS value
+        FROM impact_analysis
+        WHERE timestamp >= p_since
+          AND type = 'Scope'
+          AND content_hash NOT IN (SELECT unnest(p_exclude))
+        GROUP BY entity
+    ) seeds;
+    reach_origins := frontier_origins;
+    reach_scopes := frontier_scopes;
+    reach_values := frontier_values;
+
+    WHILE hop < p_hops AND cardinality(frontier_scopes) > 0 LOOP
+        hop := hop + 1;
+        WITH related AS (
+            SELECT scope1 AS scope, scope2 AS neighbour FROM scope_relation
+            UNION ALL
+            SELECT scope2, scope1 FROM scope_relation
+        ),
+        degree AS (
+            SELECT scope, count(*) AS degree FROM related GROUP BY scope
+        )
+        SELECT array_agg(origin), array_agg(scope), array_agg(value)
+        INTO frontier_origins, frontier_scopes, frontier_values
+        FROM (
+            SELECT frontier.origin, related.scope, sum(frontier.value * p_damping / degree.degree) AS value
+            FROM unnest(frontier_origins, frontier_scopes, frontier_values) AS frontier (origin, scope, value)
+            JOIN related ON related.neighbour = frontier.scope
+            JOIN degree ON degree.scope = related.scope
+            GROUP BY frontier.origin, related.scope
+        ) step;
+        reach_origins := reach_origins || frontier_origins;
+        reach_scopes := reach_scopes || frontier_scopes;
+        reach_values := reach_values || frontier_values;
+    END LOOP;
+
+    RETURN QUERY
+    WITH impacts AS (
+        SELECT type, entity, location, link, timestamp AS at,
+               impact * exp(extract(epoch FROM (p_as_of - timestamp)) / 3600.0 * ln(p_decay)) AS weight
+        FROM impact_analysis
+        WHERE timestamp >= p_since
+          AND type IN ('Asset', 'Scope', 'Macro')
+          AND content_hash NOT IN (SELECT unnest(p_exclude))
+    ),
+    scope_links AS (
+        SELECT scope, at, link FROM (
+            SELECT entity AS scope, at, link, row_number() OVER (PARTITION BY entity ORDER BY at DESC) AS position
+            FROM impacts WHERE type = 'Scope' AND coalesce(link, '') <> ''
+        ) ranked WHERE position <= p_links
+    ),
+    reach AS (
+        SELECT * FROM unnest(reach_origins, reach_scopes, reach_values) AS reached (origin, scope, value)
+    ),
+    contributions AS (
+        SELECT entity AS ticker, weight, at, link FROM impacts WHERE type = 'Asset'
+        UNION ALL
+        SELECT asset_location.asset, impacts.weight, impacts.at, impacts.link
+        FROM impacts JOIN asset_location ON asset_location.location = impacts.location
+        WHERE impacts.type = 'Macro'
+        UNION ALL
+        SELECT asset_scope.asset, reach.value, NULL, NULL
+        FROM reach JOIN asset_scope ON asset_scope.scope = reach.scope
+    ),
+    reached_links AS (
+        SELECT DISTINCT asset_scope.asset AS ticker, scope_links.at, scope_links.link
+        FROM (SELECT DISTINCT origin, scope FROM reach) paths
+        JOIN asset_scope ON asset_scope.scope = paths.scope
+        JOIN scope_links ON scope_links.scope = paths.origin
+    ),
+    ticker_links AS (
+        SELECT ticker, at, link, row_number() OVER (PARTITION BY ticker ORDER BY at DESC) AS position
+        FROM (
+            SELECT ticker, at, link FROM contributions WHERE coalesce(link, '') <> ''
+            UNION ALL
+            SELECT ticker, at, link FROM reached_links
+        ) all_links
+    ),
+    newest_links AS (
+        SELECT ticker, array_agg(link ORDER BY at DESC) AS links
+        FROM ticker_links WHERE position <= p_links GROUP BY ticker
+    )
+    SELECT totals.ticker::varchar, totals.score::double precision, coalesce(newest_links.links, '{}')::text[]
+    FROM (SELECT ticker, sum(weight) AS score FROM contributions GROUP BY ticker) totals
+    LEFT JOIN newest_links ON newest_links.ticker = totals.ticker;
+END
+"""
+
+
+def _create_decayed_scores_function(connection: Connection) -> None:
+    """Create or update the decayed_ticker_scores SQL function (PostgreSQL only)."""
+    if connection.dialect.name != "postgresql":
+        return
+    current = connection.execute(
+        text("SELECT prosrc FROM pg_proc WHERE proname = 'decayed_ticker_scores'")
+    ).scalar()
+    if current == DECAYED_TICKER_SCORES:
+        return
+
+    logger.info("Migrating: creating decayed_ticker_scores function")
+    connection.execute(text("DROP FUNCTION IF EXISTS decayed_ticker_scores"))
+    connection.execute(text(
+        "CREATE FUNCTION decayed_ticker_scores("
+        "p_since timestamp, p_as_of timestamp, p_decay double precision, p_damping double precision, "
+        "p_hops integer, p_exclude text[] DEFAULT '{}', p_links integer DEFAULT 5) "
+        "RETURNS TABLE (ticker varchar, score double precision, links text[]) "
+        "LANGUAGE plpgsql STABLE AS $body$" + DECAYED_TICKER_SCORES + "$body$"
+    ))
+
+
+def _collapse_decayed_scores_walks(connection: Connection) -> None:
+    """Replace a decayed_ticker_scores that keeps one row per walk with the per-hop one."""
+    _create_decayed_scores_function(connection)
+
+
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _add_impact_content_hash,
+    _widen_content_hash_key,
+    _add_impact_location,
+    _move_relation_rows,
+    _widen_recommendation_ticker,
+    _add_feed_schedule,
+    _create_decayed_scores_function,
+    _partition_impact_analysis,
+    _collapse_decayed_scores_walks,
+]
+
+
+# Bump by appending to MIGRATIONS; a database stamped lower needs ``migrate``
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def run_migrations(engine: Engine) -> None:
+    """Apply every pending migration, each in its own transaction."""
+    for migration in MIGRATIONS:
+        with engine.begin() as connection:
+            migration(connection)
+
+
+def schema_version(connection: Connection) -> Optional[int]:
+    """Version stamped by the last ``migrate``: None for a database without tables, 0 if never stamped."""
+    tables = set(inspect(connection).get_table_names())
+    if "impact_analysis" not in tables:
+        return None
+    if "schema_version" not in tables:
+        return 0
+    return connection.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+
+
+def migrate(engine: Engine) -> None:
+    """Create missing tables, apply every pending migration and stamp ``SCHEMA_VERSION``."""
+    from .models import Base
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        connection.execute(text("DELETE FROM schema_version"))
+        connection.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": SCHEMA_VERSION})
+    logger.info(f"Database schema at version {SCHEMA_VERSION}")
+
+
+if __name__ == "__main__":
+    # The explicit upgrade; a running process never applies it to a populated database
+    logging.basicConfig(level=logging.INFO)
+    from .config import db_config
+    migrate(db_config.engine)
@@ -20,7 +20,10 @@ class ImpactAnalysisORM(Base):
     impact_description = Column(Text)
     summary = Column(Text)
     link = Column(String(500))
+    location = Column(String(255))
     timestamp = Column(DateTime, nullable=False, index=True)
+    # md5 of the natural key (entity, type, link, timestamp, location); see impact_analysis_repository.content_hash
+    content_hash = Column(String(32), nullable=False)
     inserted_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -28,6 +31,27 @@ class ImpactAnalysisORM(Base):
     __table_args__ = (
         Index('idx_entity_type', 'entity', 'type'),
         Index('idx_timestamp_type', 'timestamp', 'type'),
+        # Includes timestamp, the partition key on PostgreSQL (see partitions.py)
+        Index('uq_impact_analysis_content_hash', 'content_hash', 'timestamp', unique=True),
+    )
+
+
+class ImpactRollupORM(Base):
+    """SQLAlchemy model for hourly per-entity impact rollups, kept after raw rows expire."""
+    __tablename__ = "impact_rollup_hourly"
+
+    hour = Column(DateTime, primary_key=True)
+    type = Column(String(50), primary_key=True)
+    entity = Column(String(255), primary_key=True)
+    location = Column(String(255), primary_key=True, default="")  # '' when the impacts have none
+    impacts = Column(Integer, nullable=False)
+    impact_sum = Column(Float, nullable=False)
+    impact_min = Column(Float, nullable=False)
+    impact_max = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_rollup_entity_hour', 'entity', 'hour'),
     )
 
 
@@ -36,7 +60,7 @@ class AssetRecommendationORM(Base):
     __tablename__ = "asset_recommendations"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(20), nullable=False, index=True)
+    ticker = Column(String(255), nullable=False, index=True)
     weight = Column(Float, nullable=False, index=True)
     references = Column(Text)  # JSON string of references
     links = Column(Text)  # JSON string of links
@@ -46,4 +70,106 @@ class AssetRecommendationORM(Base):
     __table_args__ = (
         Index('idx_ticker_weight', 'ticker', 'weight'),
         Index('idx_weight_desc', 'weight', 'created_at'),
-    ) 
\ No newline at end of file
+    )
+
+
+class LeaderboardORM(Base):
+    """SQLAlchemy model for the materialized top-N recommendations, one row per rank."""
+    __tablename__ = "recommendation_leaderboard"
+
+    rank = Column(Integer, primary_key=True)
+    ticker = Column(String(255), nullable=False)
+    weight = Column(Float, nullable=False)
+    references = Column(Text)  # JSON string of references
+    links = Column(Text)  # JSON string of links
+    refreshed_at = Column(DateTime, default=func.now(), nullable=False)
+
+
+class FeedStateORM(Base):
+    """SQLAlchemy model for per-feed conditional GET validators and poll schedule."""
+    __tablename__ = "feed_state"
+
+    url = Column(String(500), primary_key=True)
+    etag = Column(String(255))
+    last_modified = Column(String(64))
+    checked_at = Column(DateTime)
+    poll_interval = Column(Float)
+    next_poll_at = Column(DateTime)
+    newest_published = Column(DateTime)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class SeenArticleORM(Base):
+    """SQLAlchemy model for the index of already analyzed articles."""
+    __tablename__ = "seen_articles"
+
+    key = Column(String(64), primary_key=True)
+    link = Column(String(500))
+    seen_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+
+
+class AnalysisCacheORM(Base):
+    """SQLAlchemy model for cached per-article LLM analyses."""
+    __tablename__ = "analysis_cache"
+
+    article_hash = Column(String(64), primary_key=True)
+    prompt_hash = Column(String(64), primary_key=True)
+    records = Column(Text, nullable=False)  # JSON string of analysis records
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+    last_used_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+
+
+class TickerScoreORM(Base):
+    """SQLAlchemy model for the running per-ticker decayed scores."""
+    __tablename__ = "ticker_scores"
+
+    ticker = Column(String(255), primary_key=True)
+    score = Column(Float, nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    references = Column(Text)  # JSON list of recent "summary->link" references
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class AssetScopeORM(Base):
+    """SQLAlchemy model for Tag relations: the scopes (business areas) of an asset."""
+    __tablename__ = "asset_scope"
+
+    asset = Column(String(255), primary_key=True)
+    scope = Column(String(255), primary_key=True)
+    occurrences = Column(Integer, default=1, nullable=False)
+    first_seen_at = Column(DateTime, default=func.now(), nullable=False)
+    last_seen_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_asset_scope_scope_asset', 'scope', 'asset'),
+    )
+
+
+class AssetLocationORM(Base):
+    """SQLAlchemy model for Location relations: where an asset operates."""
+    __tablename__ = "asset_location"
+
+    asset = Column(String(255), primary_key=True)
+    location = Column(String(255), primary_key=True)
+    occurrences = Column(Integer, default=1, nullable=False)
+    first_seen_at = Column(DateTime, default=func.now(), nullable=False)
+    last_seen_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_asset_location_location_asset', 'location', 'asset'),
+    )
+
+
+class ScopeRelationORM(Base):
+    """SQLAlchemy model for ScopeRelation relations, stored once per pair with scope1 < scope2."""
+    __tablename__ = "scope_relation"
+
+    scope1 = Column(String(255), primary_key=True)
+    scope2 = Column(String(255), primary_key=True)
+    occurrences = Column(Integer, default=1, nullable=False)
+    first_seen_at = Column(DateTime, default=func.now(), nullable=False)
+    last_seen_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_scope_relation_scope2_scope1', 'scope2', 'scope1'),
+    )
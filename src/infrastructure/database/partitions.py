@@ -0,0 +1,280 @@
+"""
+Time partitioning, retention and hourly rollups of impact_analysis.
+
+On PostgreSQL impact_analysis is a native ``PARTITION BY RANGE (timestamp)``
+table with one partition per day or week plus a default partition for
+timestamps no partition covers. Queries filtered on ``timestamp`` (all
+history reads are) are pruned to the live partitions, and expired data is
+removed by dropping or detaching whole partitions instead of ``DELETE``, so
+vacuum work and index bloat stay bounded by the partition size.
+
+Before rows expire they are summarised into impact_rollup_hourly (one row
+per hour, type, entity and location), which is what long-range analytics
+should read. Rollups and row retention also work on other databases, with
+plain ``DELETE`` in place of partition drops.
+
+Run ``python -m src.infrastructure.database.partitions`` (or call
+``ImpactPartitionManager().maintain()``) periodically; the pipeline does it
+once per run and the ingestion daemon every INGEST_MAINTENANCE_SECONDS.
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def _oldest(connection: Connection, before: Optional[datetime] = None) -> Optional[datetime]:
+    """Oldest impact timestamp, optionally only among those before a given time."""
+    from .models import ImpactAnalysisORM
+
+    statement = select(func.min(ImpactAnalysisORM.timestamp))
+    if before is not None:
+        statement = statement.where(ImpactAnalysisORM.timestamp < before)
+    return connection.execute(statement).scalar()
+
+
+class ImpactPartitionManager:
+    """Creates, converts, expires and rolls up impact_analysis partitions.
+
+    Configuration comes from the environment unless passed in:
+
+    - ``IMPACT_PARTITIONING`` (true): convert impact_analysis on PostgreSQL
+    - ``IMPACT_PARTITION_INTERVAL`` (week): ``day`` or ``week`` partitions
+    - ``IMPACT_PARTITIONS_AHEAD`` (2): future partitions kept ready
+    - ``IMPACT_RETENTION_DAYS`` (0): age past which raw rows expire, 0 keeps all
+    - ``IMPACT_RETENTION_MODE`` (drop): ``drop`` expired partitions, or
+      ``detach`` them into standalone impact_analysis_archive_* tables
+    - ``IMPACT_ROLLUP_HOURS`` (48): recent hours re-aggregated on each run
+    """
+
+    # Backfill at most this far when converting; older rows go to the default partition
+    MAX_BACKFILL = timedelta(days=366)
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        interval: Optional[str] = None,
+        ahead: Optional[int] = None,
+        retention_days: Optional[float] = None,
+        retention_mode: Optional[str] = None,
+        rollup_hours: Optional[float] = None,
+    ):
+        self.enabled = enabled if enabled is not None else os.getenv("IMPACT_PARTITIONING", "true").lower() == "true"
+        self.interval = interval or os.getenv("IMPACT_PARTITION_INTERVAL", "week")
+        if self.interval not in ("day", "week"):
+            raise ValueError(f"IMPACT_PARTITION_INTERVAL must be 'day' or 'week', not {self.interval!r}")
+        self.ahead = ahead if ahead is not None else int(os.getenv("IMPACT_PARTITIONS_AHEAD", "2"))
+        self.retention_days = (
+            retention_days if retention_days is not None else float(os.getenv("IMPACT_RETENTION_DAYS", "0"))
+        )
+        self.retention_mode = retention_mode or os.getenv("IMPACT_RETENTION_MODE", "drop")
+        self.rollup_hours = rollup_hours if rollup_hours is not None else float(os.getenv("IMPACT_ROLLUP_HOURS", "48"))
+
+    # Periods
+
+    def period_start(self, moment: datetime) -> datetime:
+        """Start of the day or (Monday-based) week containing ``moment``."""
+        day = datetime(moment.year, moment.month, moment.day)
+        return day if self.interval == "day" else day - timedelta(days=day.weekday())
+
+    def _step(self) -> timedelta:
+        return timedelta(days=1 if self.interval == "day" else 7)
+
+    def horizon(self, now: datetime) -> Optional[datetime]:
+        """Start of the oldest period that is kept, None without retention."""
+        if self.retention_days <= 0:
+            return None
+        return self.period_start(now - timedelta(days=self.retention_days))
+
+    @staticmethod
+    def partition_name(start: datetime) -> str:
+        return f"impact_analysis_p{start:%Y%m%d}"
+
+    # Inspection
+
+    @staticmethod
+    def is_partitioned(connection: Connection) -> bool:
+        """Whether impact_analysis already is a partitioned table."""
+        return connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('impact_analysis')"
+        )).first() is not None
+
+    @staticmethod
+    def partitions(connection: Connection) -> List[Tuple[str, datetime, datetime]]:
+        """(name, start, end) of every range partition, oldest first; the default partition is left out."""
+        rows = connection.execute(text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass('impact_analysis')"
+        )).all()
+        partitions = []
+        for name, bound in rows:
+            match = _BOUNDS.search(bound or "")
+            if match:
+                partitions.append((name, datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2))))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    # Conversion and creation
+
+    def convert(self, connection: Connection, now: Optional[datetime] = None) -> None:
+        """Turn a plain impact_analysis table into a partitioned one, keeping its rows, ids and indexes."""
+        from .models import ImpactAnalysisORM
+
+        now = now or datetime.utcnow()
+        logger.info(f"Partitioning impact_analysis by {self.interval}")
+        oldest = _oldest(connection)
+
+        connection.execute(text("ALTER TABLE impact_analysis RENAME TO impact_analysis_unpartitioned"))
+        connection.execute(text(
+            "CREATE TABLE impact_analysis (LIKE impact_analysis_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (timestamp)"
+        ))
+        # The id sequence must outlive the old table
+        sequence = connection.execute(
+            text("SELECT pg_get_serial_sequence('impact_analysis_unpartitioned', 'id')")
+        ).scalar()
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY impact_analysis.id"))
+        connection.execute(text("CREATE TABLE impact_analysis_default PARTITION OF impact_analysis DEFAULT"))
+
+        start = self.period_start(now)
+        if oldest is not None:
+            floor = self.horizon(now) or self.period_start(now - self.MAX_BACKFILL)
+            start = min(start, max(self.period_start(oldest), floor))
+        self._create_partitions(connection, start, now)
+
+        connection.execute(text("INSERT INTO impact_analysis SELECT * FROM impact_analysis_unpartitioned"))
+        connection.execute(text("DROP TABLE impact_analysis_unpartitioned"))
+        # Primary keys and unique indexes of a partitioned table must include the partition key
+        connection.execute(text("ALTER TABLE impact_analysis ADD PRIMARY KEY (id, timestamp)"))
+        for index in ImpactAnalysisORM.__table__.indexes:
+            index.create(connection)
+
+    def ensure(self, connection: Connection, now: Optional[datetime] = None) -> List[str]:
+        """Create the partitions of the current period and the next ``ahead`` ones; returns the new names."""
+        return self._create_partitions(connection, self.period_start(now or datetime.utcnow()), now)
+
+    def _create_partitions(self, connection: Connection, start: datetime, now: Optional[datetime]) -> List[str]:
+        end = self.period_start(now or datetime.utcnow()) + self._step() * (self.ahead + 1)
+        existing = self.partitions(connection)
+        created = []
+        period = start
+        while period < end:
+            period_end = period + self._step()
+            if not any(low < period_end and period < high for _, low, high in existing):
+                self._create_partition(connection, period, period_end)
+                created.append(self.partition_name(period))
+            period = period_end
+        if created:
+            logger.info(f"Created impact_analysis partitions: {', '.join(created)}")
+        return created
+
+    def _create_partition(self, connection: Connection, start: datetime, end: datetime) -> None:
+        """Create one partition, moving any rows of its range out of the default partition first."""
+        name = self.partition_name(start)
+        bounds = {"start": start, "end": end}
+        connection.execute(text(f"CREATE TABLE {name} (LIKE impact_analysis INCLUDING DEFAULTS)"))
+        connection.execute(text(
+            f"WITH moved AS (DELETE FROM impact_analysis_default "
+            f"WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        # Attaching creates the partition's copies of the parent indexes
+        connection.execute(text(
+            f"ALTER TABLE impact_analysis ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') TO ('{end.isoformat(sep=' ')}')"
+        ))
+
+    # Rollups and retention
+
+    @staticmethod
+    def rollup(connection: Connection, since: datetime, until: datetime) -> int:
+        """Recompute the hourly rollups of [since, until), whole hours; returns the number of rollup rows written."""
+        since = since.replace(minute=0, second=0, microsecond=0)
+        if connection.dialect.name == "postgresql":
+            hour = "date_trunc('hour', timestamp)"
+        else:
+            hour = "strftime('%Y-%m-%d %H:00:00', timestamp)"
+        result = connection.execute(text(
+            "INSERT INTO impact_rollup_hourly "
+            "(hour, type, entity, location, impacts, impact_sum, impact_min, impact_max, updated_at) "
+            f"SELECT {hour}, type, entity, coalesce(location, ''), count(*), sum(impact), min(impact), max(impact), "
+            "CURRENT_TIMESTAMP FROM impact_analysis WHERE timestamp >= :since AND timestamp < :until "
+            f"GROUP BY {hour}, type, entity, coalesce(location, '') "
+            "ON CONFLICT (hour, type, entity, location) DO UPDATE SET impacts = excluded.impacts, "
+            "impact_sum = excluded.impact_sum, impact_min = excluded.impact_min, "
+            "impact_max = excluded.impact_max, updated_at = excluded.updated_at"
+        ), {"since": since, "until": until})
+        return result.rowcount
+
+    def enforce_retention(self, connection: Connection, now: Optional[datetime] = None) -> List[str]:
+        """Roll up, then drop or detach, everything older than the retention horizon; returns the partitions removed."""
+        horizon = self.horizon(now or datetime.utcnow())
+        if horizon is None:
+            return []
+        oldest = _oldest(connection, horizon)
+        if oldest is not None:
+            self.rollup(connection, oldest, horizon)
+
+        removed = []
+        partitioned = connection.dialect.name == "postgresql" and self.is_partitioned(connection)
+        if partitioned:
+            for name, _, end in self.partitions(connection):
+                if end > horizon:
+                    continue
+                if self.retention_mode == "detach":
+                    archive = name.replace("impact_analysis_p", "impact_analysis_archive_", 1)
+                    connection.execute(text(f"ALTER TABLE impact_analysis DETACH PARTITION {name}"))
+                    connection.execute(text(f"ALTER TABLE {name} RENAME TO {archive}"))
+                else:
+                    connection.execute(text(f"DROP TABLE {name}"))
+                removed.append(name)
+            target = "impact_analysis_default"
+        elif self.retention_mode == "detach":
+            logger.warning("Impact retention: detach needs a partitioned PostgreSQL table; rows are kept")
+            return []
+        else:
+            target = "impact_analysis"
+
+        deleted = connection.execute(
+            text(f"DELETE FROM {target} WHERE timestamp < :horizon"), {"horizon": horizon}
+        ).rowcount
+        logger.info(
+            f"Impact retention before {horizon:%Y-%m-%d}: {self.retention_mode} {len(removed)} partitions, "
+            f"deleted {deleted} rows"
+        )
+        return removed
+
+    def maintain(self, engine: Optional[Engine] = None, now: Optional[datetime] = None) -> Dict[str, int]:
+        """One maintenance pass: recent rollups, future partitions, retention; each in its own transaction."""
+        if engine is None:
+            from .config import db_config
+            engine = db_config.engine
+        now = now or datetime.utcnow()
+        summary = {"rollups": 0, "created": 0, "removed": 0}
+
+        with engine.begin() as connection:
+            summary["rollups"] = self.rollup(connection, now - timedelta(hours=self.rollup_hours), now)
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as connection:
+                if self.is_partitioned(connection):
+                    summary["created"] = len(self.ensure(connection, now))
+        with engine.begin() as connection:
+            summary["removed"] = len(self.enforce_retention(connection, now))
+        logger.info(f"Impact maintenance: {summary}")
+        return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from .config import db_config
+    db_config.ensure_schema()
+    print(ImpactPartitionManager().maintain(db_config.engine))
@@ -0,0 +1,3 @@
+"""
+Feed infrastructure - RSS retrieval and parsing.
+"""
@@ -0,0 +1,196 @@
+"""
+Concurrent RSS feed fetcher with global and per-host connection limits.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import feedparser
+import httpx
+
+from ...domain.entities import FeedState
+from ..instrumentation import record
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; RSSFetcher/1.0; +https://github.com/brufen/macro-mancer)",
+}
+
+
+@dataclass
+class FeedResult:
+    """Outcome of fetching a single feed."""
+    url: str
+    articles: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class FeedFetcher:
+    """Fetches many RSS feeds concurrently on one shared HTTP client.
+
+    Requests are bounded by a global concurrency cap and a per-host cap, so
+    a long feed list fans out without hammering a single publisher. Each feed
+    has its own timeout; a slow or broken feed is reported in its
+    ``FeedResult`` instead of failing the whole batch.
+
+    When a stored ``FeedState`` is given for a feed, the request is made
+    conditional (``If-None-Match`` / ``If-Modified-Since``) and a 304 answer
+    skips download and parsing entirely.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_per_host: Optional[int] = None,
+        timeout: Optional[float] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.max_concurrency = max_concurrency or int(os.getenv("FEED_MAX_CONCURRENCY", "16"))
+        self.max_per_host = max_per_host or int(os.getenv("FEED_MAX_PER_HOST", "4"))
+        self.timeout = timeout or float(os.getenv("FEED_TIMEOUT_SECONDS", "15"))
+        self.headers = headers or DEFAULT_HEADERS
+
+    async def fetch_all(
+        self,
+        feeds: List[str],
+        cutoff_time: datetime,
+        validators: Optional[Dict[str, FeedState]] = None,
+    ) -> List[FeedResult]:
+        """Fetch all feeds concurrently and return one result per feed, in input order."""
+        async with self._client() as client:
+            return await asyncio.gather(*self._tasks(client, feeds, cutoff_time, validators))
+
+    async def iter_results(
+        self,
+        feeds: List[str],
+        cutoff_time: datetime,
+        validators: Optional[Dict[str, FeedState]] = None,
+    ) -> AsyncIterator[FeedResult]:
+        """Fetch all feeds concurrently, yielding each result as soon as its feed completes."""
+        async with self._client() as client:
+            for next_result in asyncio.as_completed(self._tasks(client, feeds, cutoff_time, validators)):
+                yield await next_result
+
+    def _client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        return httpx.AsyncClient(
+            headers=self.headers,
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+        )
+
+    def _tasks(
+        self,
+        client: httpx.AsyncClient,
+        feeds: List[str],
+        cutoff_time: datetime,
+        validators: Optional[Dict[str, FeedState]],
+    ) -> List[Awaitable[FeedResult]]:
+        validators = validators or {}
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        return [
+            self._fetch_one(
+                client, feed_url, cutoff_time, global_limit, host_limits, validators.get(feed_url)
+            )
+            for feed_url in feeds
+        ]
+
+    async def _fetch_one(
+        self,
+        client: httpx.AsyncClient,
+        feed_url: str,
+        cutoff_time: datetime,
+        global_limit: asyncio.Semaphore,
+        host_limits: Dict[str, asyncio.Semaphore],
+        state: Optional[FeedState] = None,
+    ) -> FeedResult:
+        """Fetch and parse a single feed, never raising."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        host = urlparse(feed_url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+
+        headers = {}
+        if state is not None and state.etag:
+            headers["If-None-Match"] = state.etag
+        if state is not None and state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+        try:
+            # Take the host slot first so waiting on a busy host does not
+            # hold one of the global slots.
+            async with host_limit, global_limit:
+                logger.info(f"Fetching from: {feed_url}")
+                response = await asyncio.wait_for(
+                    client.get(feed_url, headers=headers), timeout=self.timeout
+                )
+                if response.status_code == 304:
+                    logger.info(f"Feed not modified: {feed_url}")
+                    return FeedResult(
+                        url=feed_url,
+                        elapsed=loop.time() - started,
+                        not_modified=True,
+                        etag=state.etag,
+                        last_modified=state.last_modified,
+                    )
+                response.raise_for_status()
+
+            record(bytes_fetched=len(response.content))
+            # feedparser is CPU-bound; keep it off the event loop.
+            feed = await asyncio.to_thread(feedparser.parse, response.content)
+            articles = self._extract_articles(feed_url, feed, cutoff_time)
+            return FeedResult(
+                url=feed_url,
+                articles=articles,
+                elapsed=loop.time() - started,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        logger.error(f"Error fetching feed {feed_url}: {error}")
+        return FeedResult(url=feed_url, error=error, elapsed=loop.time() - started)
+
+    def _extract_articles(self, feed_url: str, feed: Any, cutoff_time: datetime) -> List[Dict[str, Any]]:
+        """Convert parsed feed entries into article dicts newer than the cutoff."""
+        logger.info(f"Found {len(feed.entries)} entries in {feed_url}")
+
+        articles = []
+        for entry in feed.entries:
+            try:
+                published = datetime(*entry.published_parsed[:6])
+                if published > cutoff_time:
+                    articles.append({
+                        "title": entry.title,
+                        "summary": entry.summary,
+                        "link": entry.link,
+                        "guid": entry.get("id"),
+                        "published": published.isoformat(),
+                        "source": feed_url
+                    })
+            except Exception as e:
+                logger.error(f"Error parsing entry: {e}")
+                continue
+        return articles
@@ -0,0 +1,325 @@
+"""
+Instrumentation - per-stage wall time, rows, bytes, LLM tokens and DB round trips.
+
+A stage is a named unit of work: a tool, an agent turn, a repository
+operation or a pipeline step. Every stage is timed into a Prometheus
+histogram and, when OpenTelemetry is available, also runs as a span, so
+the same numbers reach a metrics scrape and a trace backend.
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+METRIC_PREFIX = "macromancer"
+
+# Counts a stage can record, with their Prometheus help text
+COUNTS: Dict[str, str] = {
+    "rows_in": "Rows or records a stage received.",
+    "rows_out": "Rows or records a stage produced.",
+    "bytes_fetched": "Bytes downloaded by a stage.",
+    "prompt_tokens": "LLM prompt tokens used by a stage.",
+    "completion_tokens": "LLM completion tokens used by a stage.",
+    "db_round_trips": "SQL statements a stage sent to the database.",
+}
+
+# Counts that also add up in every enclosing stage (a tool's round trips include its repository calls)
+ROLLUP_COUNTS = ("bytes_fetched", "prompt_tokens", "completion_tokens", "db_round_trips")
+
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+@dataclass
+class _Histogram:
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    count: int = 0
+    total: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class StageMetrics:
+    """Thread-safe per-stage latency histograms, call and error counters and counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations: Dict[str, _Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._counts: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, stage: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self._durations.setdefault(stage, _Histogram()).observe(seconds)
+            if error:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def add(self, stage: str, **counts: float) -> None:
+        """Add counts (see ``COUNTS``) to a stage."""
+        with self._lock:
+            stage_counts = self._counts.setdefault(stage, {})
+            for name, value in counts.items():
+                if value:
+                    stage_counts[name] = stage_counts.get(name, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._errors.clear()
+            self._counts.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: calls, errors, total and mean seconds and every recorded count."""
+        with self._lock:
+            stages = sorted(set(self._durations) | set(self._counts))
+            return {
+                stage: {
+                    "calls": self._durations[stage].count if stage in self._durations else 0,
+                    "errors": self._errors.get(stage, 0),
+                    "seconds": self._durations[stage].total if stage in self._durations else 0.0,
+                    "mean_seconds": (
+                        self._durations[stage].total / self._durations[stage].count
+                        if stage in self._durations else 0.0
+                    ),
+                    **self._counts.get(stage, {}),
+                }
+                for stage in stages
+            }
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Wall time of a pipeline stage.", f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage, histogram in sorted(self._durations.items()):
+                label = f'stage="{_label(stage)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{label},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{label}}} {histogram.total!r}")
+                lines.append(f"{name}_count{{{label}}} {histogram.count}")
+
+            errors = f"{METRIC_PREFIX}_stage_errors_total"
+            lines += [f"# HELP {errors} Stage runs that raised.", f"# TYPE {errors} counter"]
+            lines += [f'{errors}{{stage="{_label(stage)}"}} {count}' for stage, count in sorted(self._errors.items())]
+
+            for count_name, help_text in COUNTS.items():
+                metric = f"{METRIC_PREFIX}_{count_name}_total"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [
+                    f'{metric}{{stage="{_label(stage)}"}} {counts[count_name]:g}'
+                    for stage, counts in sorted(self._counts.items())
+                    if count_name in counts
+                ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = StageMetrics()
+
+
+class Stage:
+    """A running stage; counts recorded on it are flushed to ``metrics`` (and its span) when it ends."""
+
+    __slots__ = ("name", "parent", "counts")
+
+    def __init__(self, name: str, parent: Optional["Stage"]):
+        self.name = name
+        self.parent = parent
+        self.counts: Dict[str, float] = {}
+
+    def record(self, **counts: float) -> None:
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+
+_current: ContextVar[Optional[Stage]] = ContextVar("instrumentation_stage", default=None)
+
+
+def _tracer() -> Any:
+    """The OpenTelemetry tracer, None if OpenTelemetry is not installed or INSTRUMENTATION_SPANS=false."""
+    if os.getenv("INSTRUMENTATION_SPANS", "true").lower() == "false":
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return None
+    return trace.get_tracer("macro-mancer")
+
+
+@contextmanager
+def stage(name: str, **counts: float) -> Iterator[Stage]:
+    """Time a block as stage ``name`` (and a span of the same name); ``counts`` are recorded up front."""
+    tracer = _tracer()
+    with tracer.start_as_current_span(name) if tracer is not None else nullcontext() as span:
+        current = Stage(name, _current.get())
+        current.record(**counts)
+        token = _current.set(current)
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield current
+            failed = False
+        finally:
+            metrics.observe(name, time.perf_counter() - started, failed)
+            metrics.add(name, **current.counts)
+            if span is not None and current.counts:
+                span.set_attributes({f"{METRIC_PREFIX}.{count}": value for count, value in current.counts.items()})
+            _current.reset(token)
+
+
+def record(**counts: float) -> None:
+    """Record counts on the current stage; the rollup counts also on every enclosing stage."""
+    current = _current.get()
+    if current is None:
+        return
+    current.record(**counts)
+    rollup = {name: value for name, value in counts.items() if name in ROLLUP_COUNTS}
+    parent = current.parent
+    while rollup and parent is not None:
+        parent.record(**rollup)
+        parent = parent.parent
+
+
+def instrumented(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator running a sync or async function as a stage (default name: the function name).
+
+    The wrapper keeps the signature, so ADK still sees a tool's parameters.
+    """
+    def decorate(function: F) -> F:
+        stage_name = name or function.__name__
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with stage(stage_name):
+                    return await function(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(stage_name):
+                return function(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+def instrument_engine(engine: Any) -> None:
+    """Count every statement a SQLAlchemy (sync) engine executes as a round trip of the current stage."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _count_round_trip(*_: Any) -> None:
+        record(db_round_trips=1)
+
+
+# ADK agent turns: started in before_agent_callback, ended in after_agent_callback
+_turns: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+
+
+def _turn_key(callback_context: Any) -> Tuple[str, str]:
+    return callback_context.invocation_id, callback_context.agent_name
+
+
+def before_agent_turn(callback_context: Any) -> None:
+    """ADK before_agent_callback: start timing the turn (and its span)."""
+    tracer = _tracer()
+    span = tracer.start_span(f"agent.{callback_context.agent_name}") if tracer is not None else None
+    _turns[_turn_key(callback_context)] = (time.perf_counter(), span)
+    return None
+
+
+def after_agent_turn(callback_context: Any) -> None:
+    """ADK after_agent_callback: record the turn as stage ``agent.<name>``."""
+    started, span = _turns.pop(_turn_key(callback_context), (None, None))
+    if started is not None:
+        metrics.observe(f"agent.{callback_context.agent_name}", time.perf_counter() - started)
+    if span is not None:
+        span.end()
+    write_metrics()
+    return None
+
+
+def after_model_call(callback_context: Any, llm_response: Any) -> None:
+    """ADK after_model_callback: record the prompt and completion tokens of the agent's LLM call."""
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is not None:
+        metrics.add(
+            f"agent.{callback_context.agent_name}",
+            prompt_tokens=usage.prompt_token_count or 0,
+            completion_tokens=usage.candidates_token_count or 0,
+        )
+    return None
+
+
+def agent_callbacks(llm: bool = False) -> Dict[str, Callable[..., Any]]:
+    """Callback keyword arguments that instrument an ADK agent; ``llm`` adds token counting."""
+    callbacks: Dict[str, Callable[..., Any]] = {
+        "before_agent_callback": before_agent_turn,
+        "after_agent_callback": after_agent_turn,
+    }
+    if llm:
+        callbacks["after_model_callback"] = after_model_call
+    return callbacks
+
+
+def use_in_memory_spans() -> Any:
+    """Collect finished spans in memory (for local runs); returns the ``InMemorySpanExporter``."""
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        trace.set_tracer_provider(provider)
+    exporter = InMemorySpanExporter()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return exporter
+
+
+def write_metrics(path: Optional[str] = None) -> Optional[str]:
+    """Write the Prometheus text to ``path`` or METRICS_PATH (for a textfile collector); returns the path."""
+    path = path or os.getenv("METRICS_PATH")
+    if not path:
+        return None
+    try:
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as output:
+            output.write(metrics.render())
+        os.replace(temporary, path)
+        return path
+    except OSError as e:
+        logger.warning(f"Could not write metrics to {path}: {e}")
+        return None
+
+
+def log_summary() -> None:
+    """Log one line per stage: calls, seconds and counts."""
+    for stage_name, values in metrics.snapshot().items():
+        counts = ", ".join(
+            f"{name}={values[name]:g}" for name in COUNTS if name in values
+        )
+        logger.info(
+            f"Stage {stage_name}: {values['calls']:g} calls, {values['seconds']:.3f}s"
+            + (f", {counts}" if counts else "")
+            + (f", {values['errors']:g} errors" if values["errors"] else "")
+        )
@@ -0,0 +1,119 @@
+"""
+Concrete implementation of AnalysisCacheRepository using SQLAlchemy.
+"""
+import json
+import logging
+from typing import List
+from datetime import datetime
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from ...domain.repositories import AnalysisCacheRepository
+from ...domain.entities import CachedAnalysis
+from ..database.models import AnalysisCacheORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyAnalysisCacheRepository(SQLAlchemyRepository, AnalysisCacheRepository):
+    """SQLAlchemy implementation of AnalysisCacheRepository."""
+    
+    def _orm_to_domain(self, orm_obj: AnalysisCacheORM) -> CachedAnalysis:
+        """Convert ORM object to domain entity."""
+        return CachedAnalysis(
+            article_hash=orm_obj.article_hash,
+            prompt_hash=orm_obj.prompt_hash,
+            records=json.loads(orm_obj.records),
+            created_at=orm_obj.created_at,
+            last_used_at=orm_obj.last_used_at,
+        )
+    
+    async def get_many(self, article_hashes: List[str], prompt_hash: str, since: datetime) -> List[CachedAnalysis]:
+        """Get the cached analyses created since a given time, marking them as used."""
+        if not article_hashes:
+            return []
+        return await self._run(self._get_many, article_hashes, prompt_hash, since)
+    
+    def _get_many(self, session: Session, article_hashes: List[str], prompt_hash: str, since: datetime) -> List[CachedAnalysis]:
+        orm_objects = session.execute(
+            select(AnalysisCacheORM).where(
+                AnalysisCacheORM.prompt_hash == prompt_hash,
+                AnalysisCacheORM.article_hash.in_(article_hashes),
+                AnalysisCacheORM.created_at >= since,
+            )
+        ).scalars().all()
+        
+        results = [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+        
+        if results:
+            session.execute(
+                update(AnalysisCacheORM)
+                .where(
+                    AnalysisCacheORM.prompt_hash == prompt_hash,
+                    AnalysisCacheORM.article_hash.in_([entry.article_hash for entry in results]),
+                )
+                .values(last_used_at=datetime.utcnow())
+            )
+        return results
+    
+    async def save_many(self, entries: List[CachedAnalysis]) -> List[CachedAnalysis]:
+        """Insert or replace multiple cached analyses."""
+        if not entries:
+            return []
+        
+        await self._run(self._save_many, entries)
+        logger.info(f"Cached analyses of {len(entries)} articles")
+        return entries
+    
+    def _save_many(self, session: Session, entries: List[CachedAnalysis]) -> None:
+        now = datetime.utcnow()
+        existing = {
+            (orm_obj.article_hash, orm_obj.prompt_hash): orm_obj
+            for orm_obj in session.execute(
+                select(AnalysisCacheORM).where(
+                    AnalysisCacheORM.prompt_hash.in_({entry.prompt_hash for entry in entries}),
+                    AnalysisCacheORM.article_hash.in_([entry.article_hash for entry in entries]),
+                )
+            ).scalars()
+        }
+        
+        for entry in entries:
+            orm_obj = existing.get((entry.article_hash, entry.prompt_hash))
+            if orm_obj is None:
+                orm_obj = AnalysisCacheORM(article_hash=entry.article_hash, prompt_hash=entry.prompt_hash)
+                session.add(orm_obj)
+                existing[(entry.article_hash, entry.prompt_hash)] = orm_obj
+            orm_obj.records = json.dumps(entry.records, ensure_ascii=False)
+            orm_obj.created_at = entry.created_at or now
+            orm_obj.last_used_at = now
+    
+    async def evict(self, expired_before: datetime, max_entries: int) -> int:
+        """Delete expired entries and the least recently used ones beyond max_entries."""
+        expired, overflow = await self._run(self._evict, expired_before, max_entries)
+        if expired or overflow:
+            logger.info(f"Evicted {expired} expired and {overflow} least recently used cached analyses")
+        return expired + overflow
+    
+    def _evict(self, session: Session, expired_before: datetime, max_entries: int):
+        expired = session.execute(
+            delete(AnalysisCacheORM).where(AnalysisCacheORM.created_at < expired_before)
+        ).rowcount
+        
+        # Oldest last_used_at within capacity; older rows go, rows tied with it are kept
+        boundary = session.execute(
+            select(AnalysisCacheORM.last_used_at)
+            .order_by(AnalysisCacheORM.last_used_at.desc())
+            .offset(max(max_entries - 1, 0))
+            .limit(1)
+        ).scalar()
+        overflow = 0
+        if boundary is not None:
+            overflow = session.execute(
+                delete(AnalysisCacheORM).where(AnalysisCacheORM.last_used_at < boundary)
+            ).rowcount
+        return expired, overflow
+
+
+class AsyncSQLAlchemyAnalysisCacheRepository(AsyncSessionMixin, SQLAlchemyAnalysisCacheRepository):
+    """AnalysisCacheRepository on a native async (asyncpg) session."""
@@ -0,0 +1,127 @@
+"""
+Concrete implementation of AssetRecommendationRepository using SQLAlchemy.
+"""
+import json
+import logging
+from typing import Any, List
+from datetime import datetime
+from sqlalchemy import delete, desc, insert, select
+from sqlalchemy.orm import Session
+
+from ...domain.repositories import AssetRecommendationRepository
+from ...domain.entities import AssetRecommendation
+from ..database.models import AssetRecommendationORM, LeaderboardORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyAssetRecommendationRepository(SQLAlchemyRepository, AssetRecommendationRepository):
+    """SQLAlchemy implementation of AssetRecommendationRepository.
+
+    asset_recommendations keeps the recommendations saved with ``save_many``.
+    recommendation_leaderboard holds only the current top N, one row per
+    rank, replaced in a single transaction by ``refresh_leaderboard``; the
+    refresh writes no history, so it can run after every scored batch.
+    ``get_top_recommendations`` is therefore a primary key range read that
+    never depends on the size of the history.
+    """
+    
+    def _orm_to_domain(self, orm_obj: Any) -> AssetRecommendation:
+        """Convert ORM object (history or leaderboard row) to domain entity."""
+        return AssetRecommendation(
+            ticker=orm_obj.ticker,
+            weight=orm_obj.weight,
+            references=json.loads(orm_obj.references or "[]"),
+            links=json.loads(orm_obj.links or "[]"),
+            created_at=getattr(orm_obj, "created_at", None) or getattr(orm_obj, "refreshed_at", None),
+        )
+    
+    def _domain_to_row(self, domain_obj: AssetRecommendation, created_at: datetime) -> dict:
+        """Convert domain entity to an insert parameter set."""
+        return {
+            "ticker": domain_obj.ticker,
+            "weight": domain_obj.weight,
+            "references": json.dumps(domain_obj.references),
+            "links": json.dumps(domain_obj.links),
+            "created_at": domain_obj.created_at or created_at,
+        }
+    
+    async def save(self, recommendation: AssetRecommendation) -> AssetRecommendation:
+        """Save a single asset recommendation."""
+        results = await self.save_many([recommendation])
+        return results[0]
+    
+    async def save_many(self, recommendations: List[AssetRecommendation]) -> List[AssetRecommendation]:
+        """Save multiple asset recommendations."""
+        if not recommendations:
+            return []
+        
+        results = await self._run(self._save_many, recommendations)
+        logger.info(f"Saved {len(results)} asset recommendations")
+        return results
+    
+    def _save_many(self, session: Session, recommendations: List[AssetRecommendation]) -> List[AssetRecommendation]:
+        now = datetime.utcnow()
+        rows = session.execute(
+            insert(AssetRecommendationORM).returning(AssetRecommendationORM, sort_by_parameter_order=True),
+            [self._domain_to_row(recommendation, now) for recommendation in recommendations],
+        ).scalars().all()
+        return [self._orm_to_domain(row) for row in rows]
+    
+    async def get_by_ticker(self, ticker: str) -> List[AssetRecommendation]:
+        """Get recommendations by ticker."""
+        return await self._run(self._select, AssetRecommendationORM.ticker == ticker)
+    
+    async def get_since(self, since: datetime) -> List[AssetRecommendation]:
+        """Get recommendations created since a given time."""
+        return await self._run(self._select, AssetRecommendationORM.created_at >= since)
+    
+    def _select(self, session: Session, *criteria: Any) -> List[AssetRecommendation]:
+        orm_objects = session.execute(
+            select(AssetRecommendationORM).where(*criteria).order_by(desc(AssetRecommendationORM.created_at))
+        ).scalars().all()
+        return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+    
+    async def get_top_recommendations(self, limit: int = 10) -> List[AssetRecommendation]:
+        """Get top recommendations by weight, as of the last leaderboard refresh."""
+        return await self._run(self._get_top, limit)
+    
+    def _get_top(self, session: Session, limit: int) -> List[AssetRecommendation]:
+        orm_objects = session.execute(
+            select(LeaderboardORM).where(LeaderboardORM.rank <= limit).order_by(LeaderboardORM.rank)
+        ).scalars().all()
+        return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+    
+    async def refresh_leaderboard(self, recommendations: List[AssetRecommendation]) -> List[AssetRecommendation]:
+        """Replace the current top-N leaderboard, ranked by weight."""
+        ranked = sorted(recommendations, key=lambda recommendation: recommendation.weight, reverse=True)
+        await self._run(self._refresh_leaderboard, ranked)
+        logger.info(f"Refreshed leaderboard with {len(ranked)} assets")
+        return ranked
+    
+    def _refresh_leaderboard(self, session: Session, ranked: List[AssetRecommendation]) -> None:
+        now = datetime.utcnow()
+        rows = [self._domain_to_row(recommendation, now) for recommendation in ranked]
+        # Readers see either the old board or the new one, never a mix
+        session.execute(delete(LeaderboardORM))
+        if not rows:
+            return
+        session.execute(
+            insert(LeaderboardORM),
+            [
+                {
+                    "rank": rank,
+                    "ticker": row["ticker"],
+                    "weight": row["weight"],
+                    "references": row["references"],
+                    "links": row["links"],
+                    "refreshed_at": now,
+                }
+                for rank, row in enumerate(rows, start=1)
+            ],
+        )
+
+
+class AsyncSQLAlchemyAssetRecommendationRepository(AsyncSessionMixin, SQLAlchemyAssetRecommendationRepository):
+    """AssetRecommendationRepository on a native async (asyncpg) session."""
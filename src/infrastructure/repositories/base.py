@@ -0,0 +1,99 @@
+"""
+Shared session handling for the SQLAlchemy repositories.
+"""
+import time
+from typing import Any, AsyncIterator, Callable, Optional, Sequence, TypeVar
+
+from sqlalchemy import Executable, Row
+
+from ..database.config import db_config
+from ..instrumentation import metrics, stage
+
+T = TypeVar("T")
+
+
+def dialect_insert(dialect_name: str) -> Optional[Callable[..., Any]]:
+    """The ``insert`` construct with ``on_conflict_do_*`` support for a dialect, None if it has none."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def _stage_name(repository: Any, operation: str) -> str:
+    """``<Repository>.<operation>`` without the driver prefixes, e.g. ``ImpactAnalysisRepository.save_rows``."""
+    name = type(repository).__name__.replace("Async", "").replace("SQLAlchemy", "")
+    return f"{name}.{operation.lstrip('_')}"
+
+
+class SQLAlchemyRepository:
+    """Runs repository operations on a blocking session.
+
+    Each operation is written once as a plain function of a ``Session``.
+    ``_run`` decides how that function is executed, so the async variant
+    below can reuse every query unchanged. Every operation is timed as an
+    instrumentation stage, with the rows it returned and its round trips.
+    """
+    
+    async def _run(self, operation: Callable[..., T], *args: Any) -> T:
+        """Execute ``operation(session, *args)`` inside a committed session."""
+        with stage(_stage_name(self, operation.__name__)) as current:
+            with db_config.get_session() as session:
+                result = operation(session, *args)
+            if isinstance(result, list):
+                current.record(rows_out=len(result))
+            return result
+    
+    async def _stream(self, statement: Executable, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        """Execute ``statement`` on a server-side cursor and yield its rows ``batch_size`` at a time."""
+        started, rows = time.perf_counter(), 0
+        try:
+            with db_config.get_session() as session:
+                result = session.execute(statement.execution_options(yield_per=batch_size))
+                for partition in result.partitions():
+                    rows += len(partition)
+                    yield partition
+        finally:
+            _observe_stream(self, started, rows)
+
+
+class AsyncSessionMixin:
+    """Runs repository operations on an ``AsyncSession`` (asyncpg / aiosqlite).
+
+    ``AsyncSession.run_sync`` hands the operation a regular ``Session`` whose
+    I/O is awaited on the event loop, so queries no longer block the fetches
+    and LLM calls sharing that loop. Mix in before the blocking repository
+    class.
+    """
+    
+    async def _run(self, operation: Callable[..., T], *args: Any) -> T:
+        """Execute ``operation(session, *args)`` inside a committed async session."""
+        with stage(_stage_name(self, operation.__name__)) as current:
+            async with db_config.get_async_session() as session:
+                result = await session.run_sync(operation, *args)
+            if isinstance(result, list):
+                current.record(rows_out=len(result))
+            return result
+    
+    async def _stream(self, statement: Executable, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        """Execute ``statement`` on a server-side cursor and yield its rows ``batch_size`` at a time."""
+        started, rows = time.perf_counter(), 0
+        try:
+            async with db_config.get_async_session() as session:
+                result = await session.stream(statement.execution_options(yield_per=batch_size))
+                async for partition in result.partitions():
+                    rows += len(partition)
+                    yield partition
+        finally:
+            _observe_stream(self, started, rows)
+
+
+def _observe_stream(repository: Any, started: float, rows: int) -> None:
+    # Streams hand control back to the consumer between batches, so they are timed
+    # without becoming the current stage; their round trips count for the caller
+    name = _stage_name(repository, "stream")
+    metrics.observe(name, time.perf_counter() - started)
+    metrics.add(name, rows_out=rows)
@@ -0,0 +1,73 @@
+"""
+Concrete implementation of FeedStateRepository using SQLAlchemy.
+"""
+import logging
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ...domain.repositories import FeedStateRepository
+from ...domain.entities import FeedState
+from ..database.models import FeedStateORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyFeedStateRepository(SQLAlchemyRepository, FeedStateRepository):
+    """SQLAlchemy implementation of FeedStateRepository."""
+    
+    def _orm_to_domain(self, orm_obj: FeedStateORM) -> FeedState:
+        """Convert ORM object to domain entity."""
+        return FeedState(
+            url=orm_obj.url,
+            etag=orm_obj.etag,
+            last_modified=orm_obj.last_modified,
+            checked_at=orm_obj.checked_at,
+            poll_interval=orm_obj.poll_interval,
+            next_poll_at=orm_obj.next_poll_at,
+            newest_published=orm_obj.newest_published,
+        )
+    
+    async def get_all(self) -> List[FeedState]:
+        """Get the stored state of every known feed."""
+        return await self._run(self._get_all)
+    
+    def _get_all(self, session: Session) -> List[FeedState]:
+        orm_objects = session.execute(select(FeedStateORM)).scalars().all()
+        return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+    
+    async def save_many(self, states: List[FeedState]) -> List[FeedState]:
+        """Insert or update the state of multiple feeds."""
+        if not states:
+            return []
+        
+        await self._run(self._save_many, states)
+        logger.info(f"Saved state for {len(states)} feeds")
+        return states
+    
+    def _save_many(self, session: Session, states: List[FeedState]) -> None:
+        # One lookup for all feeds instead of a merge() per feed
+        existing = {
+            orm_obj.url: orm_obj
+            for orm_obj in session.execute(
+                select(FeedStateORM).where(FeedStateORM.url.in_([state.url for state in states]))
+            ).scalars()
+        }
+        
+        for state in states:
+            orm_obj = existing.get(state.url)
+            if orm_obj is None:
+                orm_obj = FeedStateORM(url=state.url)
+                session.add(orm_obj)
+                existing[state.url] = orm_obj
+            orm_obj.etag = state.etag
+            orm_obj.last_modified = state.last_modified
+            orm_obj.checked_at = state.checked_at
+            orm_obj.poll_interval = state.poll_interval
+            orm_obj.next_poll_at = state.next_poll_at
+            orm_obj.newest_published = state.newest_published
+
+
+class AsyncSQLAlchemyFeedStateRepository(AsyncSessionMixin, SQLAlchemyFeedStateRepository):
+    """FeedStateRepository on a native async (asyncpg) session."""
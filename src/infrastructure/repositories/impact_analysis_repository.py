@@ -1,26 +1,110 @@
 """
 Concrete implementation of ImpactAnalysisRepository using SQLAlchemy.
 """
+import hashlib
+import io
 import json
 import logging
-from typing import List
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, insert, or_, select, text
 
 from ...domain.repositories import ImpactAnalysisRepository
-from ...domain.entities import ImpactAnalysis
-from ..database.config import db_config
+from ...domain.entities import ImpactAnalysis, ImpactPoint, TickerScore
 from ..database.models import ImpactAnalysisORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository, dialect_insert
 
 logger = logging.getLogger(__name__)
 
+# Columns written by the application; the rest are filled by the database
+_WRITE_COLUMNS = (
+    "entity", "type", "impact", "impact_description", "summary", "link", "location", "timestamp", "content_hash",
+)
+# Columns an upsert may change on a row that already exists
+_UPDATE_COLUMNS = ("impact", "impact_description", "summary")
+_RETURNING_COLUMNS = (
+    ImpactAnalysisORM.id,
+    ImpactAnalysisORM.entity,
+    ImpactAnalysisORM.type,
+    ImpactAnalysisORM.impact,
+    ImpactAnalysisORM.impact_description,
+    ImpactAnalysisORM.summary,
+    ImpactAnalysisORM.link,
+    ImpactAnalysisORM.location,
+    ImpactAnalysisORM.timestamp,
+    ImpactAnalysisORM.inserted_at,
+    ImpactAnalysisORM.updated_at,
+    ImpactAnalysisORM.content_hash,
+)
 
-class SQLAlchemyImpactAnalysisRepository(ImpactAnalysisRepository):
-    """SQLAlchemy implementation of ImpactAnalysisRepository."""
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Natural key of an impact analysis row: md5 of entity, type, link, timestamp and location.
+
+    The timestamp is taken as naive UTC to the second, the same value
+    ``to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS')`` gives in PostgreSQL.
+    The location is only appended when set, so rows without one keep the
+    key they had before the column existed.
+    """
+    timestamp = row["timestamp"]
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    parts = [
+        str(row["entity"]),
+        str(row["type"]),
+        row.get("link") or "",
+        timestamp.replace(microsecond=0).isoformat(),
+    ]
+    if row.get("location"):
+        parts.append(str(row["location"]))
+    return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _copy_value(value: Any) -> str:
+    """Encode a value for PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class SQLAlchemyImpactAnalysisRepository(SQLAlchemyRepository, ImpactAnalysisRepository):
+    """SQLAlchemy implementation of ImpactAnalysisRepository.
+
+    ``save_many`` writes rows with a multi-row ``INSERT ... RETURNING``
+    instead of flushing ORM objects and refreshing them one by one. On
+    PostgreSQL (psycopg2), batches of at least ``copy_threshold`` rows are
+    streamed with ``COPY`` into a temporary table first and moved over with a
+    single ``INSERT ... SELECT ... RETURNING``.
+
+    Rows are upserted on their ``(content_hash, timestamp)`` natural key
+    (the hash already covers the timestamp; it is part of the key because
+    unique indexes of a partitioned table must include the partition
+    column, see ``database.partitions``). A replayed row
+    whose impact, description and summary are unchanged is skipped by the
+    database without a write; a changed one is updated in place and comes
+    back with the impact it had before as ``previous_impact``, read (and
+    locked) in the same transaction just before the upsert.
+
+    Every operation is a plain function of a ``Session`` executed through
+    ``_run``; see ``AsyncSQLAlchemyImpactAnalysisRepository`` for the
+    non-blocking variant.
+    """
+    
+    def __init__(self, copy_threshold: Optional[int] = None):
+        self.copy_threshold = copy_threshold or int(os.getenv("DB_COPY_THRESHOLD", "5000"))
     
     def _orm_to_domain(self, orm_obj: ImpactAnalysisORM) -> ImpactAnalysis:
-        """Convert ORM object to domain entity."""
+        """Convert ORM object (or a result row with the same columns) to domain entity."""
         return ImpactAnalysis(
             id=orm_obj.id,
             entity=orm_obj.entity,
@@ -29,81 +113,219 @@ class SQLAlchemyImpactAnalysisRepository(ImpactAnalysisRepository):
             impact_description=orm_obj.impact_description,
             summary=orm_obj.summary,
             link=orm_obj.link,
+            location=orm_obj.location,
             timestamp=orm_obj.timestamp,
             inserted_at=orm_obj.inserted_at,
             updated_at=orm_obj.updated_at,
         )
     
-    def _domain_to_orm(self, domain_obj: ImpactAnalysis) -> ImpactAnalysisORM:
-        """Convert domain entity to ORM object."""
-        return ImpactAnalysisORM(
-            entity=domain_obj.entity,
-            type=domain_obj.type.value,
-            impact=domain_obj.impact,
-            impact_description=domain_obj.impact_description,
-            summary=domain_obj.summary,
-            link=domain_obj.link,
-            timestamp=domain_obj.timestamp or datetime.utcnow(),
-        )
+    def _domain_to_row(self, domain_obj: ImpactAnalysis) -> Dict[str, Any]:
+        """Convert domain entity to an insert parameter set."""
+        timestamp = domain_obj.timestamp or datetime.utcnow()
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+        row = {
+            "entity": domain_obj.entity,
+            "type": domain_obj.type.value,
+            "impact": domain_obj.impact,
+            "impact_description": domain_obj.impact_description,
+            "summary": domain_obj.summary,
+            "link": domain_obj.link,
+            "location": domain_obj.location,
+            "timestamp": timestamp,
+        }
+        row["content_hash"] = content_hash(row)
+        return row
     
     async def save(self, analysis: ImpactAnalysis) -> ImpactAnalysis:
         """Save a single impact analysis."""
-        with db_config.get_session() as session:
-            orm_obj = self._domain_to_orm(analysis)
-            session.add(orm_obj)
-            session.flush()  # Get the ID
-            session.refresh(orm_obj)
-            result = self._orm_to_domain(orm_obj)
-            logger.info(f"Saved impact analysis for entity: {analysis.entity}")
-            return result
+        results = await self.save_many([analysis])
+        logger.info(f"Saved impact analysis for entity: {analysis.entity}")
+        # An unchanged replay writes nothing; hand back what was passed in
+        return results[0] if results else analysis
     
     async def save_many(self, analyses: List[ImpactAnalysis]) -> List[ImpactAnalysis]:
-        """Save multiple impact analyses."""
-        with db_config.get_session() as session:
-            orm_objects = [self._domain_to_orm(analysis) for analysis in analyses]
-            session.add_all(orm_objects)
-            session.flush()
-            
-            # Refresh all objects to get IDs
-            for orm_obj in orm_objects:
-                session.refresh(orm_obj)
-            
-            results = [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
-            logger.info(f"Saved {len(analyses)} impact analyses")
-            return results
+        """Save multiple impact analyses in a few round trips.
+
+        Returns the rows that were inserted or changed; exact replays of
+        stored rows are not returned, changed rows carry ``previous_impact``.
+        """
+        if not analyses:
+            return []
+        
+        # One row per natural key, the last one wins (ON CONFLICT cannot touch a row twice)
+        rows = list({row["content_hash"]: row for row in map(self._domain_to_row, analyses)}.values())
+        results = await self._run(self._save_rows, rows)
+        logger.info(f"Saved {len(results)} of {len(analyses)} impact analyses ({len(analyses) - len(results)} unchanged)")
+        return results
+    
+    def _save_rows(self, session: Session, rows: List[Dict[str, Any]]) -> List[ImpactAnalysis]:
+        dialect = session.get_bind().dialect
+        previous = self._stored_impacts(session, rows)
+        if len(rows) >= self.copy_threshold and dialect.driver == "psycopg2":
+            written = self._copy_insert(session, rows)
+        elif dialect_insert(dialect.name) is not None:
+            written = session.execute(self._upsert(dialect.name).returning(*_RETURNING_COLUMNS), rows).all()
+        else:
+            written = session.execute(
+                insert(ImpactAnalysisORM).returning(*_RETURNING_COLUMNS, sort_by_parameter_order=True),
+                rows,
+            ).all()
+        saved = []
+        for row in written:
+            analysis = self._orm_to_domain(row)
+            analysis.previous_impact = previous.get(row.content_hash)
+            saved.append(analysis)
+        return saved
+
+    def _stored_impacts(self, session: Session, rows: List[Dict[str, Any]]) -> Dict[str, float]:
+        """Current impact of the rows that already exist, by content_hash, locked until commit."""
+        stored = session.execute(
+            select(ImpactAnalysisORM.content_hash, ImpactAnalysisORM.impact)
+            .where(
+                ImpactAnalysisORM.content_hash.in_([row["content_hash"] for row in rows]),
+                # Keeps the lookup on the partitions the batch can touch
+                ImpactAnalysisORM.timestamp.between(
+                    min(row["timestamp"] for row in rows), max(row["timestamp"] for row in rows)
+                ),
+            )
+            .with_for_update()
+        )
+        return {content_hash: impact for content_hash, impact in stored}
+    
+    def _upsert(self, dialect_name: str) -> Any:
+        """``INSERT ... ON CONFLICT (content_hash, timestamp) DO UPDATE`` that only rewrites changed rows."""
+        statement = dialect_insert(dialect_name)(ImpactAnalysisORM)
+        excluded = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=[ImpactAnalysisORM.content_hash, ImpactAnalysisORM.timestamp],
+            set_={
+                **{column: excluded[column] for column in _UPDATE_COLUMNS},
+                "updated_at": func.now(),
+            },
+            where=or_(*(
+                getattr(ImpactAnalysisORM, column).is_distinct_from(excluded[column])
+                for column in _UPDATE_COLUMNS
+            )),
+        )
+    
+    def _copy_insert(self, session: Session, rows: List[Dict[str, Any]]) -> Sequence[Any]:
+        """Bulk load rows with COPY through a temporary staging table (PostgreSQL only)."""
+        columns = ", ".join(_WRITE_COLUMNS)
+        connection = session.connection()
+        connection.exec_driver_sql(
+            f"CREATE TEMP TABLE impact_analysis_load ON COMMIT DROP AS "
+            f"SELECT {columns} FROM impact_analysis WITH NO DATA"
+        )
+        
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row[column]) for column in _WRITE_COLUMNS))
+            buffer.write("\n")
+        buffer.seek(0)
+        
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY impact_analysis_load ({columns}) FROM STDIN", buffer)
+        finally:
+            cursor.close()
+        
+        returning = ", ".join(f"impact_analysis.{column.name}" for column in _RETURNING_COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in _UPDATE_COLUMNS)
+        changed = " OR ".join(
+            f"impact_analysis.{column} IS DISTINCT FROM excluded.{column}" for column in _UPDATE_COLUMNS
+        )
+        # inserted_at / updated_at defaults are client-side, so set them here
+        return connection.exec_driver_sql(
+            f"INSERT INTO impact_analysis ({columns}, inserted_at, updated_at) "
+            f"SELECT {columns}, now(), now() FROM impact_analysis_load "
+            f"ON CONFLICT (content_hash, timestamp) DO UPDATE SET {updates}, updated_at = now() WHERE {changed} "
+            f"RETURNING {returning}"
+        ).all()
     
     async def get_by_entity(self, entity: str) -> List[ImpactAnalysis]:
         """Get analyses by entity name."""
-        with db_config.get_session() as session:
-            orm_objects = session.query(ImpactAnalysisORM).filter(
-                ImpactAnalysisORM.entity == entity
-            ).order_by(desc(ImpactAnalysisORM.timestamp)).all()
-            
-            return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+        return await self._run(self._select, ImpactAnalysisORM.entity == entity)
     
     async def get_by_type(self, type_name: str) -> List[ImpactAnalysis]:
         """Get analyses by type."""
-        with db_config.get_session() as session:
-            orm_objects = session.query(ImpactAnalysisORM).filter(
-                ImpactAnalysisORM.type == type_name
-            ).order_by(desc(ImpactAnalysisORM.timestamp)).all()
-            
-            return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+        return await self._run(self._select, ImpactAnalysisORM.type == type_name)
     
     async def get_since(self, since: datetime) -> List[ImpactAnalysis]:
         """Get analyses created since a given time."""
-        with db_config.get_session() as session:
-            orm_objects = session.query(ImpactAnalysisORM).filter(
-                ImpactAnalysisORM.timestamp >= since
-            ).order_by(desc(ImpactAnalysisORM.timestamp)).all()
-            
-            return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+        return await self._run(self._select, ImpactAnalysisORM.timestamp >= since)
     
     async def get_all(self) -> List[ImpactAnalysis]:
         """Get all analyses."""
-        with db_config.get_session() as session:
-            orm_objects = session.query(ImpactAnalysisORM).order_by(
-                desc(ImpactAnalysisORM.timestamp)
-            ).all()
-            
-            return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects] 
\ No newline at end of file
+        return await self._run(self._select)
+    
+    async def stream_points(
+        self,
+        types: List[str],
+        since: datetime,
+        until: Optional[datetime] = None,
+        batch_size: int = 5000,
+    ) -> AsyncIterator[List[ImpactPoint]]:
+        """Stream the scoring columns of analyses of the given types in [since, until), batch by batch.
+        
+        Type and time window are filtered in SQL (idx_timestamp_type) and
+        only the six scoring columns are selected, never the Text ones.
+        Rows come off a server-side cursor, so at most one batch is held
+        in memory; consume the stream to the end or close it.
+        """
+        criteria = [ImpactAnalysisORM.type.in_(types), ImpactAnalysisORM.timestamp >= since]
+        if until is not None:
+            criteria.append(ImpactAnalysisORM.timestamp < until)
+        statement = select(
+            ImpactAnalysisORM.type,
+            ImpactAnalysisORM.entity,
+            ImpactAnalysisORM.location,
+            ImpactAnalysisORM.impact,
+            ImpactAnalysisORM.timestamp,
+            ImpactAnalysisORM.link,
+        ).where(*criteria)
+        async for partition in self._stream(statement, batch_size):
+            yield [ImpactPoint(*row) for row in partition]
+    
+    async def get_decayed_scores(
+        self,
+        since: datetime,
+        as_of: datetime,
+        decay: float,
+        damping: float,
+        hops: int,
+        exclude: Optional[List[ImpactAnalysis]] = None,
+    ) -> Optional[List[TickerScore]]:
+        """Per-ticker decayed scores of the analyses since a given time, aggregated by the database.
+        
+        Runs the decayed_ticker_scores function (see migrations), so only
+        one row per ticker leaves PostgreSQL whatever the size of the
+        window. Other databases return None.
+        """
+        hashes = sorted({self._domain_to_row(analysis)["content_hash"] for analysis in exclude or []})
+        return await self._run(self._decayed_scores, since, as_of, decay, damping, hops, hashes)
+    
+    def _decayed_scores(
+        self, session: Session, since: datetime, as_of: datetime, decay: float, damping: float, hops: int,
+        hashes: List[str],
+    ) -> Optional[List[TickerScore]]:
+        if session.get_bind().dialect.name != "postgresql":
+            return None
+        rows = session.execute(
+            text(
+                "SELECT ticker, score, links FROM "
+                "decayed_ticker_scores(:since, :as_of, :decay, :damping, :hops, CAST(:exclude AS text[]))"
+            ),
+            {"since": since, "as_of": as_of, "decay": decay, "damping": damping, "hops": hops, "exclude": hashes},
+        ).all()
+        return [TickerScore(ticker=row.ticker, score=row.score, as_of=as_of, references=row.links) for row in rows]
+    
+    def _select(self, session: Session, *criteria: Any) -> List[ImpactAnalysis]:
+        orm_objects = session.execute(
+            select(ImpactAnalysisORM).where(*criteria).order_by(desc(ImpactAnalysisORM.timestamp))
+        ).scalars().all()
+        return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+
+
+class AsyncSQLAlchemyImpactAnalysisRepository(AsyncSessionMixin, SQLAlchemyImpactAnalysisRepository):
+    """ImpactAnalysisRepository on a native async (asyncpg) session."""
@@ -0,0 +1,141 @@
+"""
+Concrete implementation of RelationRepository using SQLAlchemy.
+"""
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+from datetime import datetime
+from sqlalchemy import String, literal, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from ...domain.repositories import RelationRepository
+from ...domain.entities import Relation, RelationType
+from ..database.models import AssetLocationORM, AssetScopeORM, ScopeRelationORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository, dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Table and (source, target) columns of each relation kind
+_TABLES = {
+    RelationType.TAG: (AssetScopeORM, "asset", "scope"),
+    RelationType.LOCATION: (AssetLocationORM, "asset", "location"),
+    RelationType.SCOPE_RELATION: (ScopeRelationORM, "scope1", "scope2"),
+}
+
+
+class SQLAlchemyRelationRepository(SQLAlchemyRepository, RelationRepository):
+    """SQLAlchemy implementation of RelationRepository.
+
+    Each kind has its own table keyed by its two names, so a relation is
+    stored once and every repeat only bumps ``occurrences`` and
+    ``last_seen_at``. A relation saved with 0 occurrences (a replayed
+    report) is inserted with 1 if it is missing, and otherwise only
+    refreshes ``last_seen_at``. Scope relations are undirected and stored with the
+    smaller name first. ``get_all`` reads all three tables with one
+    ``UNION ALL``.
+    """
+    
+    async def get_all(self) -> List[Relation]:
+        """Get every relation of every kind in one query."""
+        return await self._run(self._get_all)
+    
+    def _get_all(self, session: Session) -> List[Relation]:
+        query = union_all(*(
+            select(
+                literal(kind.value, String).label("type"),
+                getattr(orm, source).label("source"),
+                getattr(orm, target).label("target"),
+                orm.occurrences,
+                orm.first_seen_at,
+                orm.last_seen_at,
+            )
+            for kind, (orm, source, target) in _TABLES.items()
+        ))
+        return [
+            Relation(
+                type=row.type,
+                source=row.source,
+                target=row.target,
+                occurrences=row.occurrences,
+                first_seen_at=row.first_seen_at,
+                last_seen_at=row.last_seen_at,
+            )
+            for row in session.execute(query)
+        ]
+    
+    async def save_many(self, relations: List[Relation]) -> List[Relation]:
+        """Insert new relations and add to the occurrence count of known ones."""
+        counts: Dict[Tuple[RelationType, str, str], int] = Counter()
+        for relation in relations:
+            source, target = relation.source, relation.target
+            if relation.type == RelationType.SCOPE_RELATION:
+                if source == target:
+                    continue
+                source, target = min(source, target), max(source, target)
+            counts[(relation.type, source, target)] += relation.occurrences
+        if not counts:
+            return []
+        
+        now = datetime.utcnow()
+        merged = [
+            Relation(type=kind, source=source, target=target, occurrences=count, first_seen_at=now, last_seen_at=now)
+            for (kind, source, target), count in counts.items()
+        ]
+        await self._run(self._save_many, merged)
+        logger.info(f"Saved {len(merged)} relations")
+        return merged
+    
+    def _save_many(self, session: Session, relations: List[Relation]) -> None:
+        insert = dialect_insert(session.get_bind().dialect.name)
+        for kind, (orm, source, target) in _TABLES.items():
+            rows = [
+                {
+                    source: relation.source,
+                    target: relation.target,
+                    "occurrences": relation.occurrences,
+                    "first_seen_at": relation.first_seen_at,
+                    "last_seen_at": relation.last_seen_at,
+                }
+                for relation in relations
+                if relation.type == kind
+            ]
+            if not rows:
+                continue
+            
+            if insert is not None:
+                statement = insert(orm)
+                counted = [row for row in rows if row["occurrences"]]
+                replayed = [{**row, "occurrences": 1} for row in rows if not row["occurrences"]]
+                for group, set_ in [
+                    (counted, {"occurrences": orm.occurrences + statement.excluded.occurrences}),
+                    (replayed, {}),
+                ]:
+                    if group:
+                        session.execute(
+                            statement.on_conflict_do_update(
+                                index_elements=[source, target],
+                                set_={**set_, "last_seen_at": statement.excluded.last_seen_at},
+                            ),
+                            group,
+                        )
+                continue
+            
+            # No ON CONFLICT: one lookup for the batch, then update or add
+            key_columns = (getattr(orm, source), getattr(orm, target))
+            existing = {
+                (getattr(orm_obj, source), getattr(orm_obj, target)): orm_obj
+                for orm_obj in session.execute(
+                    select(orm).where(tuple_(*key_columns).in_([(row[source], row[target]) for row in rows]))
+                ).scalars()
+            }
+            for row in rows:
+                orm_obj = existing.get((row[source], row[target]))
+                if orm_obj is None:
+                    session.add(orm(**{**row, "occurrences": max(row["occurrences"], 1)}))
+                else:
+                    orm_obj.occurrences += row["occurrences"]
+                    orm_obj.last_seen_at = row["last_seen_at"]
+
+
+class AsyncSQLAlchemyRelationRepository(AsyncSessionMixin, SQLAlchemyRelationRepository):
+    """RelationRepository on a native async (asyncpg) session."""
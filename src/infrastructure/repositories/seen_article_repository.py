@@ -0,0 +1,70 @@
+"""
+Concrete implementation of SeenArticleRepository using SQLAlchemy.
+"""
+import logging
+from typing import Dict, List
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ...domain.repositories import SeenArticleRepository
+from ...domain.entities import SeenArticle
+from ..database.models import SeenArticleORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemySeenArticleRepository(SQLAlchemyRepository, SeenArticleRepository):
+    """SQLAlchemy implementation of SeenArticleRepository."""
+    
+    async def get_keys_since(self, since: datetime) -> Dict[str, datetime]:
+        """Get the keys of articles seen since a given time, with when they were seen."""
+        return await self._run(self._get_keys_since, since)
+    
+    def _get_keys_since(self, session: Session, since: datetime) -> Dict[str, datetime]:
+        return dict(session.execute(
+            select(SeenArticleORM.key, SeenArticleORM.seen_at).where(SeenArticleORM.seen_at >= since)
+        ).all())
+    
+    async def get_seen(self, keys: List[str]) -> Dict[str, datetime]:
+        """Get those of the given keys that were already seen, with when they were seen."""
+        if not keys:
+            return {}
+        return await self._run(self._get_seen, keys)
+    
+    def _get_seen(self, session: Session, keys: List[str]) -> Dict[str, datetime]:
+        return dict(session.execute(
+            select(SeenArticleORM.key, SeenArticleORM.seen_at).where(SeenArticleORM.key.in_(keys))
+        ).all())
+    
+    async def save_many(self, articles: List[SeenArticle]) -> List[SeenArticle]:
+        """Record multiple articles as seen, ignoring ones already recorded."""
+        if not articles:
+            return []
+        
+        new_articles = await self._run(self._save_many, articles)
+        logger.info(f"Marked {len(new_articles)} articles as seen")
+        return new_articles
+    
+    def _save_many(self, session: Session, articles: List[SeenArticle]) -> List[SeenArticle]:
+        existing = set(session.execute(
+            select(SeenArticleORM.key).where(SeenArticleORM.key.in_({article.key for article in articles}))
+        ).scalars())
+        
+        new_articles = []
+        for article in articles:
+            if article.key in existing:
+                continue
+            existing.add(article.key)
+            session.add(SeenArticleORM(
+                key=article.key,
+                link=article.link[:500] if article.link else None,
+                seen_at=article.seen_at or datetime.utcnow(),
+            ))
+            new_articles.append(article)
+        return new_articles
+
+
+class AsyncSQLAlchemySeenArticleRepository(AsyncSessionMixin, SQLAlchemySeenArticleRepository):
+    """SeenArticleRepository on a native async (asyncpg) session."""
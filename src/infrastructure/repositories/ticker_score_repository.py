@@ -0,0 +1,75 @@
+"""
+Concrete implementation of TickerScoreRepository using SQLAlchemy.
+"""
+import json
+import logging
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ...domain.repositories import TickerScoreRepository
+from ...domain.entities import TickerScore
+from ..database.models import TickerScoreORM
+from .base import AsyncSessionMixin, SQLAlchemyRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyTickerScoreRepository(SQLAlchemyRepository, TickerScoreRepository):
+    """SQLAlchemy implementation of TickerScoreRepository."""
+    
+    def _orm_to_domain(self, orm_obj: TickerScoreORM) -> TickerScore:
+        """Convert ORM object to domain entity."""
+        return TickerScore(
+            ticker=orm_obj.ticker,
+            score=orm_obj.score,
+            as_of=orm_obj.as_of,
+            references=json.loads(orm_obj.references or "[]"),
+            updated_at=orm_obj.updated_at,
+        )
+    
+    async def get_many(self, tickers: List[str]) -> List[TickerScore]:
+        """Get the scores of the given tickers; unknown tickers are left out."""
+        if not tickers:
+            return []
+        return await self._run(self._select, TickerScoreORM.ticker.in_(tickers))
+    
+    async def get_all(self) -> List[TickerScore]:
+        """Get the scores of every ticker."""
+        return await self._run(self._select)
+    
+    def _select(self, session: Session, *criteria) -> List[TickerScore]:
+        orm_objects = session.execute(select(TickerScoreORM).where(*criteria)).scalars().all()
+        return [self._orm_to_domain(orm_obj) for orm_obj in orm_objects]
+    
+    async def save_many(self, scores: List[TickerScore]) -> List[TickerScore]:
+        """Insert or update multiple ticker scores."""
+        if not scores:
+            return []
+        
+        await self._run(self._save_many, scores)
+        logger.info(f"Saved scores of {len(scores)} tickers")
+        return scores
+    
+    def _save_many(self, session: Session, scores: List[TickerScore]) -> None:
+        # One lookup for all tickers instead of a merge() per ticker
+        existing = {
+            orm_obj.ticker: orm_obj
+            for orm_obj in session.execute(
+                select(TickerScoreORM).where(TickerScoreORM.ticker.in_([score.ticker for score in scores]))
+            ).scalars()
+        }
+        
+        for score in scores:
+            orm_obj = existing.get(score.ticker)
+            if orm_obj is None:
+                orm_obj = TickerScoreORM(ticker=score.ticker)
+                session.add(orm_obj)
+                existing[score.ticker] = orm_obj
+            orm_obj.score = score.score
+            orm_obj.as_of = score.as_of
+            orm_obj.references = json.dumps(score.references)
+
+
+class AsyncSQLAlchemyTickerScoreRepository(AsyncSessionMixin, SQLAlchemyTickerScoreRepository):
+    """TickerScoreRepository on a native async (asyncpg) session."""